@@ -0,0 +1,4 @@
+# markdown_to_word/__init__.py
+#
+# Command-line entry point: python -m markdown_to_word TEMPLATE INPUTS... -o OUTPUT_DIR
+# The converter itself lives in the src package.
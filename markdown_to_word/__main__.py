@@ -0,0 +1,8 @@
+# markdown_to_word/__main__.py
+
+import sys
+
+from src.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
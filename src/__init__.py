@@ -1,14 +1,78 @@
 # src/__init__.py
 
-from .style_manager import StyleManager
-from .converter import MarkdownToWordConverter
-from .formatters import TextFormatter
-from .utils import create_unique_filename, setup_logging
+import importlib
+
+# Public names and the modules defining them; a module is imported on first access, so
+# importing the package, e.g. for the command line, loads nothing it does not use
+_EXPORTS = {
+    'StyleManager': 'style_manager',
+    'MarkdownToWordConverter': 'converter',
+    'IncrementalConverter': 'incremental',
+    'ChapterConverter': 'chapters',
+    'TextFormatter': 'formatters',
+    'DocumentBackend': 'backends',
+    'WordBackend': 'backends',
+    'OoxmlBackend': 'backends',
+    'create_backend': 'backends',
+    'FakeWordApplication': 'fake_word',
+    'CallRecorder': 'fake_word',
+    'OoxmlDocument': 'ooxml_writer',
+    'TemplatePackage': 'ooxml_writer',
+    'TemplateCache': 'template_cache',
+    'get_template': 'template_cache',
+    'ConversionService': 'service',
+    'AsyncConverter': 'async_api',
+    'convert_async': 'async_api',
+    'convert_many': 'async_api',
+    'WordInstancePool': 'word_pool',
+    'Block': 'tokenizer',
+    'BlockTokenizer': 'tokenizer',
+    'tokenize': 'tokenizer',
+    'parse_markdown': 'tokenizer',
+    'DocumentIR': 'ir',
+    'create_unique_filename': 'utils',
+    'setup_logging': 'utils',
+}
 
 __all__ = [
     'StyleManager',
     'MarkdownToWordConverter',
+    'IncrementalConverter',
+    'ChapterConverter',
     'TextFormatter',
+    'DocumentBackend',
+    'WordBackend',
+    'OoxmlBackend',
+    'create_backend',
+    'FakeWordApplication',
+    'CallRecorder',
+    'OoxmlDocument',
+    'TemplatePackage',
+    'TemplateCache',
+    'get_template',
+    'ConversionService',
+    'AsyncConverter',
+    'convert_async',
+    'convert_many',
+    'WordInstancePool',
+    'Block',
+    'BlockTokenizer',
+    'tokenize',
+    'parse_markdown',
+    'DocumentIR',
     'create_unique_filename',
     'setup_logging'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,211 @@
+# src/async_api.py
+
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Union
+
+from .backends import DocumentBackend
+from .batch import BatchJob, BatchResult, _convert_job, _init_worker, plan_jobs
+from .converter import ConversionCancelled, MarkdownToWordConverter
+from .template_cache import get_template
+from .tracing import Tracer
+
+
+def _check_thread_backend(backend: Union[str, Callable[..., DocumentBackend]]):
+    """
+    Refuse the Word backend on threads
+    Word is driven through COM, whose objects belong to the apartment of the
+    thread that created them; pool threads neither initialise COM nor keep
+    to the instances of the process-wide Word pool, so Word runs on worker
+    processes instead.
+    """
+    if backend == 'word':
+        raise ValueError("The word backend needs processes=True")
+
+
+def _convert_in_thread(backend: Union[str, Callable[..., DocumentBackend]], backend_options: Dict[str, Any],
+                       tracer: Optional[Tracer], template_path: str, markdown_path: str, output_dir: str,
+                       cancel_event: threading.Event) -> str:
+    """Convert with a converter of its own, so no state is shared with other threads"""
+    if cancel_event.is_set():
+        raise ConversionCancelled("Conversion cancelled")
+    converter = MarkdownToWordConverter(backend=backend, backend_options=backend_options,
+                                        tracer=tracer, cancel_event=cancel_event)
+    return converter.convert(template_path, markdown_path, output_dir)
+
+
+async def _run_in_thread(executor: Optional[Executor], backend: Union[str, Callable[..., DocumentBackend]],
+                         backend_options: Dict[str, Any], tracer: Optional[Tracer],
+                         template_path: str, markdown_path: str, output_dir: str) -> str:
+    """Run one conversion on a thread, stopping it if the awaiting task is cancelled"""
+    cancel_event = threading.Event()
+    future = asyncio.get_running_loop().run_in_executor(
+        executor, _convert_in_thread, backend, backend_options, tracer,
+        template_path, markdown_path, output_dir, cancel_event
+    )
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        cancel_event.set()
+        # Return only once the thread has stopped, so callers holding a slot keep it until then
+        await asyncio.gather(future, return_exceptions=True)
+        raise
+
+
+class AsyncConverter:
+    """
+    Runs conversions from asyncio code without blocking the event loop
+    Every conversion gets its own MarkdownToWordConverter, and with it its
+    own backend, document and style state, so concurrent calls never share
+    a document object. Work runs on a thread pool by default; with
+    processes=True it runs on worker processes, which parallelises the
+    CPU-bound parsing and emission but can only cancel jobs not yet started.
+    """
+
+    def __init__(self, backend: Union[str, Callable[..., DocumentBackend]] = 'ooxml',
+                 backend_options: Optional[Dict[str, Any]] = None, max_concurrency: int = 4,
+                 executor: Optional[Executor] = None, processes: bool = False,
+                 tracer: Optional[Tracer] = None):
+        """
+        Args:
+            backend: Backend name or factory, as for MarkdownToWordConverter
+            backend_options: Keyword arguments for the backend
+            max_concurrency: Conversions running at once; further calls wait
+            executor: Run conversions on this thread pool instead of an owned one
+            processes: Own a process pool instead of a thread pool (backend must be a name);
+                       required for the word backend
+            tracer: Receives stage timings of thread-pool conversions
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if processes and (executor is not None or not isinstance(backend, str)):
+            raise ValueError("processes=True needs a backend name and no executor")
+        if not processes:
+            _check_thread_backend(backend)
+        self.backend = backend
+        self.backend_options = backend_options or {}
+        self.max_concurrency = max_concurrency
+        self.processes = processes
+        self.tracer = tracer
+        self.executor = executor
+        self.owns_executor = executor is None
+        self.templates: Dict[str, Any] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> Executor:
+        if self.executor is None:
+            if self.processes:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.max_concurrency, initializer=_init_worker,
+                    initargs=(self.backend, self.backend_options, False, None, None,
+                              list(self.templates.values()))
+                )
+            else:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                   thread_name_prefix='markdown_to_word')
+        return self.executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created on first use so it belongs to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def convert(self, template_path: str, markdown_path: str, output_dir: str) -> str:
+        """
+        Convert one markdown file
+        Cancelling the awaiting task stops the conversion at the next markdown
+        line (thread pool) or drops it if it has not started (process pool).
+        Returns:
+            str: Path of the saved document
+        """
+        async with self._get_semaphore():
+            if self.processes:
+                template_path = os.path.abspath(template_path)
+                if template_path not in self.templates and self.executor is None:
+                    try:
+                        self.templates[template_path] = get_template(template_path)
+                    except ValueError:
+                        pass  # Not a package, e.g. a .dot that only Word can read
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(), _convert_job, template_path, BatchJob(markdown_path, output_dir)
+                )
+                if not result.ok:
+                    raise RuntimeError(result.error)
+                return result.output_path
+
+            return await _run_in_thread(self._get_executor(), self.backend, self.backend_options, self.tracer,
+                                        template_path, markdown_path, output_dir)
+
+    async def convert_many(self, template_path: str, markdown_paths: Iterable[str],
+                           output_dir: str) -> AsyncIterator[BatchResult]:
+        """
+        Convert several files, yielding each result as soon as it completes
+        Output directories mirror the inputs as in batch.plan_jobs. Failures
+        are reported in the result rather than raised. Leaving the loop early
+        cancels the conversions still pending.
+        """
+        jobs = plan_jobs(list(markdown_paths), output_dir)
+        if not jobs:
+            return
+
+        async def run(job: BatchJob) -> BatchResult:
+            start = time.perf_counter()
+            try:
+                output_path = await self.convert(template_path, job.markdown_path, job.output_dir)
+                return BatchResult(job, output_path=output_path, seconds=time.perf_counter() - start)
+            except Exception as e:
+                return BatchResult(job, error=f"{type(e).__name__}: {str(e)}",
+                                   seconds=time.perf_counter() - start)
+
+        tasks = [asyncio.ensure_future(run(job)) for job in jobs]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self):
+        """Shut down the executor if this converter created it"""
+        if self.owns_executor and self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    async def __aenter__(self) -> 'AsyncConverter':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+async def convert_async(template_path: str, markdown_path: str, output_dir: str,
+                        backend: Union[str, Callable[..., DocumentBackend]] = 'ooxml',
+                        backend_options: Optional[Dict[str, Any]] = None,
+                        executor: Optional[Executor] = None) -> str:
+    """
+    Convert one markdown file without blocking the event loop
+    Runs on the given executor, or the event loop's default thread pool.
+    Cancelling the awaiting task stops the conversion at the next markdown line.
+    Not available for the word backend; use AsyncConverter with processes=True.
+    Returns:
+        str: Path of the saved document
+    """
+    _check_thread_backend(backend)
+    return await _run_in_thread(executor, backend, backend_options or {}, None,
+                                template_path, markdown_path, output_dir)
+
+
+async def convert_many(template_path: str, markdown_paths: Iterable[str], output_dir: str,
+                       backend: Union[str, Callable[..., DocumentBackend]] = 'ooxml',
+                       backend_options: Optional[Dict[str, Any]] = None, max_concurrency: int = 4,
+                       processes: bool = False) -> AsyncIterator[BatchResult]:
+    """Convert several markdown files concurrently, yielding results as they complete"""
+    async with AsyncConverter(backend, backend_options, max_concurrency=max_concurrency,
+                              processes=processes) as converter:
+        async for result in converter.convert_many(template_path, markdown_paths, output_dir):
+            yield result
@@ -0,0 +1,516 @@
+# src/backends.py
+
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .images import EMU_PER_POINT, Image
+from .ooxml_writer import OoxmlDocument
+from .packager import COMPRESSION_LEVEL
+from .tables import Table
+from .word_pool import PooledWord, WordInstancePool, get_default_pool
+
+WD_STORY = 6  # wdStory unit for Selection.EndKey
+LINE_BREAK = '\v'  # Word's manual line break character
+PARAGRAPH_MARK = '\r'
+WD_SEPARATE_BY_TABS = 1  # wdSeparateByTabs for Range.ConvertToTable
+WD_ALIGNMENTS = {'left': 0, 'center': 1, 'right': 2}  # wdAlignParagraphLeft/Center/Right
+
+
+class DocumentBackend:
+    """
+    Interface the converter, formatter and style manager use to build a document
+    A backend owns one document at a time. Paragraph handles returned by
+    add_paragraph are opaque and only valid for the backend that created them.
+    """
+
+    name = 'base'
+    supports_batch = False
+    supports_streaming = False
+
+    def start(self):
+        """Acquire any application resources the backend needs"""
+
+    def open(self, template_path: str):
+        """Create a new, empty document from a template"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove any existing content from the document"""
+        raise NotImplementedError
+
+    def add_paragraph(self, text: str):
+        """Append a paragraph of plain text and return its handle"""
+        raise NotImplementedError
+
+    def style_exists(self, style_name: str) -> bool:
+        """Check if a paragraph style exists in the document"""
+        raise NotImplementedError
+
+    def list_styles(self) -> List[str]:
+        """Names of all styles defined in the document"""
+        raise NotImplementedError
+
+    def set_style(self, paragraph, style_name: str):
+        """Apply a paragraph style"""
+        raise NotImplementedError
+
+    def format_span(self, paragraph, start: int, end: int, format_type: str):
+        """Apply bold, italic, bold-italic or code formatting to part of a paragraph"""
+        raise NotImplementedError
+
+    def add_table(self, table: Table):
+        """Append a table in one operation"""
+        raise NotImplementedError
+
+    def add_image(self, image: Image):
+        """Append a paragraph holding an image fitted to the text width"""
+        raise NotImplementedError
+
+    def write_paragraphs(self, paragraphs: Iterable[Tuple[str, str, List[Tuple[int, int, str]]]]):
+        """
+        Append many paragraphs at once
+        Args:
+            paragraphs: (text, style_name, spans) triples with styles already resolved,
+                        Tables and Images
+        """
+        for item in paragraphs:
+            if isinstance(item, Table):
+                self.add_table(item)
+                continue
+            if isinstance(item, Image):
+                self.add_image(item)
+                continue
+            text, style_name, spans = item
+            paragraph = self.add_paragraph(text)
+            self.set_style(paragraph, style_name)
+            for start, end, format_type in spans:
+                self.format_span(paragraph, start, end, format_type)
+
+    def stream_paragraphs(self, output_path: str,
+                          paragraphs: Iterable[Tuple[str, str, List[Tuple[int, int, str]]]]):
+        """
+        Write paragraphs and save, consuming them one at a time
+        Backends with supports_streaming never hold the whole body in memory;
+        the default appends everything and then saves.
+        Args:
+            output_path: Where to write the document
+            paragraphs: (text, style_name, spans) triples, Tables and Images, typically a generator
+        """
+        self.write_paragraphs(paragraphs)
+        self.save(output_path)
+
+    def save(self, output_path: str):
+        """Write the document"""
+        raise NotImplementedError
+
+    def close(self):
+        """Discard the current document"""
+
+    def quit(self, failed: bool = False):
+        """
+        Release everything acquired by start
+        Args:
+            failed: Whether the conversion failed, so shared resources can be recycled
+        """
+        self.close()
+
+
+class WordBackend(DocumentBackend):
+    """Builds documents through the Word object model (COM or a stand-in)"""
+
+    name = 'word'
+
+    def __init__(self, application_factory: Optional[Callable[[], object]] = None, visible: bool = True,
+                 batch: bool = False, pool: Optional[WordInstancePool] = None):
+        """
+        Args:
+            application_factory: Returns a private Word.Application-like object
+                                 that is quit after each conversion
+            visible: Whether to show the Word window of a private application
+            batch: Insert the whole body in one range operation and style runs of
+                   paragraphs together instead of one Selection round trip per paragraph
+            pool: Pool to borrow a warm Word instance from; without a pool or an
+                  application_factory the process-wide default pool is used
+        """
+        self.application_factory = application_factory
+        self.visible = visible
+        self.supports_batch = batch
+        self.pool = pool
+        self.pooled: Optional[PooledWord] = None
+        self.word_app = None
+        self.doc = None
+        self.text_width: Optional[int] = None  # EMU, read from the page setup on the first image
+
+    def start(self):
+        """Initialize Microsoft Word application"""
+        if self.word_app is not None:
+            return
+        try:
+            if self.application_factory is not None and self.pool is None:
+                self.word_app = self.application_factory()
+                self.word_app.Visible = self.visible
+            else:
+                if self.pool is None:
+                    self.pool = get_default_pool()
+                self.pooled = self.pool.acquire()
+                self.word_app = self.pooled.app
+
+            logging.info("Word application initialized successfully")
+        except Exception as e:
+            logging.error(f"Failed to initialize Word: {str(e)}")
+            raise RuntimeError(f"Failed to initialize Microsoft Word: {str(e)}")
+
+    def open(self, template_path: str):
+        """Create new document from template"""
+        # Only ever close the document this backend opened
+        self.close()
+
+        try:
+            # Try to create blank document first
+            blank_doc = self.word_app.Documents.Add()
+            if not blank_doc:
+                raise RuntimeError("Failed to create blank document")
+
+            # Now try to attach template
+            self.doc = blank_doc
+            blank_doc.set_AttachedTemplate(template_path)
+
+        except Exception as template_error:
+            logging.warning(f"Failed to attach template, trying direct creation: {str(template_error)}")
+            self.close()
+            # If that fails, try direct creation
+            self.doc = self.word_app.Documents.Add(Template=template_path)
+
+        if not self.doc:
+            raise RuntimeError("Document creation failed - no document object")
+
+        # Verify document is accessible
+        _ = self.doc.Content
+
+    def clear(self):
+        """Clear any existing content"""
+        self.doc.Content.Delete()
+
+    def add_paragraph(self, text: str):
+        # Get the selection object
+        selection = self.doc.Application.Selection
+
+        # Move to the end of the document
+        selection.EndKey(Unit=WD_STORY)
+
+        # Add a new paragraph
+        selection.TypeParagraph()
+
+        # Get the newly created paragraph
+        paragraph = selection.Paragraphs.Item(selection.Paragraphs.Count)
+
+        # Set the text, line feeds become manual line breaks inside the paragraph
+        paragraph.Range.Text = text.replace('\n', LINE_BREAK)
+        return paragraph
+
+    def style_exists(self, style_name: str) -> bool:
+        try:
+            _ = self.doc.Styles(style_name)
+            return True
+        except Exception as e:
+            logging.debug("Style %s not found: %s", style_name, e)
+            return False
+
+    def list_styles(self) -> List[str]:
+        return [style.NameLocal for style in self.doc.Styles]
+
+    def set_style(self, paragraph, style_name: str):
+        paragraph.Range.Style = style_name
+
+    def format_span(self, paragraph, start: int, end: int, format_type: str):
+        range_start = paragraph.Range.Start
+        self.format_range(range_start + start, range_start + end, format_type)
+
+    def format_range(self, start: int, end: int, format_type: str):
+        """Apply character formatting to a document range"""
+        format_range = self.doc.Range(start, end)
+
+        if format_type in ('bold', 'bold-italic'):
+            format_range.Font.Bold = -1
+        if format_type in ('italic', 'bold-italic'):
+            format_range.Font.Italic = -1
+        if format_type == 'code':
+            format_range.Font.Name = "Consolas"
+            format_range.Font.Size = 9
+            format_range.Font.Color = 0x505050  # Dark gray
+            format_range.Shading.BackgroundPatternColor = 0xF0F0F0  # Light gray
+
+    def add_table(self, table: Table):
+        """Insert the rows as tab-separated text and convert them with one ConvertToTable call"""
+        selection = self.doc.Application.Selection
+        selection.EndKey(Unit=WD_STORY)
+        selection.TypeParagraph()
+        self.insert_body([table], self.doc.Content.End - 1)
+
+    def convert_table(self, start: int, end: int, table: Table):
+        """
+        Turn tab-separated paragraphs into a Word table
+        COM calls depend on the number of aligned columns, not on the number of rows.
+        """
+        word_table = self.doc.Range(start, end).ConvertToTable(
+            Separator=WD_SEPARATE_BY_TABS, NumRows=len(table.rows), NumColumns=table.columns
+        )
+        if table.style_name:
+            try:
+                word_table.Style = table.style_name
+            except Exception as e:
+                logging.warning(f"Failed to apply table style {table.style_name}: {str(e)}")
+        if table.header_rows:
+            header = word_table.Rows(1)
+            header.HeadingFormat = -1
+            if not table.style_name:
+                header.Range.Font.Bold = -1
+        for index, alignment in enumerate(table.alignments, 1):
+            if alignment:
+                word_table.Columns(index).Select()
+                self.doc.Application.Selection.ParagraphFormat.Alignment = WD_ALIGNMENTS[alignment]
+
+    def add_image(self, image: Image):
+        """Insert an empty paragraph and place the picture in it"""
+        selection = self.doc.Application.Selection
+        selection.EndKey(Unit=WD_STORY)
+        selection.TypeParagraph()
+        self.insert_body([image], self.doc.Content.End - 1)
+
+    def insert_image(self, position: int, image: Image):
+        """Embed a picture at a document offset, scaled down to the text width"""
+        if self.text_width is None:
+            page_setup = self.doc.PageSetup
+            self.text_width = int((page_setup.PageWidth - page_setup.LeftMargin - page_setup.RightMargin)
+                                  * EMU_PER_POINT)
+        shape = self.doc.InlineShapes.AddPicture(FileName=image.path, LinkToFile=False, SaveWithDocument=True,
+                                                 Range=self.doc.Range(position, position))
+        width, height = image.fit(self.text_width)
+        shape.Width = width / EMU_PER_POINT
+        shape.Height = height / EMU_PER_POINT
+        if image.alt:
+            shape.AlternativeText = image.alt
+
+    def write_paragraphs(self, paragraphs: Iterable[Tuple[str, str, List[Tuple[int, int, str]]]]):
+        """
+        Insert the whole body with one range operation, then style it
+        COM calls scale with the number of style changes, formatted spans,
+        tables and images rather than with the number of paragraphs or table cells.
+        """
+        if not self.supports_batch:
+            return super().write_paragraphs(paragraphs)
+        # Insert before the document's final paragraph mark
+        self.insert_body(paragraphs, self.doc.Content.End - 1)
+
+    def insert_body(self, paragraphs: Iterable[Tuple[str, str, List[Tuple[int, int, str]]]], insert_at: int):
+        """Insert paragraphs, tables and images as one block of text at a document offset, then style it"""
+        texts = []
+        style_runs = []  # [style_name, start, end] over contiguous paragraphs
+        spans = []
+        objects = []  # (start, end, Table or Image) placed once the text is in
+        position = 0
+
+        def append(text: str, style_name: str, paragraph_spans: List[Tuple[int, int, str]]):
+            nonlocal position
+            text = text.replace('\n', LINE_BREAK).replace(PARAGRAPH_MARK, ' ')
+            end = position + len(text) + 1  # Including the paragraph mark
+            if style_runs and style_runs[-1][0] == style_name:
+                style_runs[-1][2] = end
+            else:
+                style_runs.append([style_name, position, end])
+            spans.extend((position + start, position + stop, format_type)
+                         for start, stop, format_type in paragraph_spans)
+            texts.append(text)
+            position = end
+
+        for item in paragraphs:
+            if isinstance(item, Table):
+                table_start = position
+                for row in item.rows:
+                    text, row_spans = item.row_text(row)
+                    append(text, item.paragraph_style, row_spans)
+                objects.append((table_start, position, item))
+            elif isinstance(item, Image):
+                objects.append((position, position, item))
+                append('', item.style_name, [])
+            else:
+                append(*item)
+
+        if not texts:
+            return
+
+        self.doc.Range(insert_at, insert_at).InsertAfter(PARAGRAPH_MARK.join(texts))
+
+        for style_name, start, end in style_runs:
+            try:
+                self.doc.Range(insert_at + start, insert_at + end).Style = style_name
+            except Exception as e:
+                logging.error(f"Failed to apply style {style_name}: {str(e)}")
+                self.doc.Range(insert_at + start, insert_at + end).Style = "Normal"
+
+        for start, end, format_type in spans:
+            try:
+                self.format_range(insert_at + start, insert_at + end, format_type)
+            except Exception as e:
+                logging.warning(f"Failed to apply {format_type} formatting to characters {start}-{end}: {str(e)}")
+
+        # Last one first, since converting a table or adding a picture moves the text after it
+        for start, end, item in reversed(objects):
+            if isinstance(item, Table):
+                self.convert_table(insert_at + start, insert_at + end, item)
+            else:
+                self.insert_image(insert_at + start, item)
+
+        logging.info(f"Inserted {len(texts)} paragraphs in {len(style_runs)} style runs "
+                     f"and {len(objects)} tables and images")
+
+    def save(self, output_path: str):
+        self.doc.SaveAs(output_path)
+
+    def close(self):
+        if self.doc:
+            try:
+                self.doc.Close(SaveChanges=False)
+            except:
+                pass
+            self.doc = None
+        self.text_width = None
+
+    def quit(self, failed: bool = False):
+        """Clean up Word resources"""
+        self.close()
+        if self.pooled is not None:
+            self.pool.release(self.pooled, failed=failed)
+            self.pooled = None
+        elif self.word_app:
+            try:
+                self.word_app.Quit()
+            except:
+                pass
+        self.word_app = None
+
+
+class OoxmlParagraph:
+    """Paragraph waiting to be written by OoxmlBackend"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.style_name = 'Normal'
+        self.spans: List[Tuple[int, int, str]] = []
+
+
+class OoxmlBackend(DocumentBackend):
+    """Writes the .docx package directly, without Microsoft Word"""
+
+    name = 'ooxml'
+    supports_batch = True
+
+    def __init__(self, streaming: bool = True, compression_level: int = COMPRESSION_LEVEL):
+        """
+        Args:
+            streaming: Render paragraphs straight into the saved package instead
+                       of keeping the body in memory until save
+            compression_level: zlib level (0-9) for the parts written per document
+        """
+        if not 0 <= compression_level <= 9:
+            raise ValueError(f"Compression level must be between 0 and 9, not {compression_level}")
+        self.supports_streaming = streaming
+        self.compression_level = compression_level
+        self.document: Optional[OoxmlDocument] = None
+        self.pending: Optional[OoxmlParagraph] = None
+
+    def open(self, template_path: str):
+        self.document = OoxmlDocument(template_path, self.compression_level)
+        self.pending = None
+
+    def clear(self):
+        self.document.paragraphs.clear()
+        self.document.images.clear()
+        self.pending = None
+
+    def _flush(self):
+        """Render the previous paragraph once nothing can change it any more"""
+        if self.pending is not None:
+            self.document.add_paragraph(self.pending.text, self.pending.style_name, self.pending.spans)
+            self.pending = None
+
+    def add_paragraph(self, text: str) -> OoxmlParagraph:
+        self._flush()
+        self.pending = OoxmlParagraph(text)
+        return self.pending
+
+    def style_exists(self, style_name: str) -> bool:
+        return self.document.has_style(style_name) or self.document.template.has_table_style(style_name)
+
+    def list_styles(self) -> List[str]:
+        return list(self.document.template.style_names)
+
+    def set_style(self, paragraph: OoxmlParagraph, style_name: str):
+        paragraph.style_name = style_name
+
+    def format_span(self, paragraph: OoxmlParagraph, start: int, end: int, format_type: str):
+        paragraph.spans.append((start, end, format_type))
+
+    def add_table(self, table: Table):
+        self._flush()
+        self.document.add_table(table)
+
+    def add_image(self, image: Image):
+        self._flush()
+        self.document.add_image(image)
+
+    def write_paragraphs(self, paragraphs: Iterable[Tuple[str, str, List[Tuple[int, int, str]]]]):
+        self._flush()
+        for item in paragraphs:
+            if isinstance(item, Table):
+                self.document.add_table(item)
+            elif isinstance(item, Image):
+                self.document.add_image(item)
+            else:
+                self.document.add_paragraph(*item)
+
+    def stream_paragraphs(self, output_path: str,
+                          paragraphs: Iterable[Tuple[str, str, List[Tuple[int, int, str]]]]):
+        self._flush()
+        self.document.save(output_path, stream=paragraphs)
+
+    def save(self, output_path: str):
+        self._flush()
+        self.document.save(output_path)
+
+    def close(self):
+        self.document = None
+        self.pending = None
+
+
+def create_fake_word_backend(**options) -> WordBackend:
+    """WordBackend driving the in-memory FakeWordApplication"""
+    from .fake_word import FakeWordApplication
+    options.setdefault('visible', False)
+    return WordBackend(application_factory=FakeWordApplication, **options)
+
+
+BACKENDS: Dict[str, Callable[..., DocumentBackend]] = {
+    'word': WordBackend,
+    'ooxml': OoxmlBackend,
+    'fake': create_fake_word_backend,
+}
+
+
+def create_backend(backend: Union[str, Callable[..., DocumentBackend]], **options) -> DocumentBackend:
+    """
+    Create a backend by name or from a factory
+    Args:
+        backend: One of BACKENDS ('word', 'ooxml', 'fake') or a callable returning a DocumentBackend
+        options: Keyword arguments for the backend, e.g. batch=True for 'word' and 'fake',
+                 streaming=False for 'ooxml'
+    Returns:
+        DocumentBackend: A fresh backend instance
+    """
+    if callable(backend):
+        return backend(**options)
+    try:
+        factory = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+    return factory(**options)
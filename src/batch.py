@@ -0,0 +1,278 @@
+# src/batch.py
+
+import os
+import glob
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .chapters import ChapterConverter
+from .converter import MarkdownToWordConverter
+from .incremental import IncrementalConverter
+from .journal import BatchJournal, input_state, settings_fingerprint
+from .output_cache import OutputCache
+from .ooxml_writer import TemplatePackage
+from .template_cache import get_template, get_template_cache
+from .tracing import DocumentTrace, Tracer
+from .watchdog import DEFAULT_RETRIES, WatchdogPool, report_process, report_process_exit
+from .word_pool import get_default_pool
+
+MARKDOWN_PATTERNS = ('*.md', '*.markdown')
+
+
+class BatchJob:
+    """One markdown file and the directory its output goes to"""
+
+    def __init__(self, markdown_path: str, output_dir: str):
+        self.markdown_path = markdown_path
+        self.output_dir = output_dir
+        # (size, mtime in ns) when planned, so the journal never pairs an output with a later edit
+        self.state = input_state(markdown_path)
+        self.size = self.state[0]
+
+
+class BatchResult:
+    """Outcome of converting one file"""
+
+    def __init__(self, job: BatchJob, output_path: Optional[str] = None,
+                 error: Optional[str] = None, seconds: float = 0.0, cached: bool = False,
+                 attempts: int = 1):
+        self.job = job
+        self.output_path = output_path
+        self.error = error
+        self.seconds = seconds
+        self.cached = cached  # Served from the output cache without converting
+        self.attempts = attempts  # More than 1 when the watchdog retried the job
+        self.traces: List[DocumentTrace] = []
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BatchSummary:
+    """Totals and throughput for a batch run"""
+
+    def __init__(self, results: List[BatchResult], seconds: float, skipped: int = 0):
+        self.results = results
+        self.seconds = seconds
+        self.skipped = skipped  # Jobs a resumed run found finished in its journal
+        self.succeeded = sum(1 for result in results if result.ok)
+        self.failed = len(results) - self.succeeded
+        self.cache_hits = sum(1 for result in results if result.cached)
+        self.input_bytes = sum(result.job.size for result in results)
+
+    @property
+    def docs_per_second(self) -> float:
+        return len(self.results) / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.input_bytes / (1024 * 1024) / self.seconds if self.seconds > 0 else 0.0
+
+
+def collect_inputs(inputs: Iterable[str], patterns: Iterable[str] = MARKDOWN_PATTERNS) -> List[str]:
+    """
+    Expand files, globs and directories into markdown file paths
+    Args:
+        inputs: File paths, glob patterns or directories (searched recursively)
+        patterns: File name patterns matched inside directories
+    Returns:
+        List of absolute paths, sorted and without duplicates
+    """
+    found = set()
+    for item in inputs:
+        if glob.has_magic(item):
+            matches = [path for path in glob.glob(item, recursive=True) if os.path.isfile(path)]
+            if not matches:
+                logging.warning(f"Pattern matched no files: {item}")
+            found.update(os.path.abspath(path) for path in matches)
+        elif os.path.isdir(item):
+            for pattern in patterns:
+                found.update(os.path.abspath(path) for path in
+                             glob.glob(os.path.join(item, '**', pattern), recursive=True)
+                             if os.path.isfile(path))
+        elif os.path.isfile(item):
+            found.add(os.path.abspath(item))
+        else:
+            raise FileNotFoundError(f"Input not found: {item}")
+    return sorted(found)
+
+
+def plan_jobs(markdown_paths: List[str], output_dir: str) -> List[BatchJob]:
+    """
+    Mirror the input directory structure below output_dir
+    Inputs are placed relative to their common parent directory, so files
+    with the same name in different directories never share an output path.
+    """
+    if not markdown_paths:
+        return []
+    root = os.path.commonpath([os.path.dirname(path) for path in markdown_paths])
+    output_dir = os.path.abspath(output_dir)
+    return [
+        BatchJob(path, os.path.normpath(os.path.join(output_dir, os.path.relpath(os.path.dirname(path), root))))
+        for path in markdown_paths
+    ]
+
+
+# Converter reused by every job a worker process runs
+_worker_converter: Optional[MarkdownToWordConverter] = None
+_worker_profile_dir: Optional[str] = None
+
+
+def _init_worker(backend: str, backend_options: Dict[str, Any], incremental: bool = False,
+                 trace: Optional[str] = None, profile_dir: Optional[str] = None,
+                 templates: List[TemplatePackage] = (), chapter_workers: int = 0,
+                 cache_options: Optional[Dict[str, Any]] = None):
+    """Create the per-process converter"""
+    global _worker_converter, _worker_profile_dir
+    # Templates compiled by the parent, so workers never parse them again
+    for template in templates:
+        get_template_cache().add(template)
+    tracer = Tracer(record_events=(trace == 'events')) if trace else None
+    if incremental:
+        _worker_converter = IncrementalConverter(tracer=tracer, backend_options=backend_options)
+    elif chapter_workers:
+        _worker_converter = ChapterConverter(backend=backend, backend_options=backend_options,
+                                             workers=chapter_workers, tracer=tracer)
+    else:
+        _worker_converter = MarkdownToWordConverter(backend=backend, backend_options=backend_options,
+                                                    tracer=tracer)
+    if cache_options is not None:
+        _worker_converter.output_cache = OutputCache(**cache_options)
+    if backend == 'word':
+        # Under a watchdog, a hung job takes down its own Word instance and no other
+        pool = get_default_pool()
+        pool.on_start = lambda instance: report_process(instance.process_id)
+        pool.on_stop = lambda instance: report_process_exit(instance.process_id)
+    _worker_profile_dir = profile_dir
+
+
+def _convert_job(template_path: str, job: BatchJob) -> BatchResult:
+    """Convert one job, never raising so one bad file cannot stop the batch"""
+    profiler = None
+    if _worker_profile_dir:
+        import cProfile
+        profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        if profiler:
+            profiler.enable()
+        try:
+            output_path = _worker_converter.convert(template_path, job.markdown_path, job.output_dir)
+        finally:
+            if profiler:
+                profiler.disable()
+        result = BatchResult(job, output_path=output_path, seconds=time.perf_counter() - start,
+                             cached=_worker_converter.cache_hit)
+    except Exception as e:
+        result = BatchResult(job, error=f"{type(e).__name__}: {str(e)}", seconds=time.perf_counter() - start)
+
+    if profiler:
+        profiler.dump_stats(os.path.join(_worker_profile_dir, f"{os.getpid()}-{time.perf_counter_ns()}.prof"))
+    if _worker_converter.tracer.enabled:
+        result.traces = _worker_converter.tracer.take_documents()
+    return result
+
+
+def run_batch(template_path: str, jobs: List[BatchJob], workers: int = 1,
+              backend: str = 'ooxml', backend_options: Optional[Dict[str, Any]] = None,
+              on_result: Optional[Callable[[BatchResult], None]] = None,
+              incremental: bool = False, tracer: Optional[Tracer] = None,
+              profile_dir: Optional[str] = None, chapters: bool = False,
+              cache_options: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+              retries: int = DEFAULT_RETRIES, journal: Optional[BatchJournal] = None,
+              resume: bool = False) -> BatchSummary:
+    """
+    Convert jobs, in parallel worker processes when workers > 1
+    Args:
+        template_path: Word template used for every document
+        jobs: Jobs from plan_jobs
+        workers: Number of worker processes; 1 converts in this process
+        backend: Backend name, see backends.BACKENDS
+        backend_options: Keyword arguments for the backend
+        on_result: Called with each result as it completes
+        incremental: Re-render only changed sections (ooxml backend only)
+        tracer: Receives the stage timings and call counts of every document,
+                including those converted in worker processes
+        profile_dir: Directory each job writes its cProfile statistics to
+        chapters: Convert documents one at a time, each split into chapters
+                  rendered on the worker processes (see ChapterConverter)
+        cache_options: Serve unchanged documents from an OutputCache created
+                       with these keyword arguments; None converts every file
+        timeout: Seconds a job may take before its worker, and that worker's
+                 Word instance, is killed and replaced (see WatchdogPool);
+                 None lets jobs run as long as they need
+        retries: Further attempts for a job that timed out or killed its worker
+        journal: Records every result as soon as it completes
+        resume: Skip the jobs the journal records as converted with the same
+                template, backend, options and output directory, when neither
+                their input nor their output changed since
+    Returns:
+        BatchSummary: Results in completion order plus throughput
+    """
+    template_path = os.path.abspath(template_path)
+    backend_options = backend_options or {}
+    if incremental and backend != 'ooxml':
+        raise ValueError("Incremental conversion requires the ooxml backend")
+    if incremental and chapters:
+        raise ValueError("Incremental and chapter conversion cannot be combined")
+    if timeout is not None and chapters:
+        raise ValueError("Chapter conversion cannot run under a job timeout")
+    if resume and journal is None:
+        raise ValueError("Resuming needs a journal")
+    skipped = 0
+    settings = settings_fingerprint(template_path, backend, backend_options) if journal is not None else None
+    if resume:
+        jobs, skipped = journal.remaining(jobs, settings)
+        logging.info(f"Resuming: {skipped} jobs already converted, {len(jobs)} to go")
+    results = []
+    start = time.perf_counter()
+
+    try:
+        templates = [get_template(template_path)]
+    except ValueError:
+        templates = []  # Not a package, e.g. a .dot that only Word can read
+    trace = None if tracer is None else ('events' if tracer.record_events else 'summary')
+    worker_args = (backend, backend_options, incremental, trace, profile_dir, templates,
+                   max(workers, 1) if chapters else 0, cache_options)
+
+    def completed(result: BatchResult):
+        results.append(result)
+        if journal is not None:
+            journal.record(result, settings)
+        if tracer is not None:
+            tracer.add_documents(result.traces)
+        if on_result:
+            on_result(result)
+
+    if timeout is not None and jobs:
+        # Even a single job runs in a worker process, as only a process can be stopped mid-call
+        pool = WatchdogPool(max(workers, 1), _init_worker, worker_args, timeout, retries)
+        for outcome in pool.run(_convert_job, [(template_path, job) for job in jobs]):
+            if outcome.error is not None:
+                completed(BatchResult(jobs[outcome.task_id], error=outcome.error, attempts=outcome.attempts))
+            else:
+                outcome.result.attempts = outcome.attempts
+                completed(outcome.result)
+    elif workers <= 1 or len(jobs) <= 1 or chapters:
+        _init_worker(*worker_args)
+        try:
+            for job in jobs:
+                completed(_convert_job(template_path, job))
+        finally:
+            if chapters:
+                _worker_converter.close()
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker,
+                                 initargs=worker_args) as executor:
+            futures = {executor.submit(_convert_job, template_path, job): job for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    completed(future.result())
+                except Exception as e:
+                    # The worker process itself died
+                    completed(BatchResult(futures[future], error=f"{type(e).__name__}: {str(e)}"))
+
+    return BatchSummary(results, time.perf_counter() - start, skipped)
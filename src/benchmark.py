@@ -0,0 +1,357 @@
+# src/benchmark.py
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import logging
+import argparse
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from .backends import BACKENDS, create_backend
+from .converter import read_markdown_lines
+from .formatters import TextFormatter
+from .style_manager import StyleManager
+from .tokenizer import tokenize
+
+# Corpus sizes the suite runs by default, smallest first
+CORPUS_SIZES = {
+    '1KB': 1024,
+    '100KB': 100 * 1024,
+    '1MB': 1024 * 1024,
+    '10MB': 10 * 1024 * 1024,
+    '100MB': 100 * 1024 * 1024,
+}
+
+# Relative frequency of each block kind in generated corpora
+DEFAULT_MIX = {
+    'heading': 2,
+    'body': 10,
+    'bullet': 4,
+    'numbered': 2,
+    'blockquote': 1,
+    'code': 1,
+}
+
+STAGES = ('read', 'parse', 'style', 'emit', 'save')
+
+WORDS = (
+    'policy', 'document', 'template', 'style', 'section', 'review', 'owner', 'control',
+    'access', 'record', 'update', 'report', 'process', 'system', 'data', 'user',
+    'the', 'a', 'of', 'and', 'to', 'in', 'for', 'with', 'is', 'on', 'by', 'must',
+)
+
+
+class CorpusGenerator:
+    """
+    Deterministic generator of markdown exercising everything TextFormatter handles
+    The same seed, mix and size always produce the same text.
+    """
+
+    def __init__(self, seed: int = 0, mix: Optional[Dict[str, int]] = None, max_heading_level: int = 9):
+        """
+        Args:
+            seed: Random seed
+            mix: Relative weights of heading, body, bullet, numbered, blockquote and code blocks
+            max_heading_level: Deepest heading level generated, 1-9
+        """
+        self.random = random.Random(seed)
+        mix = mix or DEFAULT_MIX
+        unknown = set(mix) - set(DEFAULT_MIX)
+        if unknown:
+            raise ValueError(f"Unknown block kinds in mix: {', '.join(sorted(unknown))}")
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.max_heading_level = max(1, min(max_heading_level, 9))
+        self.heading_level = 0
+
+    def words(self, count: int) -> str:
+        return ' '.join(self.random.choice(WORDS) for _ in range(count))
+
+    def inline_text(self, count: int) -> str:
+        """Words with the occasional bold, italic, bold-italic or code span"""
+        parts = []
+        for _ in range(max(1, count // 4)):
+            roll = self.random.random()
+            text = self.words(self.random.randint(1, 3))
+            if roll < 0.15:
+                parts.append(f'**{text}**')
+            elif roll < 0.25:
+                parts.append(f'*{text}*')
+            elif roll < 0.30:
+                parts.append(f'***{text}***')
+            elif roll < 0.38:
+                parts.append(f'`{text}`')
+            else:
+                parts.append(text)
+        return ' '.join(parts)
+
+    def block(self) -> List[str]:
+        """Lines of one randomly chosen block, followed by a blank line where markdown needs one"""
+        kind = self.random.choices(self.kinds, self.weights)[0]
+        if kind == 'heading':
+            # Mostly step one level deeper or back up, like real documents
+            self.heading_level = max(1, min(self.max_heading_level,
+                                            self.heading_level + self.random.choice((-1, 0, 1, 1))))
+            metadata = f' >> owner: {self.words(1)}' if self.random.random() < 0.1 else ''
+            return [f"{'#' * self.heading_level} {self.words(self.random.randint(2, 6))}{metadata}", '']
+        if kind == 'body':
+            return [self.inline_text(self.random.randint(8, 60)), '']
+        if kind in ('bullet', 'numbered'):
+            lines = []
+            depth = 0
+            for number in range(1, self.random.randint(2, 6) + 1):
+                depth = max(0, min(3, depth + self.random.choice((-1, 0, 1))))
+                marker = self.random.choice('-*+') if kind == 'bullet' else f'{number}.'
+                lines.append(f"{'  ' * depth}{marker} {self.inline_text(self.random.randint(3, 16))}")
+            return lines + ['']
+        if kind == 'blockquote':
+            return [f'> {self.inline_text(self.random.randint(6, 30))}', '']
+        fence = self.random.choice(('```', '~~~'))
+        info = self.random.choice(('', 'python', 'bash'))
+        code = [f'    {self.words(self.random.randint(2, 8))} = {number}' for number in range(self.random.randint(1, 8))]
+        return [f'{fence}{info}'] + code + [fence, '']
+
+    def lines(self, size: int) -> Iterator[str]:
+        """
+        Generate lines totalling at least size bytes
+        Args:
+            size: Target size in bytes of the UTF-8 text including line endings
+        """
+        written = 0
+        while written < size:
+            for line in self.block():
+                written += len(line) + 1
+                yield line
+
+
+def write_corpus(path: str, size: int, seed: int = 0, mix: Optional[Dict[str, int]] = None) -> str:
+    """
+    Write a generated markdown file, reusing it when it already exists
+    Returns:
+        Path of the markdown file
+    """
+    if os.path.exists(path) and os.path.getsize(path) >= size:
+        return path
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='\n') as file:
+        for line in CorpusGenerator(seed, mix).lines(size):
+            file.write(line + '\n')
+    os.replace(tmp_path, path)
+    return path
+
+
+class StageResult:
+    """Time and peak memory of one pipeline stage"""
+
+    def __init__(self, name: str, seconds: float, peak_bytes: int):
+        self.name = name
+        self.seconds = seconds
+        self.peak_bytes = peak_bytes
+
+    def to_dict(self) -> Dict[str, float]:
+        return {'stage': self.name, 'seconds': self.seconds, 'peak_bytes': self.peak_bytes}
+
+
+class BenchmarkRun:
+    """Stage results for one corpus on one backend"""
+
+    def __init__(self, corpus: str, backend: str, input_bytes: int):
+        self.corpus = corpus
+        self.backend = backend
+        self.input_bytes = input_bytes
+        self.stages: List[StageResult] = []
+        self.paragraphs = 0
+
+    @property
+    def seconds(self) -> float:
+        return sum(stage.seconds for stage in self.stages)
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.input_bytes / (1024 * 1024) / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'corpus': self.corpus,
+            'backend': self.backend,
+            'input_bytes': self.input_bytes,
+            'paragraphs': self.paragraphs,
+            'seconds': self.seconds,
+            'stages': [stage.to_dict() for stage in self.stages],
+        }
+
+
+@contextmanager
+def measure(run: BenchmarkRun, name: str, trace_memory: bool) -> Iterator[None]:
+    """Time a stage and record the peak memory allocated while it ran"""
+    gc.collect()
+    if trace_memory:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    yield
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - baseline if trace_memory else 0
+    run.stages.append(StageResult(name, seconds, peak))
+
+
+def benchmark_file(template_path: str, markdown_path: str, output_path: str,
+                   backend: str = 'ooxml', corpus: Optional[str] = None,
+                   trace_memory: bool = True) -> BenchmarkRun:
+    """
+    Convert one file stage by stage, timing each stage on its own
+    The stages run one after another on fully materialised intermediate
+    results, which is what makes them separable; a streaming conversion
+    overlaps them and uses far less memory.
+    Args:
+        template_path: Word template
+        markdown_path: Markdown input
+        output_path: Path of the .docx to write
+        backend: Backend name; 'ooxml' and 'fake' run without Word
+        corpus: Label for the report, defaults to the file name
+        trace_memory: Measure peak memory with tracemalloc, which slows every stage down
+    Returns:
+        BenchmarkRun with read, parse, style, emit and save results
+    """
+    run = BenchmarkRun(corpus or os.path.basename(markdown_path), backend, os.path.getsize(markdown_path))
+    formatter = TextFormatter()
+    formatter.base_dir = os.path.dirname(os.path.abspath(markdown_path))
+    style_manager = StyleManager()
+    options = {'streaming': False} if backend == 'ooxml' else {}
+    document = create_backend(backend, **options)
+
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with measure(run, 'read', trace_memory):
+            with open(markdown_path, 'r', encoding='utf-8') as file:
+                lines = list(read_markdown_lines(file))
+
+        with measure(run, 'parse', trace_memory):
+            blocks = list(tokenize(lines))
+        del lines
+
+        with measure(run, 'style', trace_memory):
+            document.start()
+            document.open(os.path.abspath(template_path))
+            style_manager.load_style_index(document, template_path)
+            resolved = {}
+            styles = []
+            for block in blocks:
+                if block.kind == 'heading':
+                    style_manager.current_level = min(block.level, 9)
+                key = (block.kind, style_manager.current_level)
+                if key not in resolved:
+                    if block.kind == 'table':
+                        resolved[key] = (style_manager.lookup_table_style(document),
+                                         style_manager.lookup_style(document, 'body'))
+                    elif block.kind == 'image':
+                        resolved[key] = style_manager.lookup_style(document, 'body')
+                    else:
+                        resolved[key] = style_manager.lookup_style(document, block.kind)
+                styles.append(resolved[key])
+
+        with measure(run, 'emit', trace_memory):
+            paragraphs = []
+            for block, style_name in zip(blocks, styles):
+                if block.kind == 'table':
+                    paragraphs.append(formatter.build_table(document, block, style_manager, *style_name))
+                    continue
+                if block.kind == 'image':
+                    paragraphs.append(formatter.build_image(document, block, style_manager, style_name=style_name))
+                    continue
+                if block.kind == 'code':
+                    text, spans = block.text.strip('\n'), []
+                else:
+                    text, spans = formatter.parse_inline(block.text)
+                paragraphs.append((text, style_name, spans))
+            run.paragraphs = len(paragraphs)
+            document.clear()
+            document.write_paragraphs(paragraphs)
+        del blocks, styles, paragraphs
+
+        with measure(run, 'save', trace_memory):
+            document.save(output_path)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        document.quit()
+
+    return run
+
+
+def run_suite(template_path: str, work_dir: str, sizes: List[str], backends: List[str],
+              seed: int = 0, trace_memory: bool = True) -> List[BenchmarkRun]:
+    """
+    Generate the corpora and benchmark every size on every backend
+    Args:
+        template_path: Word template
+        work_dir: Directory for generated corpora and output documents
+        sizes: Keys of CORPUS_SIZES
+        backends: Backend names
+        seed: Corpus generator seed
+        trace_memory: Measure peak memory per stage
+    Returns:
+        One BenchmarkRun per size and backend
+    """
+    runs = []
+    for size in sizes:
+        markdown_path = write_corpus(os.path.join(work_dir, f'corpus_{size}_{seed}.md'), CORPUS_SIZES[size], seed)
+        for backend in backends:
+            output_path = os.path.join(work_dir, f'corpus_{size}_{backend}.docx')
+            run = benchmark_file(template_path, markdown_path, output_path, backend,
+                                 corpus=size, trace_memory=trace_memory)
+            runs.append(run)
+            logging.info(f"Benchmarked {size} on {backend} in {run.seconds:.2f}s")
+    return runs
+
+
+def format_report(runs: List[BenchmarkRun]) -> str:
+    """Table with one row per run and time / peak memory per stage"""
+    header = f"{'corpus':>7} {'backend':>7} {'paras':>8} " + ' '.join(f'{stage:>17}' for stage in STAGES) + f" {'MB/s':>7}"
+    rows = [header, '-' * len(header)]
+    for run in runs:
+        stages = {stage.name: stage for stage in run.stages}
+        cells = ' '.join(
+            f"{stages[name].seconds:8.3f}s {stages[name].peak_bytes / (1024 * 1024):6.1f}MB" for name in STAGES
+        )
+        rows.append(f"{run.corpus:>7} {run.backend:>7} {run.paragraphs:>8} {cells} {run.mb_per_second:7.2f}")
+    return '\n'.join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark suite from the command line"""
+    parser = argparse.ArgumentParser(
+        prog='markdown_to_word.benchmark',
+        description="Benchmark conversion stages on generated markdown corpora."
+    )
+    parser.add_argument('template', help="Word template (.dotm, .dotx or .dot)")
+    parser.add_argument('--sizes', nargs='+', choices=list(CORPUS_SIZES), default=['1KB', '100KB', '1MB'],
+                        help="Corpus sizes (default: 1KB 100KB 1MB)")
+    parser.add_argument('--backends', nargs='+', choices=sorted(set(BACKENDS) - {'word'}), default=['ooxml'],
+                        help="Backends to measure (default: ooxml)")
+    parser.add_argument('--work-dir', default=os.path.join('benchmarks', 'corpora'),
+                        help="Directory for generated corpora and outputs")
+    parser.add_argument('--seed', type=int, default=0, help="Corpus generator seed")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Skip tracemalloc, which makes timings more accurate")
+    parser.add_argument('--json', dest='json_path', help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    runs = run_suite(args.template, args.work_dir, args.sizes, args.backends,
+                     seed=args.seed, trace_memory=not args.no_memory)
+    print(format_report(runs))
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as file:
+            json.dump([run.to_dict() for run in runs], file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+# src/chapters.py
+
+import os
+import re
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .backends import DocumentBackend, OoxmlBackend
+from .converter import MarkdownToWordConverter
+from .formatters import TextFormatter
+from .images import Image
+from .incremental import split_sections
+from .ir import DocumentIR
+from .ooxml_writer import TemplatePackage
+from .style_manager import StyleManager
+from .template_cache import get_template, get_template_cache
+from .tokenizer import tokenize
+from .tracing import Tracer
+
+# Drawing IDs restart at 1 in every chapter and must be unique in the merged document
+DOC_PR_PATTERN = re.compile(r'<wp:docPr id="\d+" name="Picture \d+"')
+
+
+class ChapterResult:
+    """One rendered chapter, as XML for the ooxml backend or as a DocumentIR for any other"""
+
+    def __init__(self, body_xml: Optional[str] = None, ir: Optional[DocumentIR] = None,
+                 images: Optional[List[Image]] = None, drawings: int = 0, entries: int = 0):
+        self.body_xml = body_xml
+        self.ir = ir
+        self.images = images or []
+        self.drawings = drawings
+        self.entries = entries
+
+
+# Formatter, style manager and backend reused by every chapter a worker process renders
+_chapter_state: Optional[Tuple[TextFormatter, StyleManager, OoxmlBackend]] = None
+
+
+def _init_chapter_worker(templates: List[TemplatePackage] = ()):
+    """Seed the worker's template cache with templates compiled by the parent"""
+    for template in templates:
+        get_template_cache().add(template)
+
+
+def _render_chapter(template_path: str, lines: List[str], level: int, base_dir: Optional[str],
+                    style_types: Dict[str, str], render_xml: bool) -> ChapterResult:
+    """
+    Render one chapter on its own
+    Styles are resolved against the template package, exactly as the parent
+    resolves them for the ooxml backend, starting from the heading level the
+    chapter opens at.
+    """
+    global _chapter_state
+    if _chapter_state is None:
+        _chapter_state = (TextFormatter(), StyleManager(), OoxmlBackend(streaming=False))
+    formatter, style_manager, backend = _chapter_state
+    backend.open(template_path)
+    style_manager.style_types = style_types
+    style_manager.load_style_index(backend, template_path)
+    style_manager.current_level = min(level, 9)
+    formatter.base_dir = base_dir
+
+    if not render_xml:
+        ir = formatter.build_ir(backend, tokenize(lines), style_manager)
+        return ChapterResult(ir=ir, entries=len(ir))
+
+    document = backend.document
+    body = [document.render(item)
+            for item in formatter.iter_block_paragraphs(backend, tokenize(lines), style_manager)]
+    return ChapterResult(''.join(body), images=list(document.images.values()),
+                         drawings=document.drawings, entries=len(body))
+
+
+def renumber_drawings(body_xml: str, first_id: int) -> str:
+    """Give the pictures of a chapter document-wide drawing IDs, starting at first_id"""
+    ids = count(first_id)
+
+    def replace(match: 're.Match') -> str:
+        drawing_id = next(ids)
+        return f'<wp:docPr id="{drawing_id}" name="Picture {drawing_id}"'
+
+    return DOC_PR_PATTERN.sub(replace, body_xml)
+
+
+class ChapterConverter(MarkdownToWordConverter):
+    """
+    Renders the chapters of a document in parallel and merges them into one .docx
+    The markdown is split at top-level headings outside fenced code. Each
+    chapter is tokenized, styled and rendered on a worker process; the
+    parent splices the chapters into the document in order. Splitting there
+    loses no state: every chapter opens with a level 1 heading, which sets
+    StyleManager.current_level and ends any list or table, and list
+    numbering comes from the template's paragraph styles, so it continues
+    across chapters as it does in a sequential conversion.
+
+    With the ooxml backend workers return rendered XML; picture relationships
+    are named by content hash and only drawing IDs need renumbering. With
+    Word backends workers return a DocumentIR per chapter and the merged
+    stream goes into the document in one write_paragraphs call.
+    """
+
+    def __init__(self, backend: Union[str, Callable[..., DocumentBackend]] = 'ooxml',
+                 backend_options: Optional[Dict[str, Any]] = None, workers: Optional[int] = None,
+                 executor: Optional[Executor] = None, tracer: Optional[Tracer] = None):
+        """
+        Args:
+            backend: Backend name or factory, as for MarkdownToWordConverter
+            backend_options: Keyword arguments for the backend
+            workers: Worker processes, defaults to the number of CPUs; 1 renders in this process
+            executor: Render chapters on this executor instead of an owned process pool
+            tracer: Receives stage timings
+        """
+        if backend == 'ooxml':
+            # Chapters arrive already rendered, so there is nothing left to stream
+            backend_options = dict(backend_options or {}, streaming=False)
+        super().__init__(backend=backend, backend_options=backend_options, tracer=tracer)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = executor
+        self.owns_executor = executor is None
+        self.template_path: Optional[str] = None
+        self.last_stats: Dict[str, int] = {}
+
+    def create_document(self, template_path: str):
+        self.template_path = template_path
+        return super().create_document(template_path)
+
+    def _get_executor(self, templates: List[TemplatePackage]) -> Optional[Executor]:
+        if self.executor is None and self.workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_chapter_worker,
+                                                initargs=(templates,))
+        return self.executor
+
+    def process_markdown_file(self, backend: DocumentBackend, markdown_path: str):
+        """Render the chapters in parallel and merge them in document order"""
+        try:
+            with open(markdown_path, 'r', encoding='utf-8') as file:
+                chapters = split_sections(self.read_lines(file), max_level=1)
+            try:
+                templates = [get_template(self.template_path)]
+            except ValueError:
+                templates = []  # Not a package, e.g. a .dot that only Word can read
+            if len(chapters) < 2 or not templates:
+                logging.info("Converting sequentially: fewer than two chapters or no template package")
+                self.last_stats = {'chapters': len(chapters), 'workers': 1}
+                return super().process_markdown_file(backend, markdown_path)
+
+            render_xml = isinstance(backend, OoxmlBackend)
+            base_dir = os.path.dirname(os.path.abspath(markdown_path))
+            style_types = dict(self.style_manager.style_types)
+            executor = self._get_executor(templates)
+            arguments = ([self.template_path] * len(chapters), [chapter.lines for chapter in chapters],
+                         [chapter.level for chapter in chapters], [base_dir] * len(chapters),
+                         [style_types] * len(chapters), [render_xml] * len(chapters))
+            # Results come back in chapter order, each merged as soon as it and its predecessors are done
+            results = executor.map(_render_chapter, *arguments) if executor else map(_render_chapter, *arguments)
+
+            backend.clear()
+            if render_xml:
+                self.merge_rendered(backend, results)
+            else:
+                backend.write_paragraphs(item for result in results for item in result.ir)
+            self.style_manager.current_level = 0
+            self.last_stats = {'chapters': len(chapters), 'workers': self.workers if executor else 1}
+            logging.info(f"Rendered {len(chapters)} chapters on {self.last_stats['workers']} workers")
+
+        except Exception as e:
+            logging.error(f"Failed to process markdown file: {str(e)}")
+            raise
+
+    def merge_rendered(self, backend: OoxmlBackend, results):
+        """Splice rendered chapters into the document, reconciling pictures"""
+        document = backend.document
+        for result in results:
+            body_xml = result.body_xml
+            if result.drawings:
+                body_xml = renumber_drawings(body_xml, document.drawings + 1)
+                document.drawings += result.drawings
+            for image in result.images:
+                document.images.setdefault(image.relationship_id, image)
+            document.append_xml(body_xml)
+
+    def stream_markdown_file(self, backend: DocumentBackend, markdown_path: str, output_path: str):
+        """Backends created with streaming on still get the chapters merged before saving"""
+        self.process_markdown_file(backend, markdown_path)
+        backend.save(output_path)
+
+    def close(self):
+        """Shut down the worker processes if this converter started them"""
+        if self.owns_executor and self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,231 @@
+# src/cli.py
+
+import os
+import sys
+import glob
+import argparse
+import logging
+import tempfile
+from typing import List, Optional
+
+from .backends import BACKENDS
+from .batch import MARKDOWN_PATTERNS, BatchResult, collect_inputs, plan_jobs, run_batch
+from .journal import BatchJournal
+from .tracing import Tracer
+from .watchdog import DEFAULT_RETRIES
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_USAGE = 2
+
+# Job timeout of the word backend, where a stuck automation call would otherwise stall the run
+WORD_JOB_TIMEOUT = 600.0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line arguments for headless conversion"""
+    parser = argparse.ArgumentParser(
+        prog='markdown_to_word',
+        description="Convert markdown files to Word documents without any dialogs."
+    )
+    parser.add_argument('template', help="Word template (.dotm, .dotx or .dot)")
+    parser.add_argument('inputs', nargs='+',
+                        help="Markdown files, glob patterns or directories (searched recursively)")
+    parser.add_argument('-o', '--output-dir', required=True, help="Directory for the .docx files")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: number of CPUs)")
+    parser.add_argument('-b', '--backend', choices=sorted(BACKENDS), default='ooxml',
+                        help="Document backend; 'word' needs Microsoft Word (default: ooxml)")
+    parser.add_argument('--batch-emission', action='store_true',
+                        help="Insert each document body in one Word call (word and fake backends)")
+    parser.add_argument('--compression-level', type=int, choices=range(10), metavar='0-9',
+                        help="zlib level for the parts written per document (ooxml backend, default: 6)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Re-render only sections changed since the last run (ooxml backend)")
+    parser.add_argument('--chapters', action='store_true',
+                        help="Convert one document at a time, rendering its top-level chapters on the workers")
+    parser.add_argument('--cache', action='store_true',
+                        help="Reuse documents converted before from the same markdown, template and settings")
+    parser.add_argument('--cache-dir', metavar='PATH', help="Output cache directory (default: ~/.cache/markdown_to_word/outputs)")
+    parser.add_argument('--cache-size', type=int, default=1024, metavar='MB',
+                        help="Size the output cache is trimmed to, least recently used first (default: 1024)")
+    parser.add_argument('--cache-copy', action='store_true',
+                        help="Copy documents out of the output cache instead of hard-linking them, "
+                             "for outputs that are edited in place")
+    parser.add_argument('--timeout', type=float, metavar='SECONDS',
+                        help=f"Kill and restart the worker of a job running longer than this, 0 for no limit "
+                             f"(default: {WORD_JOB_TIMEOUT:g} with the word backend, no limit otherwise)")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, metavar='N',
+                        help=f"Further attempts for a job that timed out or crashed its worker (default: {DEFAULT_RETRIES})")
+    parser.add_argument('--journal', metavar='PATH',
+                        help="Record every finished file in this JSON Lines file as soon as it completes")
+    parser.add_argument('--resume', action='store_true',
+                        help="With --journal, skip files the journal records as converted and unchanged since")
+    parser.add_argument('--verify', action='store_true',
+                        help="Check every converted document against its markdown afterwards (ooxml backend)")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and reconvert files as they are saved, into NAME.docx")
+    parser.add_argument('--poll', action='store_true',
+                        help="With --watch, scan for changes instead of using inotify, e.g. on network drives")
+    parser.add_argument('--debounce', type=float, default=0.2, metavar='SECONDS',
+                        help="With --watch, quiet period after a save before converting (default: 0.2)")
+    parser.add_argument('--pattern', action='append', dest='patterns',
+                        help=f"File pattern inside directories, repeatable (default: {' '.join(MARKDOWN_PATTERNS)})")
+    parser.add_argument('--trace-summary', metavar='PATH',
+                        help="Write per-document stage timings and backend/COM call counts as JSON")
+    parser.add_argument('--chrome-trace', metavar='PATH',
+                        help="Write every stage and backend call as a Chrome trace-event file")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="Run every conversion under cProfile and write the merged statistics")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Only print failures and the summary")
+    return parser
+
+
+def print_result(result: BatchResult, quiet: bool = False):
+    """One status line per file"""
+    retried = f", attempt {result.attempts}" if result.attempts > 1 else ''
+    if result.ok:
+        if not quiet:
+            print(f"OK    {result.job.markdown_path} -> {result.output_path} ({result.seconds:.2f}s{retried})")
+    else:
+        print(f"FAIL  {result.job.markdown_path}: {result.error}")
+    sys.stdout.flush()
+
+
+def print_trace_totals(tracer: Tracer):
+    """Stage timings and the most frequent calls over the whole batch"""
+    totals = tracer.summary()['totals']
+    print(f"\n{'Stage':<26} {'calls':>8} {'seconds':>10}")
+    for name, stage in sorted(totals['stages'].items(), key=lambda item: -item[1]['seconds']):
+        print(f"{name:<26} {stage['calls']:>8} {stage['seconds']:>10.3f}")
+    print("\nMost frequent calls")
+    for name, calls in list(totals['calls'].items())[:10]:
+        print(f"{calls:>8}  {name}")
+
+
+def merge_profiles(profile_dir: str, output_path: str, quiet: bool = False):
+    """Combine the per-job cProfile files into one and print the top functions"""
+    paths = glob.glob(os.path.join(profile_dir, '*.prof'))
+    if not paths:
+        return
+    import pstats
+    stats = pstats.Stats(*paths, stream=sys.stdout)
+    stats.dump_stats(output_path)
+    if not quiet:
+        print(f"\nProfile of {len(paths)} conversions written to {output_path}")
+        stats.sort_stats('cumulative').print_stats(25)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run a headless batch conversion and return the process exit code"""
+    args = build_parser().parse_args(argv)
+
+    if not os.path.isfile(args.template):
+        print(f"Template file not found: {args.template}", file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        markdown_paths = collect_inputs(args.inputs, args.patterns or MARKDOWN_PATTERNS)
+    except FileNotFoundError as e:
+        print(str(e), file=sys.stderr)
+        return EXIT_USAGE
+    if not markdown_paths:
+        print("No markdown files found", file=sys.stderr)
+        return EXIT_USAGE
+
+    if args.incremental and args.backend != 'ooxml':
+        print("--incremental requires the ooxml backend", file=sys.stderr)
+        return EXIT_USAGE
+    if args.verify and args.backend != 'ooxml':
+        print("--verify requires the ooxml backend", file=sys.stderr)
+        return EXIT_USAGE
+    if args.resume and not args.journal:
+        print("--resume requires --journal", file=sys.stderr)
+        return EXIT_USAGE
+    if args.incremental and args.chapters:
+        print("--incremental and --chapters cannot be combined", file=sys.stderr)
+        return EXIT_USAGE
+
+    backend_options = {'batch': True} if args.batch_emission and args.backend != 'ooxml' else {}
+    if args.compression_level is not None and args.backend == 'ooxml':
+        backend_options['compression_level'] = args.compression_level
+    if args.watch:
+        if args.chapters:
+            print("--watch and --chapters cannot be combined", file=sys.stderr)
+            return EXIT_USAGE
+        from .watch import watch
+        print("Watching for changes, press Ctrl+C to stop")
+        try:
+            watch(args.template, args.inputs, args.output_dir, backend=args.backend,
+                  backend_options=backend_options, incremental=args.incremental,
+                  patterns=args.patterns or MARKDOWN_PATTERNS, debounce=args.debounce, poll=args.poll,
+                  on_result=lambda result: print_result(result, args.quiet))
+        except KeyboardInterrupt:
+            pass
+        return EXIT_OK
+
+    if args.backend == 'word' and args.workers > 1:
+        logging.warning("The word backend starts one Word process per worker")
+
+    tracer = None
+    if args.trace_summary or args.chrome_trace:
+        tracer = Tracer(record_events=bool(args.chrome_trace))
+
+    timeout = args.timeout
+    if timeout is None and args.backend == 'word' and not args.chapters:
+        timeout = WORD_JOB_TIMEOUT
+    if args.chapters and timeout:
+        print("--timeout and --chapters cannot be combined", file=sys.stderr)
+        return EXIT_USAGE
+
+    cache_options = None
+    if args.cache:
+        cache_options = {'cache_dir': args.cache_dir, 'max_bytes': args.cache_size * 1024 * 1024,
+                         'link': not args.cache_copy}
+
+    jobs = plan_jobs(markdown_paths, args.output_dir)
+    journal = BatchJournal(args.journal) if args.journal else None
+    try:
+        with tempfile.TemporaryDirectory(prefix='markdown_to_word_profile_') as profile_dir:
+            summary = run_batch(args.template, jobs, workers=max(args.workers, 1), backend=args.backend,
+                                backend_options=backend_options, incremental=args.incremental,
+                                chapters=args.chapters, cache_options=cache_options,
+                                timeout=timeout or None, retries=args.retries,
+                                journal=journal, resume=args.resume,
+                                tracer=tracer, profile_dir=profile_dir if args.profile else None,
+                                on_result=lambda result: print_result(result, args.quiet))
+
+            print(f"\n{summary.succeeded} converted, {summary.failed} failed in {summary.seconds:.2f}s "
+                  f"({summary.docs_per_second:.1f} docs/sec, {summary.mb_per_second:.2f} MB/sec)")
+            if summary.skipped:
+                print(f"{summary.skipped} skipped, already converted according to {args.journal}")
+            if cache_options is not None:
+                print(f"Output cache: {summary.cache_hits} hits, {len(summary.results) - summary.cache_hits} misses")
+
+            if args.profile:
+                merge_profiles(profile_dir, args.profile, args.quiet)
+    finally:
+        if journal is not None:
+            journal.close()
+
+    verify_failed = 0
+    if args.verify:
+        from .verify import print_verification, verify_batch
+        pairs = [(result.job.markdown_path, result.output_path) for result in summary.results if result.ok]
+        verification = verify_batch(args.template, pairs, workers=max(args.workers, 1),
+                                    on_result=lambda result: print_verification(result, quiet=True))
+        verify_failed = sum(1 for result in verification if not result.ok)
+        print(f"{len(verification) - verify_failed} verified, {verify_failed} differ from their markdown")
+
+    if tracer is not None:
+        if not args.quiet:
+            print_trace_totals(tracer)
+        if args.trace_summary:
+            tracer.write_summary(args.trace_summary)
+        if args.chrome_trace:
+            tracer.write_chrome_trace(args.chrome_trace)
+    return EXIT_OK if summary.failed == 0 and verify_failed == 0 else EXIT_FAILURES
+
+
+if __name__ == '__main__':
+    sys.exit(main())
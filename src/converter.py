@@ -1,54 +1,98 @@
 # src/converter.py
 
 import os
-import time
 import logging
-import win32com.client
-from win32com.client import constants
+import threading
+from itertools import chain, repeat
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, Optional, TextIO, Union
+from .backends import DocumentBackend, create_backend
 from .style_manager import StyleManager
 from .formatters import TextFormatter
+from .tracing import NULL_TRACER, Tracer, instrument_backend
 from .utils import create_unique_filename, setup_logging
 
+if TYPE_CHECKING:
+    from .output_cache import OutputCache
+
+
+def read_markdown_lines(file: TextIO) -> Iterator[str]:
+    """
+    Lines of an open markdown file, read lazily
+    Only the leading blank lines are consumed up front, to fail early on an
+    empty file without reading the whole document.
+    """
+    blank = 0
+    for line in file:
+        if line.strip():
+            return chain(repeat('', blank), [line], file)
+        blank += 1
+    raise ValueError("Markdown file is empty")
+
+
+class ConversionCancelled(Exception):
+    """Raised inside a conversion once its cancel event is set"""
+
+
+def cancellable_lines(lines: Iterator[str], cancel_event: threading.Event) -> Iterator[str]:
+    """Pass lines through, stopping the conversion once cancel_event is set"""
+    for line in lines:
+        if cancel_event.is_set():
+            raise ConversionCancelled("Conversion cancelled")
+        yield line
+
+
 class MarkdownToWordConverter:
-    def __init__(self):
+    def __init__(self, backend: Union[str, Callable[..., DocumentBackend]] = 'word',
+                 backend_options: Optional[Dict[str, Any]] = None,
+                 tracer: Optional[Tracer] = None, cancel_event: Optional[threading.Event] = None,
+                 output_cache: Optional['OutputCache'] = None):
+        """
+        Args:
+            backend: 'word' drives Microsoft Word through COM, 'ooxml' writes the
+                     .docx package directly, 'fake' drives the in-memory Word
+                     stand-in; a callable returning a DocumentBackend is also accepted
+            backend_options: Keyword arguments for the backend, e.g. {'batch': True}
+            tracer: Records stage timings and backend/COM call counts per document
+            cancel_event: Checked between markdown lines; once set, the running
+                          conversion stops with ConversionCancelled and saves nothing
+            output_cache: Serve documents converted before from this cache, and add new ones
+        """
+        self.backend_options = backend_options or {}
+        # Fail on an unknown name now rather than at the first conversion
+        if isinstance(backend, str):
+            create_backend(backend, **self.backend_options)
         setup_logging()
+        self.backend_factory = backend
         self.style_manager = StyleManager()
         self.text_formatter = TextFormatter()
-        self.word_app = None
-        self.doc = None
+        self.tracer = tracer or NULL_TRACER
+        self.cancel_event = cancel_event
+        self.output_cache = output_cache
+        self.cache_hit = False  # Whether the last conversion was served from output_cache
+        self.backend = None
 
-    def init_word(self):
-        """Initialize Microsoft Word application"""
-        try:
-            # Kill any existing Word processes
-            os.system("taskkill /f /im WINWORD.EXE 2>nul")
-            time.sleep(1)
-            
-            # Create new Word instance
-            self.word_app = win32com.client.Dispatch("Word.Application")
-            self.word_app.Visible = True
-            
-            # Wait for Word to be ready
-            time.sleep(1)
-            
-            logging.info("Word application initialized successfully")
-            return True
-        except Exception as e:
-            logging.error(f"Failed to initialize Word: {str(e)}")
-            raise RuntimeError(f"Failed to initialize Microsoft Word: {str(e)}")
+    def init_backend(self) -> DocumentBackend:
+        """Create and start the document backend"""
+        with self.tracer.span('init_backend'):
+            backend = create_backend(self.backend_factory, **self.backend_options)
+            if self.tracer.enabled:
+                instrument_backend(backend, self.tracer)
+            self.backend = backend
+            self.backend.start()
+        return self.backend
 
     def verify_template(self, template_path: str):
         """Verify template file exists and is valid"""
         if not os.path.exists(template_path):
             raise FileNotFoundError(f"Template file not found: {template_path}")
-        
+
         if not template_path.lower().endswith(('.dotm', '.dotx', '.dot')):
             raise ValueError("Template file must be a Word template (.dotm, .dotx, or .dot)")
-        
+
         # Check file size
         if os.path.getsize(template_path) == 0:
             raise ValueError("Template file is empty")
-        
+
         logging.info(f"Template verified: {template_path}")
         return True
 
@@ -56,117 +100,132 @@ class MarkdownToWordConverter:
         """Create new document from template"""
         try:
             logging.info(f"Creating document from template: {template_path}")
-            
+
             # Verify template first
             self.verify_template(template_path)
-            
-            # Close any open documents
-            if self.word_app.Documents.Count > 0:
-                for doc in self.word_app.Documents:
-                    try:
-                        doc.Close(SaveChanges=False)
-                    except:
-                        pass
-            
-            try:
-                # Try to create blank document first
-                blank_doc = self.word_app.Documents.Add()
-                if not blank_doc:
-                    raise RuntimeError("Failed to create blank document")
-                
-                # Now try to attach template
-                blank_doc.set_AttachedTemplate(template_path)
-                self.doc = blank_doc
-                
-            except Exception as template_error:
-                logging.warning(f"Failed to attach template, trying direct creation: {str(template_error)}")
-                # If that fails, try direct creation
-                self.doc = self.word_app.Documents.Add(Template=template_path)
-            
-            if not self.doc:
-                raise RuntimeError("Document creation failed - no document object")
-            
-            # Verify document is accessible
-            _ = self.doc.Content
-            
+
+            self.backend.open(template_path)
+
+            # Resolve style fallbacks once instead of probing per paragraph
+            self.style_manager.load_style_index(self.backend, template_path)
+
             logging.info("Document created successfully")
             return True
-            
+
         except Exception as e:
             logging.error(f"Failed to create document: {str(e)}")
-            self.cleanup()
+            self.cleanup(failed=True)
             raise RuntimeError(f"Failed to create document: {str(e)}")
 
     def convert(self, template_path: str, markdown_path: str, output_dir: str) -> str:
         """Convert markdown file to Word document"""
+        with self.tracer.document(os.path.abspath(markdown_path)):
+            if self.output_cache is None:
+                return self._convert(template_path, markdown_path, output_dir)
+            return self._convert_cached(template_path, markdown_path, output_dir)
+
+    def _convert_cached(self, template_path: str, markdown_path: str, output_dir: str) -> str:
+        """Convert through the output cache, skipping the conversion on a hit"""
+        self.cache_hit = False
+        with self.tracer.span('cache_lookup'):
+            backend_name = self.backend_factory if isinstance(self.backend_factory, str) else \
+                getattr(self.backend_factory, '__qualname__', type(self.backend_factory).__name__)
+            key = self.output_cache.key(markdown_path, template_path, backend_name,
+                                        self.backend_options, self.style_manager.style_types)
+            os.makedirs(output_dir, exist_ok=True)
+            output_path = create_unique_filename(markdown_path, os.path.abspath(output_dir))
+            if self.output_cache.fetch(key, output_path):
+                self.cache_hit = True
+                return output_path
+        output_path = self._convert(template_path, markdown_path, output_dir)
+        with self.tracer.span('cache_store'):
+            self.output_cache.store(key, output_path)
+        return output_path
+
+    def _convert(self, template_path: str, markdown_path: str, output_dir: str) -> str:
+        failed = False
         try:
-            # Initialize Word
-            self.init_word()
-            
+            # Initialize the backend
+            self.init_backend()
+
             # Normalize paths
             template_path = os.path.abspath(template_path)
             markdown_path = os.path.abspath(markdown_path)
             output_dir = os.path.abspath(output_dir)
-            
-            logging.info(f"Converting {markdown_path} using template {template_path}")
-            
+
+            logging.info(f"Converting {markdown_path} using template {template_path} ({self.backend.name})")
+
             # Create output directory if needed
             os.makedirs(output_dir, exist_ok=True)
-            
+
             # Create document from template
-            self.create_document(template_path)
-            
-            if not self.doc:
-                raise RuntimeError("No document object after creation")
-            
+            with self.tracer.span('create_document'):
+                self.create_document(template_path)
+
             # Generate output filename
             output_path = create_unique_filename(markdown_path, output_dir)
-            
-            # Process markdown
-            self.process_markdown_file(self.doc, markdown_path)
-            
-            # Save the document
-            self.doc.SaveAs(output_path)
+
+            if self.backend.supports_streaming:
+                # Process and save in one pass, never holding the whole body
+                with self.tracer.span('process_and_save'):
+                    self.stream_markdown_file(self.backend, markdown_path, output_path)
+            else:
+                # Process markdown
+                with self.tracer.span('process_content'):
+                    self.process_markdown_file(self.backend, markdown_path)
+
+                # Save the document
+                with self.tracer.span('save'):
+                    self.backend.save(output_path)
             logging.info(f"Document saved successfully to {output_path}")
-            
+
             return output_path
 
         except Exception as e:
+            failed = True
             logging.error(f"Conversion failed: {str(e)}")
             raise
         finally:
-            self.cleanup()
+            with self.tracer.span('cleanup'):
+                self.cleanup(failed=failed)
 
-    def process_markdown_file(self, doc, markdown_path: str):
+    def process_markdown_file(self, backend: DocumentBackend, markdown_path: str):
         """Process the markdown file"""
         try:
             with open(markdown_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                if not content.strip():
-                    raise ValueError("Markdown file is empty")
-                self.text_formatter.process_content(doc, content, self.style_manager)
+                lines = self.read_lines(file)
+                self.style_manager.current_level = 0
+                self.text_formatter.base_dir = os.path.dirname(os.path.abspath(markdown_path))
+                self.text_formatter.process_lines(backend, lines, self.style_manager)
         except Exception as e:
             logging.error(f"Failed to process markdown file: {str(e)}")
             raise
 
-    def cleanup(self):
-        """Clean up Word resources"""
+    def stream_markdown_file(self, backend: DocumentBackend, markdown_path: str, output_path: str):
+        """Convert the markdown file straight into the saved document"""
         try:
-            if self.doc:
-                try:
-                    self.doc.Close(SaveChanges=False)
-                except:
-                    pass
-                self.doc = None
-            
-            if self.word_app:
-                try:
-                    self.word_app.Quit()
-                except:
-                    pass
-                self.word_app = None
-                
-            time.sleep(1)
-            
+            with open(markdown_path, 'r', encoding='utf-8') as file:
+                lines = self.read_lines(file)
+                self.style_manager.current_level = 0
+                self.text_formatter.base_dir = os.path.dirname(os.path.abspath(markdown_path))
+                self.text_formatter.stream_lines(backend, lines, self.style_manager, output_path)
+        except Exception as e:
+            logging.error(f"Failed to process markdown file: {str(e)}")
+            raise
+
+    def read_lines(self, file: TextIO) -> Iterator[str]:
+        """Markdown lines of an open file, honouring cancel_event"""
+        lines = read_markdown_lines(file)
+        if self.cancel_event is not None:
+            lines = cancellable_lines(lines, self.cancel_event)
+        return lines
+
+    def cleanup(self, failed: bool = False):
+        """Clean up backend resources"""
+        try:
+            if self.backend:
+                self.backend.quit(failed=failed)
+                self.backend = None
+
         except Exception as e:
-            logging.error(f"Error during cleanup: {str(e)}")
\ No newline at end of file
+            logging.error(f"Error during cleanup: {str(e)}")
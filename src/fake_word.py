@@ -0,0 +1,746 @@
+# src/fake_word.py
+
+import bisect
+import logging
+import os
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .images import Image, get_image_cache
+from .ooxml_writer import DEFAULT_TEXT_WIDTH, OoxmlDocument
+from .tables import Table
+from .template_cache import get_template
+
+WD_STORY = 6
+PARAGRAPH_MARK = '\r'
+LINE_BREAK = '\v'
+CELL_SEPARATOR = '\t'
+
+# wdAlignParagraph values mapped back to column alignments
+ALIGNMENTS = {0: 'left', 1: 'center', 2: 'right'}
+
+# Font attribute values as TextFormatter writes them, mapped back to span types
+FORMAT_TYPES = {
+    ('Bold', -1): 'bold',
+    ('Italic', -1): 'italic',
+    ('Name', 'Consolas'): 'code',
+}
+
+
+class FakeComError(Exception):
+    """Raised where Word would raise a pywintypes.com_error"""
+
+
+class CallRecorder:
+    """Counts every member access made on the fake Word object model"""
+
+    def __init__(self, keep_log: bool = False):
+        self.counts = Counter()
+        self.keep_log = keep_log
+        self.log: List[str] = []
+
+    def record(self, member: str):
+        self.counts[member] += 1
+        if self.keep_log:
+            self.log.append(member)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def reset(self):
+        self.counts.clear()
+        self.log.clear()
+
+
+class FakeWordApplication:
+    """
+    In-memory stand-in for Word.Application
+    Mimics the subset of the Word object model the converter uses and records
+    every property access and method call in self.recorder.
+    """
+
+    def __init__(self, recorder: Optional[CallRecorder] = None, styles: Optional[Iterable[str]] = None):
+        self.recorder = recorder or CallRecorder()
+        self.default_styles = list(styles) if styles is not None else None
+        self._visible = False
+        self._documents = FakeDocuments(self)
+        self._selection = FakeSelection(self)
+        self.active_document: Optional['FakeDocument'] = None
+        self.quit_called = False
+        logging.debug("FakeWordApplication initialized")
+
+    @property
+    def Visible(self) -> bool:
+        self.recorder.record('Application.Visible')
+        return self._visible
+
+    @Visible.setter
+    def Visible(self, value: bool):
+        self.recorder.record('Application.Visible')
+        self._visible = bool(value)
+
+    @property
+    def Documents(self) -> 'FakeDocuments':
+        self.recorder.record('Application.Documents')
+        return self._documents
+
+    @property
+    def Selection(self) -> 'FakeSelection':
+        self.recorder.record('Application.Selection')
+        return self._selection
+
+    def Quit(self, *args, **kwargs):
+        self.recorder.record('Application.Quit')
+        for document in list(self._documents.items):
+            document.Close(SaveChanges=False)
+        self.quit_called = True
+
+
+class FakeDocuments:
+    """Stand-in for the Documents collection"""
+
+    def __init__(self, app: FakeWordApplication):
+        self.app = app
+        self.items: List['FakeDocument'] = []
+
+    @property
+    def Count(self) -> int:
+        self.app.recorder.record('Documents.Count')
+        return len(self.items)
+
+    def __iter__(self):
+        self.app.recorder.record('Documents.__iter__')
+        return iter(list(self.items))
+
+    def Add(self, Template: Optional[str] = None, *args, **kwargs) -> 'FakeDocument':
+        self.app.recorder.record('Documents.Add')
+        document = FakeDocument(self.app, self.app.default_styles)
+        if Template:
+            document.attach_template(Template)
+        self.items.append(document)
+        self.app.active_document = document
+        self.app._selection.move_to(document, 0)
+        return document
+
+
+class FakeDocument:
+    """
+    Stand-in for a Word Document
+    The story is held as one string whose paragraphs end in '\\r', like Word's
+    Content.Text, with one style name per paragraph.
+    """
+
+    def __init__(self, app: FakeWordApplication, styles: Optional[Iterable[str]] = None):
+        self.app = app
+        self.text = PARAGRAPH_MARK
+        self.paragraph_styles: List[str] = ['Normal']
+        self.formats: List[Tuple[int, int, str, object]] = []
+        self.formats_last_start = -1  # Largest start in formats, edits after it shift nothing
+        self.tables: List['FakeTable'] = []
+        self.inline_shapes: List['FakeInlineShape'] = []
+        self.text_width = DEFAULT_TEXT_WIDTH  # Twips, from the attached template
+        self.style_names = list(styles) if styles is not None else ['Normal']
+        self.styles = {name.lower() for name in self.style_names}
+        self.template_path: Optional[str] = None
+        self.saved_path: Optional[str] = None
+        self.closed = False
+        self._starts: Optional[List[int]] = None
+
+    # Paragraph bookkeeping
+
+    def paragraph_starts(self) -> List[int]:
+        """Offsets of the first character of each paragraph"""
+        if self._starts is None:
+            self._starts = [0] + self._scan_starts(0)
+        return self._starts
+
+    def _scan_starts(self, position: int) -> List[int]:
+        """Paragraph starts after position"""
+        starts = []
+        position = self.text.find(PARAGRAPH_MARK, position)
+        while position != -1 and position + 1 < len(self.text):
+            starts.append(position + 1)
+            position = self.text.find(PARAGRAPH_MARK, position + 1)
+        return starts
+
+    def paragraph_index(self, position: int) -> int:
+        """Index of the paragraph containing a character offset"""
+        return max(bisect.bisect_right(self.paragraph_starts(), position) - 1, 0)
+
+    def paragraph_span(self, index: int) -> Tuple[int, int]:
+        """(start, end) of a paragraph, end including its paragraph mark"""
+        starts = self.paragraph_starts()
+        end = starts[index + 1] if index + 1 < len(starts) else len(self.text)
+        return starts[index], end
+
+    def replace(self, start: int, end: int, new_text: str):
+        """Replace a span of the story, keeping the final paragraph mark"""
+        start = max(0, min(start, len(self.text) - 1))
+        end = max(start, min(end, len(self.text) - 1))
+        new_text = new_text.replace('\r\n', PARAGRAPH_MARK).replace('\n', PARAGRAPH_MARK)
+
+        first = self.paragraph_index(start)
+        removed_marks = self.text.count(PARAGRAPH_MARK, start, end)
+        added_marks = new_text.count(PARAGRAPH_MARK)
+        style = self.paragraph_styles[first]
+        self.paragraph_styles[first + 1:first + 1 + removed_marks] = [style] * added_marks
+
+        self.text = self.text[:start] + new_text + self.text[end:]
+        # Paragraphs before the edit keep their starts, so only the rest is rescanned
+        first_start = self._starts[first]
+        self._starts = self._starts[:first + 1] + self._scan_starts(first_start)
+
+        # Formatting inside replaced text goes with it, later formatting shifts
+        delta = len(new_text) - (end - start)
+        if self.tables:
+            self.tables = [table for table in self.tables if not (end > start and table.start >= start
+                                                                   and table.end <= end)]
+            for table in self.tables:
+                if table.start >= end:
+                    table.start += delta
+                    table.end += delta
+        if self.inline_shapes:
+            self.inline_shapes = [shape for shape in self.inline_shapes
+                                  if not (end > start and start <= shape.position < end)]
+            for shape in self.inline_shapes:
+                if shape.position >= end:
+                    shape.position += delta
+        if self.formats_last_start >= start and (delta or end > start):
+            self.formats = [
+                (s + delta, e + delta, attr, value) if s >= end else (s, e, attr, value)
+                for s, e, attr, value in self.formats
+                if not (end > start and s >= start and e <= end)
+            ]
+            self.formats_last_start = max((s for s, _, _, _ in self.formats), default=-1)
+
+    def add_format(self, start: int, end: int, attr: str, value: object):
+        """Record a character format applied to a span"""
+        self.formats.append((start, end, attr, value))
+        self.formats_last_start = max(self.formats_last_start, start)
+
+    def set_style(self, start: int, end: int, style_name: str):
+        """Apply a paragraph style to every paragraph touched by a span"""
+        if style_name.lower() not in self.styles:
+            raise FakeComError(f"The requested member of the collection does not exist: {style_name}")
+        first = self.paragraph_index(start)
+        last = self.paragraph_index(max(start, end - 1))
+        for index in range(first, last + 1):
+            self.paragraph_styles[index] = style_name
+
+    def attach_template(self, template_path: str):
+        """Load style names from a template package"""
+        if not os.path.exists(template_path):
+            raise FakeComError(f"Template not found: {template_path}")
+        self.template_path = template_path
+        try:
+            package = get_template(template_path)
+        except ValueError:
+            return
+        self.style_names = (list(package.style_names) + list(package.table_style_names)
+                            + ([] if package.has_style('Normal') else ['Normal']))
+        self.styles = {name.lower() for name in self.style_names}
+        self.text_width = package.text_width
+
+    def paragraphs(self) -> List[Tuple[str, str, List[Tuple[int, int, str]]]]:
+        """Story as (text, style_name, spans) triples, spans relative to the paragraph"""
+        result = []
+        starts = self.paragraph_starts()
+        formats_by_paragraph: Dict[int, List[Tuple[int, int, str]]] = {}
+        for s, e, attr, value in self.formats:
+            format_type = FORMAT_TYPES.get((attr, value))
+            if format_type:
+                index = self.paragraph_index(s)
+                if e <= self.paragraph_span(index)[1]:
+                    formats_by_paragraph.setdefault(index, []).append((s, e, format_type))
+        for index, start in enumerate(starts):
+            _, end = self.paragraph_span(index)
+            spans = [(s - start, e - start, format_type)
+                     for s, e, format_type in formats_by_paragraph.get(index, ())]
+            text = self.text[start:end].rstrip(PARAGRAPH_MARK).replace(LINE_BREAK, '\n')
+            result.append((text, self.paragraph_styles[index], spans))
+        return result
+
+    def items(self) -> List[object]:
+        """
+        Story as (text, style_name, spans) paragraphs, with converted tables as
+        Tables and paragraphs holding a picture as Images
+        """
+        paragraphs = self.paragraphs()
+        tables = {self.paragraph_index(table.start): table for table in self.tables}
+        shapes: Dict[int, List['FakeInlineShape']] = {}
+        for shape in sorted(self.inline_shapes, key=lambda shape: shape.position):
+            shapes.setdefault(self.paragraph_index(shape.position), []).append(shape)
+        result = []
+        index = 0
+        while index < len(paragraphs):
+            table = tables.get(index)
+            if table is None:
+                text, style_name, spans = paragraphs[index]
+                if text or index not in shapes:
+                    result.append(paragraphs[index])
+                for shape in shapes.get(index, ()):
+                    result.append(Image(shape.path, get_image_cache().probe(shape.path), shape.alt, style_name))
+                index += 1
+                continue
+            last = self.paragraph_index(max(table.start, table.end - 1))
+            result.append(table.to_table(paragraphs[index:last + 1]))
+            index = last + 1
+        return result
+
+    # Word object model
+
+    @property
+    def Application(self) -> FakeWordApplication:
+        self.app.recorder.record('Document.Application')
+        return self.app
+
+    @property
+    def Content(self) -> 'FakeRange':
+        self.app.recorder.record('Document.Content')
+        return FakeRange(self, 0, len(self.text))
+
+    @property
+    def Paragraphs(self) -> 'FakeParagraphs':
+        self.app.recorder.record('Document.Paragraphs')
+        return FakeParagraphs(self, 0, len(self.text))
+
+    def Range(self, Start: int = 0, End: Optional[int] = None) -> 'FakeRange':
+        self.app.recorder.record('Document.Range')
+        return FakeRange(self, Start, len(self.text) if End is None else End)
+
+    @property
+    def Styles(self) -> 'FakeStyles':
+        self.app.recorder.record('Document.Styles')
+        return FakeStyles(self)
+
+    @property
+    def InlineShapes(self) -> 'FakeInlineShapes':
+        self.app.recorder.record('Document.InlineShapes')
+        return FakeInlineShapes(self)
+
+    @property
+    def PageSetup(self) -> 'FakePageSetup':
+        self.app.recorder.record('Document.PageSetup')
+        return FakePageSetup(self)
+
+    def set_AttachedTemplate(self, template_path: str):
+        self.app.recorder.record('Document.set_AttachedTemplate')
+        self.attach_template(template_path)
+
+    def SaveAs(self, FileName: str, *args, **kwargs):
+        """Save through the OOXML writer when a template package is attached"""
+        self.app.recorder.record('Document.SaveAs')
+        if self.template_path and self.template_path.lower().endswith(('.dotm', '.dotx')):
+            document = OoxmlDocument(self.template_path)
+            for item in self.items():
+                if isinstance(item, Table):
+                    document.add_table(item)
+                elif isinstance(item, Image):
+                    document.add_image(item)
+                else:
+                    document.add_paragraph(*item)
+            document.save(FileName)
+        else:
+            with open(FileName, 'w', encoding='utf-8') as file:
+                file.write(self.text.replace(PARAGRAPH_MARK, '\n'))
+        self.saved_path = FileName
+
+    def Close(self, SaveChanges: bool = False, *args, **kwargs):
+        self.app.recorder.record('Document.Close')
+        self.closed = True
+        if self in self.app._documents.items:
+            self.app._documents.items.remove(self)
+
+
+class FakeStyle:
+    """Stand-in for a Word Style"""
+
+    def __init__(self, document: FakeDocument, name: str):
+        self.document = document
+        self.name = name
+
+    @property
+    def NameLocal(self) -> str:
+        self.document.app.recorder.record('Style.NameLocal')
+        return self.name
+
+
+class FakeStyles:
+    """Stand-in for the Styles collection, callable by name like COM's default Item"""
+
+    def __init__(self, document: FakeDocument):
+        self.document = document
+
+    def __call__(self, name: str) -> FakeStyle:
+        self.document.app.recorder.record('Styles.Item')
+        if name.lower() not in self.document.styles:
+            raise FakeComError(f"The requested member of the collection does not exist: {name}")
+        return FakeStyle(self.document, name)
+
+    def __iter__(self):
+        self.document.app.recorder.record('Styles.__iter__')
+        return iter([FakeStyle(self.document, name) for name in self.document.style_names])
+
+    @property
+    def Count(self) -> int:
+        self.document.app.recorder.record('Styles.Count')
+        return len(self.document.style_names)
+
+
+class FakeInlineShapes:
+    """Stand-in for the InlineShapes collection of a document"""
+
+    def __init__(self, document: FakeDocument):
+        self.document = document
+
+    @property
+    def Count(self) -> int:
+        self.document.app.recorder.record('InlineShapes.Count')
+        return len(self.document.inline_shapes)
+
+    def AddPicture(self, FileName: str, LinkToFile: bool = False, SaveWithDocument: bool = True,
+                   Range: Optional['FakeRange'] = None, *args, **kwargs) -> 'FakeInlineShape':
+        """Place a picture at the start of the range; like a table it leaves the text alone"""
+        self.document.app.recorder.record('InlineShapes.AddPicture')
+        if not os.path.exists(FileName):
+            raise FakeComError(f"The file could not be found: {FileName}")
+        position = Range.start if Range is not None else len(self.document.text) - 1
+        shape = FakeInlineShape(self.document, FileName, position)
+        self.document.inline_shapes.append(shape)
+        return shape
+
+
+class FakeInlineShape:
+    """Stand-in for an InlineShape holding a picture"""
+
+    def __init__(self, document: FakeDocument, path: str, position: int):
+        object.__setattr__(self, 'document', document)
+        object.__setattr__(self, 'path', path)
+        object.__setattr__(self, 'position', position)
+        object.__setattr__(self, 'alt', '')
+
+    def __setattr__(self, name: str, value):
+        if name in ('Width', 'Height', 'AlternativeText'):
+            self.document.app.recorder.record(f'InlineShape.{name}')
+            if name == 'AlternativeText':
+                name = 'alt'
+        object.__setattr__(self, name, value)
+
+
+class FakePageSetup:
+    """Stand-in for Document.PageSetup, one-inch side margins around the template's text width"""
+
+    def __init__(self, document: FakeDocument):
+        self.document = document
+
+    @property
+    def LeftMargin(self) -> float:
+        self.document.app.recorder.record('PageSetup.LeftMargin')
+        return 72.0
+
+    @property
+    def RightMargin(self) -> float:
+        self.document.app.recorder.record('PageSetup.RightMargin')
+        return 72.0
+
+    @property
+    def PageWidth(self) -> float:
+        self.document.app.recorder.record('PageSetup.PageWidth')
+        return self.document.text_width / 20 + 144.0
+
+
+class FakeRange:
+    """Stand-in for a Word Range"""
+
+    def __init__(self, document: FakeDocument, start: int, end: int):
+        self.document = document
+        self.start = start
+        self.end = end
+
+    def _record(self, member: str):
+        self.document.app.recorder.record(f'Range.{member}')
+
+    @property
+    def Start(self) -> int:
+        self._record('Start')
+        return self.start
+
+    @property
+    def End(self) -> int:
+        self._record('End')
+        return self.end
+
+    @property
+    def Document(self) -> FakeDocument:
+        self._record('Document')
+        return self.document
+
+    @property
+    def Text(self) -> str:
+        self._record('Text')
+        return self.document.text[self.start:self.end]
+
+    @Text.setter
+    def Text(self, value: str):
+        self._record('Text')
+        self.document.replace(self.start, self.end, value)
+        self.end = self.start + len(value)
+
+    @property
+    def Style(self) -> str:
+        self._record('Style')
+        return self.document.paragraph_styles[self.document.paragraph_index(self.start)]
+
+    @Style.setter
+    def Style(self, style_name: str):
+        self._record('Style')
+        self.document.set_style(self.start, self.end, style_name)
+
+    @property
+    def Font(self) -> 'FakeFont':
+        self._record('Font')
+        return FakeFont(self)
+
+    @property
+    def Shading(self) -> 'FakeShading':
+        self._record('Shading')
+        return FakeShading(self)
+
+    @property
+    def Paragraphs(self) -> 'FakeParagraphs':
+        self._record('Paragraphs')
+        return FakeParagraphs(self.document, self.start, self.end)
+
+    def InsertAfter(self, text: str):
+        self._record('InsertAfter')
+        self.document.replace(self.end, self.end, text)
+        self.end += len(text)
+
+    def Delete(self):
+        self._record('Delete')
+        self.document.replace(self.start, self.end, '')
+        self.end = self.start
+
+    def ConvertToTable(self, Separator: int = 1, NumRows: Optional[int] = None,
+                       NumColumns: Optional[int] = None, *args, **kwargs) -> 'FakeTable':
+        """Mark the paragraphs of the range as a table; the text keeps its tabs"""
+        self._record('ConvertToTable')
+        document = self.document
+        first = document.paragraph_index(self.start)
+        last = document.paragraph_index(max(self.start, self.end - 1))
+        start, _ = document.paragraph_span(first)
+        _, end = document.paragraph_span(last)
+        if NumColumns is None:
+            NumColumns = max(document.text[s:e].count(CELL_SEPARATOR) + 1
+                             for s, e in map(document.paragraph_span, range(first, last + 1)))
+        table = FakeTable(document, start, end, NumColumns)
+        document.tables.append(table)
+        return table
+
+
+class FakeTable:
+    """Stand-in for a Word Table over tab-separated paragraphs"""
+
+    def __init__(self, document: FakeDocument, start: int, end: int, columns: int):
+        self.document = document
+        self.start = start
+        self.end = end
+        self.columns = columns
+        self.style_name: Optional[str] = None
+        self.heading_rows = 0
+        self.alignments = [''] * columns
+
+    def _record(self, member: str):
+        self.document.app.recorder.record(f'Table.{member}')
+
+    @property
+    def Style(self) -> Optional[str]:
+        self._record('Style')
+        return self.style_name
+
+    @Style.setter
+    def Style(self, style_name: str):
+        self._record('Style')
+        if style_name.lower() not in self.document.styles:
+            raise FakeComError(f"The requested member of the collection does not exist: {style_name}")
+        self.style_name = style_name
+
+    def Rows(self, index: int) -> 'FakeRow':
+        self._record('Rows')
+        return FakeRow(self, index)
+
+    def Columns(self, index: int) -> 'FakeColumn':
+        self._record('Columns')
+        if not 1 <= index <= self.columns:
+            raise FakeComError(f"The requested member of the collection does not exist: {index}")
+        return FakeColumn(self, index)
+
+    def to_table(self, paragraphs: List[Tuple[str, str, List[Tuple[int, int, str]]]]) -> Table:
+        """Table from the (text, style_name, spans) paragraphs the table covers"""
+        rows = []
+        for text, _, spans in paragraphs:
+            cells = []
+            position = 0
+            for cell in (text.split(CELL_SEPARATOR) + [''] * self.columns)[:self.columns]:
+                end = position + len(cell)
+                cell_spans = [(max(s, position) - position, min(e, end) - position, format_type)
+                              for s, e, format_type in spans if s < end and e > position]
+                cells.append((cell, cell_spans))
+                position = end + 1
+            rows.append(cells)
+        return Table(rows, list(self.alignments), self.style_name,
+                     paragraphs[0][1] if paragraphs else 'Normal', self.heading_rows)
+
+
+class FakeRow:
+    """Stand-in for a table Row"""
+
+    def __init__(self, table: FakeTable, index: int):
+        self.table = table
+        self.index = index
+
+    @property
+    def Range(self) -> FakeRange:
+        self.table._record('Row.Range')
+        document = self.table.document
+        start, end = document.paragraph_span(document.paragraph_index(self.table.start) + self.index - 1)
+        return FakeRange(document, start, end)
+
+    @property
+    def HeadingFormat(self) -> bool:
+        self.table._record('Row.HeadingFormat')
+        return self.table.heading_rows >= self.index
+
+    @HeadingFormat.setter
+    def HeadingFormat(self, value):
+        self.table._record('Row.HeadingFormat')
+        if value:
+            self.table.heading_rows = max(self.table.heading_rows, self.index)
+
+
+class FakeColumn:
+    """Stand-in for a table Column"""
+
+    def __init__(self, table: FakeTable, index: int):
+        self.table = table
+        self.index = index
+
+    def Select(self):
+        self.table._record('Column.Select')
+        self.table.document.app._selection.select_column(self.table, self.index)
+
+
+class FakeParagraphFormat:
+    """Stand-in for Selection.ParagraphFormat, only alignment of a selected column is kept"""
+
+    def __init__(self, selection: 'FakeSelection'):
+        object.__setattr__(self, 'selection', selection)
+
+    def __setattr__(self, name: str, value):
+        self.selection.app.recorder.record(f'ParagraphFormat.{name}')
+        if name == 'Alignment' and self.selection.column is not None:
+            table, index = self.selection.column
+            table.alignments[index - 1] = ALIGNMENTS.get(value, '')
+
+
+class FakeFont:
+    """Stand-in for Range.Font, records character formatting on the document"""
+
+    def __init__(self, range_object: FakeRange):
+        object.__setattr__(self, 'range', range_object)
+
+    def __setattr__(self, name: str, value):
+        range_object = self.range
+        range_object.document.app.recorder.record(f'Font.{name}')
+        range_object.document.add_format(range_object.start, range_object.end, name, value)
+
+
+class FakeShading(FakeFont):
+    """Stand-in for Range.Shading"""
+
+
+class FakeParagraph:
+    """Stand-in for a Word Paragraph"""
+
+    def __init__(self, document: FakeDocument, index: int):
+        self.document = document
+        self.index = index
+
+    @property
+    def Range(self) -> FakeRange:
+        self.document.app.recorder.record('Paragraph.Range')
+        start, end = self.document.paragraph_span(self.index)
+        return FakeRange(self.document, start, end)
+
+
+class FakeParagraphs:
+    """Stand-in for the Paragraphs collection of a document, range or selection"""
+
+    def __init__(self, document: FakeDocument, start: int, end: int):
+        self.document = document
+        self.first = document.paragraph_index(start)
+        self.last = document.paragraph_index(max(start, end - 1))
+
+    @property
+    def Count(self) -> int:
+        self.document.app.recorder.record('Paragraphs.Count')
+        return self.last - self.first + 1
+
+    def Item(self, index: int) -> FakeParagraph:
+        self.document.app.recorder.record('Paragraphs.Item')
+        if not 1 <= index <= self.last - self.first + 1:
+            raise FakeComError(f"The requested member of the collection does not exist: {index}")
+        return FakeParagraph(self.document, self.first + index - 1)
+
+
+class FakeSelection:
+    """Stand-in for Application.Selection, a cursor in the active document"""
+
+    def __init__(self, app: FakeWordApplication):
+        self.app = app
+        self.document: Optional[FakeDocument] = None
+        self.position = 0
+        self.column: Optional[Tuple[FakeTable, int]] = None  # Table column selected by Column.Select
+
+    def move_to(self, document: FakeDocument, position: int):
+        self.document = document
+        self.position = position
+        self.column = None
+
+    def select_column(self, table: FakeTable, index: int):
+        self.document = table.document
+        self.column = (table, index)
+
+    def _active(self) -> FakeDocument:
+        if self.document is None or self.document.closed:
+            raise FakeComError("This command is not available because no document is open")
+        return self.document
+
+    def EndKey(self, Unit: int = WD_STORY, *args, **kwargs):
+        self.app.recorder.record('Selection.EndKey')
+        document = self._active()
+        self.position = len(document.text) - 1
+        self.column = None
+
+    @property
+    def ParagraphFormat(self) -> FakeParagraphFormat:
+        self.app.recorder.record('Selection.ParagraphFormat')
+        return FakeParagraphFormat(self)
+
+    def TypeParagraph(self):
+        self.app.recorder.record('Selection.TypeParagraph')
+        document = self._active()
+        document.replace(self.position, self.position, PARAGRAPH_MARK)
+        self.position += 1
+
+    @property
+    def Paragraphs(self) -> FakeParagraphs:
+        self.app.recorder.record('Selection.Paragraphs')
+        document = self._active()
+        return FakeParagraphs(document, self.position, self.position)
+
+    @property
+    def Range(self) -> FakeRange:
+        self.app.recorder.record('Selection.Range')
+        return FakeRange(self._active(), self.position, self.position)
@@ -2,170 +2,316 @@
 
 import re
 import logging
-from typing import TYPE_CHECKING
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .images import Image, ImageCache, ImageInfo, get_image_cache, resolve_image_path
+from .ir import DocumentIR, pair_blocks
+from .tables import Table
+from .tokenizer import parse_line, tokenize
 
 if TYPE_CHECKING:
+    from .backends import DocumentBackend
+    from .tokenizer import Block
     from .style_manager import StyleManager
 
+# Single left-to-right scan for inline markers, most specific first
+INLINE_PATTERN = re.compile(
+    r'\*{3}(?P<bold_italic>[^*]+?)\*{3}'
+    r'|\*{2}(?P<bold>[^*]+?)\*{2}'
+    r'|\*(?P<italic>[^*]+?)\*'
+    r'|`(?P<code>[^`]+?)`'
+)
+
 class TextFormatter:
     """Handles text formatting and markdown processing"""
-    
-    def __init__(self):
-        self.patterns = [
-            (r'^(#{1,9})\s+(.+?)(?:\s*>>.*)?$', 'heading'),    # Headers with optional metadata
-            (r'^\s*[-*+]\s+(.+)$', 'bullet'),                  # Bullet points
-            (r'^\s*\d+\.\s+(.+)$', 'numbered'),                # Numbered lists
-            (r'^>\s*(.+)$', 'blockquote'),                     # Blockquotes
-            (r'^```.*\n([\s\S]*?)\n```$', 'code'),            # Code blocks
-            (r'^(.+)$', 'body')                                # Default body text
-        ]
 
-    def add_paragraph(self, doc, text: str, style_type: str, style_manager: 'StyleManager'):
+    def __init__(self, image_cache: Optional[ImageCache] = None):
+        """
+        Args:
+            image_cache: Probes image files, defaults to the process-wide get_image_cache()
+        """
+        # Directory of the markdown being converted, relative image paths start here
+        self.base_dir: Optional[str] = None
+        self.image_cache = image_cache
+
+    def images(self) -> ImageCache:
+        if self.image_cache is None:
+            self.image_cache = get_image_cache()
+        return self.image_cache
+    
+    def add_paragraph(self, backend: 'DocumentBackend', text: str, style_type: str, style_manager: 'StyleManager'):
         """Add a new paragraph with proper formatting"""
         try:
-            # Get the selection object
-            selection = doc.Application.Selection
-            
-            # Move to the end of the document
-            selection.EndKey(Unit=6)  # 6 = wdStory
-            
-            # Add a new paragraph
-            selection.TypeParagraph()
-            
-            # Get the newly created paragraph
-            paragraph = selection.Paragraphs.Item(selection.Paragraphs.Count)
-            
-            # Set the text
-            paragraph.Range.Text = text.strip()
+            # Code blocks keep their markers, everything else loses them
+            if style_type == 'code':
+                clean_text, spans = text.strip('\n'), []
+            else:
+                clean_text, spans = self.parse_inline(text)
+
+            paragraph = backend.add_paragraph(clean_text)
             
             # Let StyleManager handle all style applications
-            style_manager.apply_style(doc, paragraph, style_type)
+            style_manager.apply_style(backend, paragraph, style_type)
             
             # Apply character formatting for special text (bold, italic, etc.)
-            self.apply_character_formatting(paragraph.Range, text)
+            self.apply_character_formatting(backend, paragraph, spans)
             
-            logging.debug(f"Added paragraph with style {style_type}: {text[:50]}...")
+            logging.debug("Added paragraph with style %s: %.50s...", style_type, text)
             
         except Exception as e:
             logging.error(f"Failed to add paragraph: {str(e)}")
             raise
 
-    def process_content(self, doc, content: str, style_manager: 'StyleManager'):
+    def process_content(self, backend: 'DocumentBackend', content: str, style_manager: 'StyleManager'):
         """Process markdown content and apply formatting"""
+        self.process_lines(backend, content.splitlines(), style_manager)
+
+    def process_lines(self, backend: 'DocumentBackend', lines: Iterable[str], style_manager: 'StyleManager'):
+        """
+        Process markdown source lines and apply formatting
+        Args:
+            backend: Backend receiving the paragraphs
+            lines: Markdown source lines, e.g. an open file
+            style_manager: StyleManager resolving style names
+        """
         try:
             # Clear any existing content
-            doc.Content.Delete()
-            
-            # Split content into lines
-            lines = content.split('\n')
-            in_code_block = False
-            code_block_content = []
-            
-            for line in lines:
-                if line.strip().startswith('```'):
-                    if in_code_block:
-                        # End code block
-                        if code_block_content:
-                            self.add_paragraph(doc, '\n'.join(code_block_content), 'code', style_manager)
-                        code_block_content = []
-                    in_code_block = not in_code_block
-                    continue
-
-                if in_code_block:
-                    code_block_content.append(line)
-                    continue
-
-                if line.strip():  # Only process non-empty lines
-                    self.process_line(doc, line, style_manager)
+            backend.clear()
+
+            if backend.supports_batch:
+                backend.write_paragraphs(self.build_block_paragraphs(backend, tokenize(lines), style_manager))
+                return
+
+            for block, probe in self.images().prefetch(tokenize(lines), self.base_dir):
+                if block.kind == 'heading':
+                    style_manager.current_level = min(block.level, 9)
+                if block.kind == 'table':
+                    backend.add_table(self.build_table(backend, block, style_manager))
+                elif block.kind == 'image':
+                    image = self.build_image(backend, block, style_manager, probe)
+                    if isinstance(image, Image):
+                        backend.add_image(image)
+                    else:
+                        self.add_paragraph(backend, image[0], 'body', style_manager)
+                else:
+                    self.add_paragraph(backend, block.text, block.kind, style_manager)
 
         except Exception as e:
             logging.error(f"Failed to process content: {str(e)}")
             raise
 
-    def process_line(self, doc, line: str, style_manager: 'StyleManager'):
-        """Process a single line of markdown"""
+    def stream_lines(self, backend: 'DocumentBackend', lines: Iterable[str],
+                     style_manager: 'StyleManager', output_path: str):
+        """
+        Convert markdown source lines and save, one block at a time
+        Lines flow through the tokenizer into the backend as they are read,
+        so memory use does not grow with the size of the document.
+        Args:
+            backend: Backend receiving the paragraphs, see DocumentBackend.stream_paragraphs
+            lines: Markdown source lines, e.g. an open file
+            style_manager: StyleManager resolving style names
+            output_path: Where to save the document
+        """
         try:
-            line = line.strip()
-            if not line:
-                return
+            backend.clear()
+            backend.stream_paragraphs(
+                output_path, self.iter_block_paragraphs(backend, tokenize(lines), style_manager)
+            )
+        except Exception as e:
+            logging.error(f"Failed to stream content: {str(e)}")
+            raise
 
-            for pattern, style_type in self.patterns:
-                match = re.match(pattern, line)
-                if match:
-                    if style_type == 'heading':
-                        # Update heading level and get text
-                        level = len(match.group(1))
-                        style_manager.current_level = min(level, 9)
-                        text = match.group(2)
-                    elif style_type == 'blockquote':
-                        # Extract blockquote text without the '>' prefix
-                        text = match.group(1).strip()
-                    else:
-                        text = match.group(1) if len(match.groups()) > 0 else line
+    def build_block_paragraphs(self, backend: 'DocumentBackend', blocks: Iterable['Block'],
+                               style_manager: 'StyleManager') -> List[Tuple[str, str, List[Tuple[int, int, str]]]]:
+        """
+        Turn tokenized blocks into paragraphs ready for write_paragraphs
+        Args:
+            backend: Backend the styles are resolved against
+            blocks: Blocks from the tokenizer
+            style_manager: StyleManager resolving style names, its current_level
+                           is updated by headings
+        Returns:
+            List of (text, style_name, spans) with style fallbacks already applied,
+            a Table for each table block and an Image for each image block
+        """
+        return list(self.iter_block_paragraphs(backend, blocks, style_manager))
+
+    def build_ir(self, backend: 'DocumentBackend', blocks: Iterable['Block'],
+                 style_manager: 'StyleManager') -> DocumentIR:
+        """
+        Turn tokenized blocks into a compact DocumentIR
+        Args:
+            backend: Backend the styles are resolved against
+            blocks: Blocks from the tokenizer
+            style_manager: StyleManager resolving style names, its current_level
+                           is updated by headings
+        Returns:
+            DocumentIR holding the same stream build_block_paragraphs returns,
+            with each entry's block kind and heading level
+        """
+        document = DocumentIR()
+        stream = pair_blocks(blocks, lambda tapped: self.iter_block_paragraphs(backend, tapped, style_manager))
+        for block, item in stream:
+            document.append_item(block.kind, style_manager.current_level, item)
+        logging.debug("Built IR with %d entries", len(document))
+        return document
 
-                    # Add the paragraph with proper formatting
-                    self.add_paragraph(doc, text, style_type, style_manager)
-                    break
+    def iter_block_paragraphs(self, backend: 'DocumentBackend', blocks: Iterable['Block'],
+                              style_manager: 'StyleManager') -> Iterator[Tuple[str, str, List[Tuple[int, int, str]]]]:
+        """
+        Lazy form of build_block_paragraphs, yielding each paragraph as its block arrives
+        Table blocks come out as one Table each rather than a paragraph, image
+        blocks as one Image each; image files are probed ahead, in parallel.
+        """
+        resolved = {}  # Each (style_type, level) is looked up once
+        for block, probe in self.images().prefetch(blocks, self.base_dir):
+            style_type, text = block.kind, block.text
+            if style_type == 'heading':
+                style_manager.current_level = min(block.level, 9)
+            key = (style_type, style_manager.current_level)
+            if style_type == 'table':
+                if key not in resolved:
+                    resolved[key] = (style_manager.lookup_table_style(backend),
+                                     style_manager.lookup_style(backend, 'body'))
+                yield self.build_table(backend, block, style_manager, *resolved[key])
+                continue
+            if style_type == 'image':
+                if key not in resolved:
+                    resolved[key] = style_manager.lookup_style(backend, 'body')
+                yield self.build_image(backend, block, style_manager, probe, resolved[key])
+                continue
+            if key not in resolved:
+                resolved[key] = style_manager.lookup_style(backend, style_type)
+
+            if style_type == 'code':
+                clean_text, spans = text.strip('\n'), []
+            else:
+                clean_text, spans = self.parse_inline(text)
+            yield clean_text, resolved[key], spans
+
+    def build_table(self, backend: 'DocumentBackend', block: 'Block', style_manager: 'StyleManager',
+                    style_name: Optional[str] = None, paragraph_style: Optional[str] = None) -> Table:
+        """
+        Turn a table block into a Table with inline formatting parsed per cell
+        Args:
+            backend: Backend the styles are resolved against
+            block: Block of kind 'table'
+            style_manager: StyleManager resolving the styles
+            style_name: Table style if already resolved
+            paragraph_style: Cell paragraph style if already resolved
+        Returns:
+            Table with the first row as its header
+        """
+        if paragraph_style is None:
+            style_name = style_manager.lookup_table_style(backend)
+            paragraph_style = style_manager.lookup_style(backend, 'body')
+        rows = [[self.parse_inline(cell) for cell in row] for row in block.rows]
+        return Table(rows, block.alignments, style_name, paragraph_style)
+
+    def build_image(self, backend: 'DocumentBackend', block: 'Block', style_manager: 'StyleManager',
+                    probe: Optional['Future[ImageInfo]'] = None,
+                    style_name: Optional[str] = None) -> Union[Image, Tuple[str, str, List[Tuple[int, int, str]]]]:
+        """
+        Turn an image block into an Image in a body paragraph
+        Args:
+            backend: Backend the styles are resolved against
+            block: Block of kind 'image'
+            style_manager: StyleManager resolving the paragraph style
+            probe: Probe already started by ImageCache.prefetch
+            style_name: Paragraph style if already resolved
+        Returns:
+            Image, or a (text, style_name, spans) paragraph holding the alt text
+            when the file is missing or not a supported image
+        """
+        if style_name is None:
+            style_name = style_manager.lookup_style(backend, 'body')
+        path = resolve_image_path(block.src, self.base_dir)
+        try:
+            info = probe.result() if probe is not None else self.images().probe(path)
+            return Image(path, info, block.text, style_name)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Skipping image {block.src} on line {block.line}: {str(e)}")
+            return block.text or block.src, style_name, []
+
+    def process_line(self, backend: 'DocumentBackend', line: str, style_manager: 'StyleManager'):
+        """Process a single line of markdown"""
+        try:
+            block = self.parse_line(line, style_manager)
+            if block:
+                style_type, text = block
+                # Add the paragraph with proper formatting
+                self.add_paragraph(backend, text, style_type, style_manager)
 
         except Exception as e:
             logging.error(f"Failed to process line: {str(e)}")
             raise
 
-def apply_character_formatting(self, range_object, text: str):
-    """Apply character-level formatting with proper order and nesting"""
-    try:
-        # Define formatting patterns in order of specificity with more strict matching
-        format_patterns = [
-            (r'\*{3}([^*]+?)\*{3}', 'bold-italic'),   # Exactly three asterisks for bold-italic
-            (r'\*{2}([^*]+?)\*{2}', 'bold'),          # Exactly two asterisks for bold
-            (r'\*{1}([^*]+?)\*{1}', 'italic'),        # Exactly one asterisk for italic
-            (r'`([^`]+?)`', 'code')                    # Code remains the same
-        ]
+    def parse_line(self, line: str, style_manager: 'StyleManager') -> Optional[Tuple[str, str]]:
+        """
+        Classify a single line of markdown
+        Args:
+            line: Markdown source line
+            style_manager: StyleManager to update when the line is a heading
+        Returns:
+            (style_type, text) or None for blank lines
+        """
+        block = parse_line(line)
+        if block is None:
+            return None
+        if block.kind == 'heading':
+            style_manager.current_level = min(block.level, 9)
+        return block.kind, block.text
 
-        # First set the plain text
-        clean_text = text
-        for pattern, _ in format_patterns:
-            clean_text = re.sub(pattern, r'\1', clean_text)
-        range_object.Text = clean_text.strip()
-
-        # Then apply formatting with strict pattern matching
-        for pattern, format_type in format_patterns:
-            matches = list(re.finditer(pattern, text))
-            for match in matches:
-                try:
-                    content = match.group(1)
-                    # Find the content in the clean text
-                    start_pos = range_object.Text.find(content)
-                    if start_pos != -1:
-                        # Create a range for this match
-                        format_range = range_object.Document.Range(
-                            range_object.Start + start_pos,
-                            range_object.Start + start_pos + len(content)
-                        )
-
-                        # Apply formatting based on exact pattern match
-                        if format_type == 'bold-italic' and text.count('*', match.start(), match.end()) == 6:  # Ensure exactly 6 asterisks
-                            format_range.Font.Bold = -1
-                            format_range.Font.Italic = -1
-                            logging.debug(f"Applied bold-italic to: {content}")
-                        elif format_type == 'bold' and text.count('*', match.start(), match.end()) == 4:  # Ensure exactly 4 asterisks
-                            format_range.Font.Bold = -1
-                            logging.debug(f"Applied bold to: {content}")
-                        elif format_type == 'italic' and text.count('*', match.start(), match.end()) == 2:  # Ensure exactly 2 asterisks
-                            format_range.Font.Italic = -1
-                            logging.debug(f"Applied italic to: {content}")
-                        elif format_type == 'code':
-                            format_range.Font.Name = "Consolas"
-                            format_range.Font.Size = 9
-                            format_range.Font.Color = 0x505050  # Dark gray
-                            format_range.Shading.BackgroundPatternColor = 0xF0F0F0  # Light gray
-                            logging.debug(f"Applied code formatting to: {content}")
-
-                except Exception as e:
-                    logging.warning(f"Failed to apply {format_type} formatting to '{content}': {str(e)}")
+    def parse_inline(self, text: str) -> Tuple[str, List[Tuple[int, int, str]]]:
+        """
+        Strip inline markers and locate the formatted spans
+        Args:
+            text: Paragraph text with **bold**, *italic*, ***bold-italic*** and `code` markers
+        Returns:
+            (clean_text, spans) where each span is (start, end, format_type) in clean_text
+        """
+        clean_parts = []
+        spans = []
+        position = 0
+        last_end = 0
 
-        except Exception as e:
-            logging.error(f"Failed to apply character formatting: {str(e)}")
-            logging.debug(f"Original text: {text}")
-            # Ensure the text is at least visible
-            range_object.Text = text.replace('*', '').replace('`', '')
\ No newline at end of file
+        for match in INLINE_PATTERN.finditer(text):
+            plain = text[last_end:match.start()]
+            clean_parts.append(plain)
+            position += len(plain)
+
+            format_type = match.lastgroup.replace('_', '-')
+            content = match.group(match.lastgroup)
+            clean_parts.append(content)
+            spans.append((position, position + len(content), format_type))
+            position += len(content)
+            last_end = match.end()
+
+        clean_parts.append(text[last_end:])
+        clean_text = ''.join(clean_parts)
+
+        # Match the whitespace handling of add_paragraph, which strips the text
+        offset = len(clean_text) - len(clean_text.lstrip())
+        clean_text = clean_text.strip()
+        spans = [
+            (max(start - offset, 0), min(end - offset, len(clean_text)), format_type)
+            for start, end, format_type in spans
+        ]
+        return clean_text, [span for span in spans if span[0] < span[1]]
+
+    def apply_character_formatting(self, backend: 'DocumentBackend', paragraph,
+                                   spans: List[Tuple[int, int, str]]):
+        """
+        Apply character-level formatting to a paragraph
+        Args:
+            backend: Backend that created the paragraph
+            paragraph: Paragraph handle from backend.add_paragraph
+            spans: (start, end, format_type) ranges from parse_inline
+        """
+        for start, end, format_type in spans:
+            try:
+                backend.format_span(paragraph, start, end, format_type)
+                logging.debug("Applied %s to characters %d-%d", format_type, start, end)
+            except Exception as e:
+                logging.warning(f"Failed to apply {format_type} formatting to characters {start}-{end}: {str(e)}")
@@ -0,0 +1,290 @@
+# src/images.py
+
+import os
+import json
+import struct
+import hashlib
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Tuple, TYPE_CHECKING
+
+from .utils import get_cache_dir
+
+if TYPE_CHECKING:
+    from .tokenizer import Block
+
+# Image formats Word embeds, by the format name probe_image returns
+FORMATS = {
+    'png': ('png', 'image/png'),
+    'jpeg': ('jpeg', 'image/jpeg'),
+    'gif': ('gif', 'image/gif'),
+    'bmp': ('bmp', 'image/bmp'),
+}
+
+# DrawingML lengths: English Metric Units per pixel at 96 dpi, per point and per twip
+EMU_PER_PIXEL = 9525
+EMU_PER_POINT = 12700
+EMU_PER_TWIP = 635
+
+# JPEG start-of-frame markers, which carry the image size
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Image blocks read ahead of the one being emitted, so their files are probed in parallel
+PREFETCH_BLOCKS = 64
+
+# Version of the on-disk probe entries, bump when ImageInfo changes
+PROBE_VERSION = 1
+
+
+def probe_image(data: bytes) -> Tuple[str, int, int]:
+    """
+    Format and pixel size of an image from its header
+    Args:
+        data: Image file contents
+    Returns:
+        (format, width, height) with format a key of FORMATS
+    Raises:
+        ValueError: Unsupported format or truncated header
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and data[12:16] == b'IHDR':
+        width, height = struct.unpack('>II', data[16:24])
+        return 'png', width, height
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        width, height = struct.unpack('<HH', data[6:10])
+        return 'gif', width, height
+    if data[:2] == b'BM' and len(data) >= 26:
+        width, height = struct.unpack('<ii', data[18:26])
+        return 'bmp', abs(width), abs(height)
+    if data[:2] == b'\xff\xd8':
+        position = 2
+        while position + 9 < len(data):
+            if data[position] != 0xFF:
+                position += 1  # Padding between segments
+                continue
+            marker = data[position + 1]
+            if marker in JPEG_SOF_MARKERS:
+                height, width = struct.unpack('>HH', data[position + 5:position + 9])
+                return 'jpeg', width, height
+            if marker == 0xFF or 0xD0 <= marker <= 0xD9:
+                position += 1 if marker == 0xFF else 2  # Fill byte or marker without a length
+                continue
+            position += 2 + struct.unpack('>H', data[position + 2:position + 4])[0]
+        raise ValueError("JPEG has no frame header")
+    raise ValueError("Unsupported image format")
+
+
+class ImageInfo:
+    """Content hash, format and pixel size of an image file"""
+
+    def __init__(self, sha256: str, format: str, width: int, height: int):
+        self.sha256 = sha256
+        self.format = format
+        self.width = width
+        self.height = height
+
+    @property
+    def extension(self) -> str:
+        return FORMATS[self.format][0]
+
+    @property
+    def content_type(self) -> str:
+        return FORMATS[self.format][1]
+
+    def to_dict(self) -> dict:
+        return {'sha256': self.sha256, 'format': self.format, 'width': self.width, 'height': self.height}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ImageInfo':
+        return cls(data['sha256'], data['format'], int(data['width']), int(data['height']))
+
+
+class Image:
+    """
+    An image ready to emit, with its file probed and its paragraph style resolved
+    Images travel through the same stream as (text, style_name, spans)
+    paragraphs. The content hash names the media part, so a package
+    stores each distinct image once however often it is referenced.
+    """
+
+    def __init__(self, path: str, info: ImageInfo, alt: str = '', style_name: str = 'Normal'):
+        """
+        Args:
+            path: Absolute path of the image file
+            info: Probed hash, format and size
+            alt: Alternative text
+            style_name: Style of the paragraph holding the image
+        """
+        self.path = path
+        self.info = info
+        self.alt = alt
+        self.style_name = style_name
+
+    @property
+    def media_name(self) -> str:
+        """File name of the image inside word/media"""
+        return f'image_{self.info.sha256[:16]}.{self.info.extension}'
+
+    @property
+    def relationship_id(self) -> str:
+        """Relationship ID of the image, the same for every reference to the same content"""
+        return f'rIdImg{self.info.sha256[:16]}'
+
+    def fit(self, max_width: int) -> Tuple[int, int]:
+        """
+        Display size in EMU, scaled down to max_width keeping the aspect ratio
+        Args:
+            max_width: Width available in EMU, e.g. the page's text width
+        Returns:
+            (width, height) in EMU
+        """
+        width = max(self.info.width, 1) * EMU_PER_PIXEL
+        height = max(self.info.height, 1) * EMU_PER_PIXEL
+        if width > max_width > 0:
+            height = height * max_width // width
+            width = max_width
+        return width, max(height, 1)
+
+    def __repr__(self) -> str:
+        return f'Image({self.path!r}, {self.info.width}x{self.info.height} {self.info.format})'
+
+
+def resolve_image_path(src: str, base_dir: Optional[str]) -> str:
+    """Absolute path of an image reference, relative ones taken from the markdown file's directory"""
+    if src.startswith('file://'):
+        src = src[len('file://'):]
+    src = os.path.expanduser(src)
+    if not os.path.isabs(src):
+        src = os.path.join(base_dir or os.getcwd(), src)
+    return os.path.normpath(src)
+
+
+class ImageCache:
+    """
+    Probes image files in parallel, caching the results in memory and on disk
+    An unchanged file (same path, mtime and size) is never read twice: the
+    first probe stores its content hash, format and size under a key made
+    from that metadata. Probes of files with the same content share one
+    ImageInfo, so every document of a batch embeds them under the same name.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: int = 4):
+        """
+        Args:
+            cache_dir: Directory of the on-disk entries, defaults to get_cache_dir('images')
+            max_workers: Threads probing files in parallel
+        """
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.entries: Dict[Tuple[str, int, int], ImageInfo] = {}
+        self.by_hash: Dict[str, ImageInfo] = {}
+        self.lock = threading.Lock()
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.executor_pid: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, key: Tuple[str, int, int]) -> str:
+        cache_dir = self.cache_dir or get_cache_dir('images')
+        os.makedirs(cache_dir, exist_ok=True)
+        name = hashlib.sha256(f'{key[0]}\0{key[1]}\0{key[2]}'.encode('utf-8')).hexdigest()
+        return os.path.join(cache_dir, f'{name}.json')
+
+    def probe(self, path: str) -> ImageInfo:
+        """
+        Content hash, format and size of an image file
+        Raises:
+            OSError: The file cannot be read
+            ValueError: The file is not a supported image
+        """
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            info = self.entries.get(key)
+            if info is not None:
+                self.hits += 1
+                return info
+
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as file:
+                cached = json.load(file)
+            if cached.get('version') != PROBE_VERSION:
+                raise ValueError("Stale probe entry")
+            info = ImageInfo.from_dict(cached)
+            hit = True
+        except (OSError, ValueError, KeyError):
+            with open(path, 'rb') as file:
+                data = file.read()
+            info = ImageInfo(hashlib.sha256(data).hexdigest(), *probe_image(data))
+            hit = False
+            # Write atomically so concurrent conversions never read a partial entry
+            tmp_path = f'{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as file:
+                    json.dump(dict(info.to_dict(), version=PROBE_VERSION), file)
+                os.replace(tmp_path, entry_path)
+            except OSError as e:
+                logging.warning(f"Failed to save image probe cache: {str(e)}")
+
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            info = self.by_hash.setdefault(info.sha256, info)
+            self.entries[key] = info
+        return info
+
+    def submit(self, path: str) -> 'Future[ImageInfo]':
+        """Probe a file on the worker threads"""
+        with self.lock:
+            # A forked child inherits the pool but not its threads
+            if self.executor is None or self.executor_pid != os.getpid():
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix='image_probe')
+                self.executor_pid = os.getpid()
+        return self.executor.submit(self.probe, path)
+
+    def prefetch(self, blocks: Iterable['Block'], base_dir: Optional[str],
+                 lookahead: int = PREFETCH_BLOCKS) -> Iterator[Tuple['Block', Optional['Future[ImageInfo]']]]:
+        """
+        Pair blocks with the probes of their images, started ahead of use
+        Up to lookahead blocks are read in advance, so the files of nearby
+        images are probed in parallel while earlier blocks are emitted.
+        Args:
+            blocks: Blocks from the tokenizer
+            base_dir: Directory relative image paths are resolved against
+            lookahead: Blocks buffered ahead of the one returned
+        Returns:
+            Iterator of (block, future) with future None for non-image blocks
+        """
+        pending: deque = deque()
+        for block in blocks:
+            if block.kind == 'image':
+                pending.append((block, self.submit(resolve_image_path(block.src, base_dir))))
+            else:
+                pending.append((block, None))
+            if len(pending) > lookahead:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.by_hash.clear()
+
+
+_default_cache: Optional[ImageCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """Process-wide image cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ImageCache()
+        return _default_cache
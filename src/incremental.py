@@ -0,0 +1,160 @@
+# src/incremental.py
+
+import os
+import json
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from .backends import DocumentBackend, OoxmlBackend
+from .converter import MarkdownToWordConverter
+from .tracing import Tracer
+from .tokenizer import FENCE_PATTERN, HEADING_PATTERN, Block, tokenize
+from .utils import get_cache_dir
+
+# Bump when rendering changes so stale fragments are never reused
+RENDER_VERSION = 2
+
+
+class Section:
+    """Source lines from one heading up to the next, plus the style context they render in"""
+
+    def __init__(self, lines: List[str], level: int):
+        self.lines = lines
+        self.level = level  # Heading level of the section, 0 before the first heading
+
+    def content_hash(self) -> str:
+        """Hash of the section's source, ignoring where in the file it sits"""
+        return hashlib.sha256('\n'.join(self.lines).encode('utf-8')).hexdigest()
+
+    def blocks(self) -> List[Block]:
+        """Tokenize the section on its own"""
+        return list(tokenize(self.lines))
+
+
+def split_sections(lines: Iterable[str], max_level: int = 9) -> List[Section]:
+    """
+    Split markdown source at every heading outside fenced code
+    Only fences and headings are recognised, so unchanged sections never
+    need to be tokenized.
+    Args:
+        lines: Markdown source lines
+        max_level: Split only at headings of this level or above, e.g. 1 for chapters
+    Returns:
+        Sections in document order; lines before the first heading form a
+        section of their own at level 0
+    """
+    sections: List[Section] = []
+    current: List[str] = []
+    level = 0
+    fence = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        stripped = line.strip()
+        if fence is not None:
+            if stripped.startswith(fence):
+                fence = None
+        else:
+            match = FENCE_PATTERN.match(stripped)
+            if match:
+                fence = match.group(0)
+            else:
+                match = HEADING_PATTERN.match(stripped)
+                if match and len(match.group(1)) <= max_level:
+                    if current:
+                        sections.append(Section(current, level))
+                        current = []
+                    level = len(match.group(1))
+        current.append(line)
+    if current:
+        sections.append(Section(current, level))
+    return sections
+
+
+class IncrementalConverter(MarkdownToWordConverter):
+    """
+    Converts with the ooxml backend, re-rendering only sections that changed
+    Rendered <w:p> fragments are cached per markdown file. A section is
+    re-rendered when its content, the template, the style context it starts
+    in or the renderer version changes; all other sections are spliced in
+    from the cache.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, tracer: Optional[Tracer] = None,
+                 backend_options: Optional[Dict[str, Any]] = None):
+        # Fragments are spliced into an in-memory body, so streaming stays off
+        super().__init__(backend='ooxml', backend_options=dict(backend_options or {}, streaming=False),
+                         tracer=tracer)
+        self.cache_dir = cache_dir
+        self.last_stats: Dict[str, int] = {}
+
+    def cache_path(self, markdown_path: str, template_hash: str) -> str:
+        """Cache file holding the fragments of one markdown file"""
+        key = hashlib.sha256(f"{os.path.abspath(markdown_path)}\0{template_hash}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir or get_cache_dir('sections'), f"{key}.json")
+
+    def load_fragments(self, cache_path: str) -> Dict[str, str]:
+        """Load cached fragments, or nothing if the cache is missing or stale"""
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                cached = json.load(file)
+            if cached.get('version') == RENDER_VERSION:
+                return cached['sections']
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def save_fragments(self, cache_path: str, fragments: Dict[str, str]):
+        """Write the fragments of the current run, dropping sections that no longer exist"""
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({'version': RENDER_VERSION, 'sections': fragments}, file)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logging.warning(f"Failed to save section cache: {str(e)}")
+
+    def process_markdown_file(self, backend: DocumentBackend, markdown_path: str):
+        """Render changed sections and splice in the cached rest"""
+        if not isinstance(backend, OoxmlBackend):
+            raise TypeError("Incremental conversion requires the ooxml backend")
+        try:
+            with open(markdown_path, 'r', encoding='utf-8') as file:
+                sections = split_sections(file)
+            if not any(line.strip() for section in sections for line in section.lines):
+                raise ValueError("Markdown file is empty")
+
+            self.text_formatter.base_dir = os.path.dirname(os.path.abspath(markdown_path))
+            document = backend.document
+            template_hash = document.template.sha256
+            style_context = json.dumps(self.style_manager.style_types, sort_keys=True)
+            cache_path = self.cache_path(markdown_path, template_hash)
+            cached = self.load_fragments(cache_path)
+
+            fragments = {}
+            rendered = 0
+            for section in sections:
+                key = hashlib.sha256(
+                    f"{section.content_hash()}\0{section.level}\0{style_context}".encode('utf-8')
+                ).hexdigest()
+                fragment = fragments.get(key) or cached.get(key)
+                if fragment is None:
+                    self.style_manager.current_level = section.level
+                    paragraphs = self.text_formatter.build_block_paragraphs(
+                        backend, section.blocks(), self.style_manager
+                    )
+                    fragment = ''.join(document.render(paragraph) for paragraph in paragraphs)
+                    rendered += 1
+                # Sections with images are always re-rendered, which registers their media parts
+                # and picks up image files changed on disk
+                if not document.references_media(fragment):
+                    fragments[key] = fragment
+                document.append_xml(fragment)
+
+            self.save_fragments(cache_path, fragments)
+            self.last_stats = {'sections': len(sections), 'rendered': rendered, 'reused': len(sections) - rendered}
+            logging.info(f"Rendered {rendered} of {len(sections)} sections, reused the rest from cache")
+
+        except Exception as e:
+            logging.error(f"Failed to process markdown file: {str(e)}")
+            raise
@@ -0,0 +1,263 @@
+# src/ir.py
+
+import os
+import sys
+import json
+import struct
+from array import array
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+from .images import Image, ImageInfo
+from .tables import Table
+
+Spans = List[Tuple[int, int, str]]
+Item = Union[Table, Image, Tuple[str, str, Spans]]
+
+# Block kinds and span formats as stored in the one-byte columns
+KINDS = ('body', 'heading', 'bullet', 'numbered', 'blockquote', 'code', 'table', 'image')
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+FORMATS = ('bold', 'italic', 'bold-italic', 'code')
+FORMAT_CODES = {format_type: code for code, format_type in enumerate(FORMATS)}
+
+# Serialised layout: header, then the columns, then the text buffer and the metadata as UTF-8
+MAGIC = b'MDIR'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHIIII')  # magic, version, items, span values, buffer bytes, metadata bytes
+
+
+class DocumentIR:
+    """
+    Compact, serialisable form of the paragraph stream a backend consumes
+    One entry per block: its kind, heading level, style and text live in
+    parallel array columns, the texts in one shared buffer and the spans in
+    one flat array of (start, end, format) values. A million paragraphs take
+    a few bytes of columns each plus their text, rather than a tuple, a str
+    and a list of tuples apiece. Tables and images, which are rare, are kept
+    as objects beside the columns.
+
+    Iterating yields (text, style_name, spans) paragraphs, Tables and Images,
+    so a DocumentIR can be passed wherever a paragraph stream is expected.
+    to_bytes gives a stable binary form for on-disk caches, and pickling
+    uses it, so sending a document to another process costs one buffer copy.
+    """
+
+    __slots__ = ('kinds', 'levels', 'styles', 'offsets', 'span_offsets', 'spans',
+                 'style_names', 'style_codes', 'extras', '_parts', '_buffer')
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.levels = array('B')
+        self.styles = array('H')  # Index into style_names
+        self.offsets = array('I', [0])  # Text of entry i is buffer[offsets[i]:offsets[i + 1]]
+        self.span_offsets = array('I', [0])  # Spans of entry i are spans[3 * span_offsets[i]:3 * span_offsets[i + 1]]
+        self.spans = array('I')
+        self.style_names: List[str] = []
+        self.style_codes: Dict[str, int] = {}
+        self.extras: Dict[int, Union[Table, Image]] = {}
+        self._parts: List[str] = []
+        self._buffer = ''
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def buffer(self) -> str:
+        """All entry texts back to back"""
+        if self._parts:
+            self._buffer += ''.join(self._parts)
+            self._parts = []
+        return self._buffer
+
+    def _style_code(self, style_name: str) -> int:
+        code = self.style_codes.get(style_name)
+        if code is None:
+            code = self.style_codes[style_name] = len(self.style_names)
+            self.style_names.append(style_name)
+        return code
+
+    def append(self, kind: str, level: int, text: str, style_name: str, spans: Spans = ()):
+        """
+        Add a paragraph
+        Args:
+            kind: Block kind, one of KINDS
+            level: Heading level the paragraph is under, 0-9
+            text: Plain paragraph text
+            style_name: Resolved paragraph style
+            spans: (start, end, format_type) ranges in text
+        """
+        self.kinds.append(KIND_CODES[kind])
+        self.levels.append(level)
+        self.styles.append(self._style_code(style_name))
+        self._parts.append(text)
+        self.offsets.append(self.offsets[-1] + len(text))
+        for start, end, format_type in spans:
+            self.spans.extend((start, end, FORMAT_CODES[format_type]))
+        self.span_offsets.append(len(self.spans) // 3)
+
+    def append_item(self, kind: str, level: int, item: Item):
+        """Add a paragraph stream item: a (text, style_name, spans) paragraph, a Table or an Image"""
+        if isinstance(item, (Table, Image)):
+            self.extras[len(self.kinds)] = item
+            style_name = item.paragraph_style if isinstance(item, Table) else item.style_name
+            self.append(kind, level, '', style_name)
+        else:
+            self.append(kind, level, *item)
+
+    def extend(self, other: 'DocumentIR'):
+        """Append every entry of another document, e.g. the next chapter"""
+        for index in range(len(other)):
+            self.append_item(other.kind(index), other.levels[index], other[index])
+
+    def kind(self, index: int) -> str:
+        return KINDS[self.kinds[index]]
+
+    def text(self, index: int) -> str:
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    def style_name(self, index: int) -> str:
+        return self.style_names[self.styles[index]]
+
+    def entry_spans(self, index: int) -> Spans:
+        values = self.spans[3 * self.span_offsets[index]:3 * self.span_offsets[index + 1]]
+        return [(values[i], values[i + 1], FORMATS[values[i + 2]]) for i in range(0, len(values), 3)]
+
+    def __getitem__(self, index: int) -> Item:
+        if index < 0:
+            index += len(self)
+        extra = self.extras.get(index)
+        if extra is not None:
+            return extra
+        return self.text(index), self.style_name(index), self.entry_spans(index)
+
+    def __iter__(self) -> Iterator[Item]:
+        buffer = self.buffer
+        offsets, span_offsets, spans, styles = self.offsets, self.span_offsets, self.spans, self.styles
+        for index in range(len(self.kinds)):
+            extra = self.extras.get(index)
+            if extra is not None:
+                yield extra
+                continue
+            first, last = 3 * span_offsets[index], 3 * span_offsets[index + 1]
+            yield (buffer[offsets[index]:offsets[index + 1]], self.style_names[styles[index]],
+                   [(spans[i], spans[i + 1], FORMATS[spans[i + 2]]) for i in range(first, last, 3)])
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, DocumentIR):
+            return NotImplemented
+        return self.to_bytes() == other.to_bytes()
+
+    def __repr__(self) -> str:
+        return f'DocumentIR({len(self)} entries, {len(self.buffer)} characters)'
+
+    # Serialisation
+
+    def to_bytes(self) -> bytes:
+        """
+        Stable binary form: a header, the little-endian columns, the UTF-8 text
+        buffer and a small JSON document holding style names, tables and images
+        """
+        buffer = self.buffer.encode('utf-8')
+        metadata = json.dumps({
+            'styles': self.style_names,
+            'extras': {str(index): _extra_to_dict(extra) for index, extra in self.extras.items()},
+        }, separators=(',', ':')).encode('utf-8')
+        columns = [self.kinds, self.levels, self.styles, self.offsets, self.span_offsets, self.spans]
+        if sys.byteorder == 'big':
+            columns = [_swapped(column) for column in columns]
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, len(self), len(self.spans), len(buffer), len(metadata))
+        return b''.join([header] + [column.tobytes() for column in columns] + [buffer, metadata])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'DocumentIR':
+        """
+        Rebuild a document from to_bytes output
+        Raises:
+            ValueError: Not a serialised DocumentIR, or one of another format version
+        """
+        view = memoryview(data)
+        try:
+            magic, version, count, span_values, buffer_size, metadata_size = HEADER.unpack_from(view)
+        except struct.error:
+            raise ValueError("Truncated document IR")
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a version {FORMAT_VERSION} document IR")
+
+        document = cls()
+        position = HEADER.size
+        for name, typecode, length in (('kinds', 'B', count), ('levels', 'B', count), ('styles', 'H', count),
+                                       ('offsets', 'I', count + 1), ('span_offsets', 'I', count + 1),
+                                       ('spans', 'I', span_values)):
+            column = array(typecode)
+            size = length * column.itemsize
+            column.frombytes(view[position:position + size])
+            if sys.byteorder == 'big':
+                column.byteswap()
+            setattr(document, name, column)
+            position += size
+        document._buffer = bytes(view[position:position + buffer_size]).decode('utf-8')
+        position += buffer_size
+        if position + metadata_size != len(view):
+            raise ValueError("Truncated document IR")
+        metadata = json.loads(bytes(view[position:]).decode('utf-8'))
+        document.style_names = metadata['styles']
+        document.style_codes = {name: code for code, name in enumerate(document.style_names)}
+        document.extras = {int(index): _extra_from_dict(extra) for index, extra in metadata['extras'].items()}
+        return document
+
+    def save(self, path: str):
+        """Write to_bytes to a file atomically"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'DocumentIR':
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
+
+    def __reduce__(self):
+        return DocumentIR.from_bytes, (self.to_bytes(),)
+
+
+def _swapped(column: array) -> array:
+    column = array(column.typecode, column)
+    column.byteswap()
+    return column
+
+
+def _extra_to_dict(extra: Union[Table, Image]) -> Dict[str, Any]:
+    if isinstance(extra, Table):
+        return {'table': [[[text, [list(span) for span in spans]] for text, spans in row] for row in extra.rows],
+                'alignments': extra.alignments, 'style_name': extra.style_name,
+                'paragraph_style': extra.paragraph_style, 'header_rows': extra.header_rows}
+    return {'image': extra.path, 'info': extra.info.to_dict(), 'alt': extra.alt, 'style_name': extra.style_name}
+
+
+def _extra_from_dict(data: Dict[str, Any]) -> Union[Table, Image]:
+    if 'table' in data:
+        rows = [[(text, [tuple(span) for span in spans]) for text, spans in row] for row in data['table']]
+        return Table(rows, data['alignments'], data['style_name'], data['paragraph_style'], data['header_rows'])
+    return Image(data['image'], ImageInfo.from_dict(data['info']), data['alt'], data['style_name'])
+
+
+def pair_blocks(blocks: Iterable[Any],
+                consume: Callable[[Iterable[Any]], Iterable[Item]]) -> Iterator[Tuple[Any, Item]]:
+    """
+    Pair each block with the item a one-item-per-block stage produced from it
+    Args:
+        blocks: Blocks going into the stage
+        consume: Function turning an iterable of blocks into an iterator of items
+    Returns:
+        Iterator of (block, item), even when the stage reads blocks ahead
+    """
+    seen: deque = deque()
+
+    def tap() -> Iterator[Any]:
+        for block in blocks:
+            seen.append(block)
+            yield block
+
+    for item in consume(tap()):
+        yield seen.popleft(), item
@@ -0,0 +1,138 @@
+# src/journal.py
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .utils import file_sha256
+
+if TYPE_CHECKING:
+    from .batch import BatchJob, BatchResult
+
+
+def input_state(markdown_path: str) -> Tuple[int, int]:
+    """(size, mtime in ns) of an input, which must match for a journaled result to be reused"""
+    stat = os.stat(markdown_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def settings_fingerprint(template_path: str, backend: Any, backend_options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Hex SHA-256 of the run settings a journaled result was converted with
+    Args:
+        template_path: Template file, hashed by content
+        backend: Backend name or class
+        backend_options: Keyword arguments for the backend; objects such as pools count by type only
+    """
+    settings = {
+        'template': file_sha256(template_path),
+        'backend': getattr(backend, '__qualname__', backend),
+        'options': backend_options or {},
+    }
+    encoded = json.dumps(settings, sort_keys=True, default=lambda value: type(value).__name__)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class BatchJournal:
+    """
+    Append-only JSON Lines record of finished batch jobs
+    Every result is written as one line and flushed to disk before the next
+    job is reported, so a run that is interrupted, or whose machine goes
+    down, can be resumed without converting finished files again. A torn
+    last line from a crash is ignored on loading. Later lines for the same
+    input replace earlier ones. A result is only reused by a run with the
+    same settings (see settings_fingerprint) and output directory.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Journal file, created on the first record
+        """
+        self.path = os.path.abspath(path)
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = self.load()
+        self.file = None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Latest record of every input in the journal file"""
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                for number, line in enumerate(file, 1):
+                    try:
+                        entry = json.loads(line)
+                        entries[entry['input']] = entry
+                    except (ValueError, KeyError, TypeError):
+                        logging.warning(f"Ignoring unreadable line {number} of journal {self.path}")
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def is_done(self, job: 'BatchJob', settings: str) -> bool:
+        """
+        Whether job converted successfully before, with the same settings and output
+        directory, and neither its input nor its output changed since
+        """
+        entry = self.entries.get(job.markdown_path)
+        if entry is None or entry.get('status') != 'ok':
+            return False
+        if entry.get('settings') != settings or entry.get('output_dir') != os.path.abspath(job.output_dir):
+            return False
+        try:
+            return list(input_state(job.markdown_path)) == entry.get('state') and os.path.isfile(entry['output'])
+        except (OSError, KeyError, TypeError):
+            return False
+
+    def remaining(self, jobs: List['BatchJob'], settings: str) -> Tuple[List['BatchJob'], int]:
+        """
+        Jobs still to run when resuming
+        Args:
+            jobs: Jobs of the resumed run
+            settings: settings_fingerprint of the resumed run
+        Returns:
+            (jobs not done yet, number of jobs skipped)
+        """
+        remaining = [job for job in jobs if not self.is_done(job, settings)]
+        return remaining, len(jobs) - len(remaining)
+
+    def record(self, result: 'BatchResult', settings: str):
+        """Append a result, converted with the settings of that fingerprint, and flush it to disk"""
+        entry = {
+            'input': result.job.markdown_path,
+            'state': list(result.job.state),  # As planned: the input may have changed while converting
+            'status': 'ok' if result.ok else 'failed',
+            'output': result.output_path,
+            'output_dir': os.path.abspath(result.job.output_dir),
+            'settings': settings,
+            'error': result.error,
+            'attempts': result.attempts,
+            'seconds': round(result.seconds, 3),
+            'finished': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self.lock:
+            if self.file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self.file = open(self.path, 'ab')
+                if self.file.tell():
+                    with open(self.path, 'rb') as existing:
+                        existing.seek(-1, os.SEEK_END)
+                        if existing.read(1) != b'\n':
+                            self.file.write(b'\n')  # End the line a crash tore, so this record stays readable
+            self.file.write(line.encode('utf-8'))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.entries[entry['input']] = entry
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
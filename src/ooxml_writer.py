@@ -0,0 +1,542 @@
+# src/ooxml_writer.py
+
+import io
+import os
+import re
+import time
+import hashlib
+import zipfile
+import logging
+from itertools import chain
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from .images import EMU_PER_TWIP, FORMATS, Image
+from .packager import (COMPRESSION_LEVEL, CompressedPart, PackageWriter, compress_part,
+                       get_compression_executor, iter_file, read_compressed_parts)
+from .tables import Table
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W = f'{{{W_NS}}}'
+
+DOCUMENT_PART = 'word/document.xml'
+DOCUMENT_RELS_PART = 'word/_rels/document.xml.rels'
+CONTENT_TYPES_PART = '[Content_Types].xml'
+CORE_PROPERTIES_PART = 'docProps/core.xml'
+DOCUMENT_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml'
+IMAGE_RELATIONSHIP_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/image'
+RELATIONSHIPS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+# Macro and key-binding parts a .docx package is not allowed to carry
+MACRO_PARTS = {
+    'word/vbaProject.bin',
+    'word/_rels/vbaProject.bin.rels',
+    'word/vbaData.xml',
+    'word/customizations.xml',
+}
+MACRO_RELATIONSHIP_TYPES = (
+    'http://schemas.microsoft.com/office/2006/relationships/vbaProject',
+    'http://schemas.microsoft.com/office/2006/relationships/keyMapCustomizations',
+)
+
+# Bytes of document.xml collected before each write into the compressor
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# Width of the text column in twips when the template does not say, 6.5 inches
+DEFAULT_TEXT_WIDTH = 9360
+
+# Borders for tables the template has no table style for
+PLAIN_TABLE_BORDERS = '<w:tblBorders>' + ''.join(
+    f'<w:{side} w:val="single" w:sz="4" w:space="0" w:color="auto"/>'
+    for side in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV')
+) + '</w:tblBorders>'
+
+# Inline picture, namespaces declared locally so any template's document.xml root works
+DRAWING_XML = (
+    '<w:r><w:drawing><wp:inline xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+    'distT="0" distB="0" distL="0" distR="0"><wp:extent cx="{cx}" cy="{cy}"/>'
+    '<wp:docPr id="{id}" name="Picture {id}" descr="{alt}"/>'
+    '<wp:cNvGraphicFramePr><a:graphicFrameLocks xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+    '<a:graphic xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+    '<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+    '<pic:pic xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+    '<pic:nvPicPr><pic:cNvPr id="0" name="{name}" descr="{alt}"/><pic:cNvPicPr/></pic:nvPicPr>'
+    '<pic:blipFill><a:blip xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'r:embed="{rid}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+    '<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr></pic:pic>'
+    '</a:graphicData></a:graphic></wp:inline></w:drawing></w:r>'
+)
+
+# XML 1.0 forbids most control characters, Word silently drops them too
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def escape(text: str, quote: bool = False) -> str:
+    """
+    Escape text for XML content, as xml.sax.saxutils.escape does
+    That module imports urllib and the email package, which would dominate startup.
+    Args:
+        text: Text to escape
+        quote: Also escape double quotes, for attribute values
+    """
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    return text.replace('"', '&quot;') if quote else text
+
+
+# Run properties matching TextFormatter.apply_character_formatting
+RUN_PROPERTIES = {
+    'bold': '<w:b/>',
+    'italic': '<w:i/>',
+    'bold-italic': '<w:b/><w:i/>',
+    'code': ('<w:rFonts w:ascii="Consolas" w:hAnsi="Consolas" w:cs="Consolas"/>'
+             '<w:color w:val="505050"/><w:sz w:val="18"/>'
+             '<w:shd w:val="clear" w:color="auto" w:fill="F0F0F0"/>'),
+}
+
+
+def package_timestamp() -> float:
+    """Time a package is written at; SOURCE_DATE_EPOCH pins it for reproducible output"""
+    source_date_epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    return float(source_date_epoch) if source_date_epoch else time.time()
+
+
+class TemplatePackage:
+    """
+    A Word template (.dotm/.dotx) compiled into everything needed to build documents
+    The package is read once; afterwards it is immutable, so one instance is
+    safely shared by every conversion and can be pickled to worker processes.
+    See template_cache.get_template for the process-wide cache.
+    """
+
+    def __init__(self, template_path: str):
+        self.template_path = template_path
+        try:
+            stat = os.stat(template_path)
+            with open(template_path, 'rb') as file:
+                data = file.read()
+            with zipfile.ZipFile(io.BytesIO(data)) as package:
+                parts = {name: package.read(name) for name in package.namelist()}
+        except zipfile.BadZipFile:
+            raise ValueError(f"Template is not an Office Open XML package: {template_path}")
+
+        if DOCUMENT_PART not in parts:
+            raise ValueError(f"Template has no {DOCUMENT_PART} part: {template_path}")
+
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.sha256 = hashlib.sha256(data).hexdigest()
+        self.parts: Mapping[str, bytes] = MappingProxyType(parts)
+        # The same parts as stored in the template, copied into documents without recompressing
+        self.compressed_parts: Mapping[str, CompressedPart] = MappingProxyType(read_compressed_parts(data))
+        styles = self._parse_styles(parts.get('word/styles.xml'))
+        self.style_ids, self.style_names = self._load_styles(styles)
+        self.table_style_ids, self.table_style_names = self._load_styles(styles, 'table')
+        self.document_prefix, self.document_suffix = self._split_document(parts[DOCUMENT_PART])
+        self.text_width = self._text_width(self.document_suffix)
+        self.document_content_types = self._document_content_types(parts[CONTENT_TYPES_PART])
+        self.document_rels = self._document_rels(parts.get(DOCUMENT_RELS_PART))
+        self._frozen = True
+        logging.info(f"Loaded template package with {len(self.style_ids)} paragraph styles")
+
+    def __setattr__(self, name: str, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError(f"TemplatePackage is immutable, cannot set {name}")
+        super().__setattr__(name, value)
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        state['parts'] = dict(self.parts)
+        state['compressed_parts'] = dict(self.compressed_parts)
+        state['style_ids'] = dict(self.style_ids)
+        state['table_style_ids'] = dict(self.table_style_ids)
+        return state
+
+    def __setstate__(self, state: dict):
+        state['parts'] = MappingProxyType(state['parts'])
+        state['compressed_parts'] = MappingProxyType(state['compressed_parts'])
+        state['style_ids'] = MappingProxyType(state['style_ids'])
+        state['table_style_ids'] = MappingProxyType(state['table_style_ids'])
+        self.__dict__.update(state)
+
+    @staticmethod
+    def _parse_styles(styles_xml: Optional[bytes]) -> list:
+        """The <w:style> elements of word/styles.xml"""
+        if not styles_xml:
+            return []
+        import xml.etree.ElementTree as ET  # Only needed when a template is compiled
+        return list(ET.fromstring(styles_xml).iter(f'{W}style'))
+
+    @staticmethod
+    def _load_styles(styles: list, style_type: str = 'paragraph') -> Tuple[Mapping[str, str], Tuple[str, ...]]:
+        """Map the names of paragraph (or table) styles to their style IDs"""
+        style_ids: Dict[str, str] = {}
+        style_names: List[str] = []
+        for style in styles:
+            if style.get(f'{W}type') != style_type:
+                continue
+            style_id = style.get(f'{W}styleId')
+            name = style.find(f'{W}name')
+            if style_id and name is not None:
+                # Word matches built-in names ("heading 1") case-insensitively
+                style_names.append(name.get(f'{W}val'))
+                style_ids[name.get(f'{W}val').lower()] = style_id
+        return MappingProxyType(style_ids), tuple(style_names)
+
+    @staticmethod
+    def _split_document(document_part: bytes) -> Tuple[str, str]:
+        """Text of document.xml up to <w:body> and from the section properties on"""
+        document_xml = document_part.decode('utf-8')
+        body_start = document_xml.index('<w:body>') + len('<w:body>')
+        section_start = document_xml.rfind('<w:sectPr')
+        if section_start == -1:
+            section_start = document_xml.rindex('</w:body>')
+        return document_xml[:body_start], document_xml[section_start:]
+
+    @staticmethod
+    def _text_width(section_xml: str) -> int:
+        """Page width minus the side margins, in twips"""
+        page = re.search(r'<w:pgSz\b[^>]*\bw:w="(\d+)"', section_xml)
+        margins = re.search(r'<w:pgMar\b[^>]*>', section_xml)
+        if not page or not margins:
+            return DEFAULT_TEXT_WIDTH
+        sides = [re.search(rf'\bw:{side}="(-?\d+)"', margins.group(0)) for side in ('left', 'right')]
+        width = int(page.group(1)) - sum(int(side.group(1)) for side in sides if side)
+        return width if width > 0 else DEFAULT_TEXT_WIDTH
+
+    @staticmethod
+    def _document_content_types(content_types_part: bytes) -> bytes:
+        """[Content_Types].xml for a document instead of a template"""
+        content_types = content_types_part.decode('utf-8')
+        content_types = re.sub(
+            r'(<Override PartName="/word/document\.xml" ContentType=")[^"]*(")',
+            rf'\g<1>{DOCUMENT_CONTENT_TYPE}\g<2>',
+            content_types
+        )
+        for part in MACRO_PARTS:
+            content_types = re.sub(rf'<Override PartName="/{re.escape(part)}"[^>]*/>', '', content_types)
+        # Images are only discovered while document.xml streams, so every format Word embeds is declared
+        defaults = ''.join(
+            f'<Default Extension="{extension}" ContentType="{content_type}"/>'
+            for extension, content_type in FORMATS.values()
+            if not re.search(rf'<Default Extension="{extension}"', content_types, re.IGNORECASE)
+        )
+        content_types = re.sub(r'(<Types\b[^>]*>)', lambda match: match.group(1) + defaults, content_types, count=1)
+        return content_types.encode('utf-8')
+
+    @staticmethod
+    def _document_rels(rels_part: Optional[bytes]) -> Optional[bytes]:
+        """word/_rels/document.xml.rels without macro relationships"""
+        if rels_part is None:
+            return None
+        rels = rels_part.decode('utf-8')
+        for relationship_type in MACRO_RELATIONSHIP_TYPES:
+            rels = re.sub(rf'<Relationship [^>]*Type="{re.escape(relationship_type)}"[^>]*/>', '', rels)
+        return rels.encode('utf-8')
+
+    @property
+    def numbering_xml(self) -> Optional[bytes]:
+        """Numbering definitions (word/numbering.xml)"""
+        return self.parts.get('word/numbering.xml')
+
+    @property
+    def theme_xml(self) -> Optional[bytes]:
+        """Theme (word/theme/theme1.xml)"""
+        return self.parts.get('word/theme/theme1.xml')
+
+    @property
+    def header_footer_parts(self) -> Dict[str, bytes]:
+        """Header and footer parts by part name"""
+        return {name: data for name, data in self.parts.items()
+                if re.fullmatch(r'word/(header|footer)\d*\.xml', name)}
+
+    def has_style(self, style_name: str) -> bool:
+        """Check if the template defines a paragraph style"""
+        return style_name.lower() in self.style_ids
+
+    def style_id(self, style_name: str) -> Optional[str]:
+        """Get the style ID for a style name"""
+        return self.style_ids.get(style_name.lower())
+
+    def has_table_style(self, style_name: str) -> bool:
+        """Check if the template defines a table style"""
+        return style_name.lower() in self.table_style_ids
+
+    def table_style_id(self, style_name: str) -> Optional[str]:
+        """Get the style ID for a table style name"""
+        return self.table_style_ids.get(style_name.lower())
+
+    def document_shell(self) -> Tuple[str, str]:
+        """
+        Split the template body into the text around its paragraphs
+        Returns:
+            (prefix, suffix) where prefix ends with <w:body> and suffix starts with
+            the template's section properties
+        """
+        return self.document_prefix, self.document_suffix
+
+
+class OoxmlDocument:
+    """Builds a .docx package directly from a template without Microsoft Word"""
+
+    def __init__(self, template: Union[str, TemplatePackage], compression_level: int = COMPRESSION_LEVEL):
+        """
+        Args:
+            template: Template path, looked up in the template cache, or a compiled template
+            compression_level: zlib level (0-9) for the parts written per document;
+                               parts copied from the template are never recompressed
+        """
+        if not isinstance(template, TemplatePackage):
+            from .template_cache import get_template
+            template = get_template(template)
+        self.template = template
+        self.compression_level = compression_level
+        self.paragraphs: List[str] = []
+        self.images: Dict[str, Image] = {}  # Embedded images by relationship ID
+        self.drawings = 0
+
+    def has_style(self, style_name: str) -> bool:
+        """Check if a style exists in the document"""
+        return self.template.has_style(style_name)
+
+    def add_paragraph(self, text: str, style_name: str,
+                      spans: Iterable[Tuple[int, int, str]] = ()):
+        """
+        Append a paragraph
+        Args:
+            text: Plain paragraph text, lines separated by '\\n'
+            style_name: Paragraph style name, must exist in the template unless "Normal"
+            spans: (start, end, format_type) character formatting ranges in text
+        """
+        self.paragraphs.append(self.render_paragraph(text, style_name, spans))
+
+    def render_paragraph(self, text: str, style_name: str,
+                         spans: Iterable[Tuple[int, int, str]] = ()) -> str:
+        """Render a paragraph as a <w:p> element without appending it"""
+        style_id = self.template.style_id(style_name)
+        properties = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ''
+        return f'<w:p>{properties}{self._runs(text, spans)}</w:p>'
+
+    def add_table(self, table: Table):
+        """Append a table"""
+        self.paragraphs.append(self.render_table(table))
+
+    def add_image(self, image: Image):
+        """Append a paragraph holding an image"""
+        self.paragraphs.append(self.render_image(image))
+
+    def render(self, item: Union[Table, Image, Tuple[str, str, Iterable[Tuple[int, int, str]]]]) -> str:
+        """Render a (text, style_name, spans) paragraph, a Table or an Image"""
+        if isinstance(item, Table):
+            return self.render_table(item)
+        if isinstance(item, Image):
+            return self.render_image(item)
+        return self.render_paragraph(*item)
+
+    def render_image(self, image: Image) -> str:
+        """
+        Render an image as a paragraph with one inline picture
+        The picture is scaled down to the template's text width. Its media
+        part is registered under a name derived from the content hash, so
+        repeated images share a single copy in word/media.
+        """
+        self.images.setdefault(image.relationship_id, image)
+        self.drawings += 1
+        width, height = image.fit(self.template.text_width * EMU_PER_TWIP)
+        style_id = self.template.style_id(image.style_name)
+        properties = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ''
+        drawing = DRAWING_XML.format(cx=width, cy=height, id=self.drawings, rid=image.relationship_id,
+                                     name=escape(image.media_name), alt=escape(image.alt, quote=True))
+        return f'<w:p>{properties}{drawing}</w:p>'
+
+    @staticmethod
+    def references_media(body_xml: str) -> bool:
+        """Whether rendered body elements point at media parts of this document"""
+        return 'r:embed="' in body_xml
+
+    def render_table(self, table: Table) -> str:
+        """
+        Render a table as one <w:tbl> element
+        Columns share the template's text width equally. The table style is
+        set once on the table; without one, plain borders and a bold header
+        row keep the table readable.
+        """
+        style_id = self.template.table_style_id(table.style_name) if table.style_name else None
+        columns = max(table.columns, 1)
+        width = self.template.text_width // columns
+        paragraph_style_id = self.template.style_id(table.paragraph_style)
+        paragraph_style = f'<w:pStyle w:val="{paragraph_style_id}"/>' if paragraph_style_id else ''
+        # Properties of the paragraph in each column, computed once per table
+        column_properties = []
+        for alignment in table.alignments:
+            justification = f'<w:jc w:val="{alignment}"/>' if alignment else ''
+            properties = paragraph_style + justification
+            column_properties.append(f'<w:pPr>{properties}</w:pPr>' if properties else '')
+        cell_properties = f'<w:tcPr><w:tcW w:w="{width}" w:type="dxa"/></w:tcPr>'
+
+        if style_id:
+            table_properties = (f'<w:tblStyle w:val="{style_id}"/><w:tblW w:w="0" w:type="auto"/>'
+                                '<w:tblLook w:val="04A0" w:firstRow="1" w:lastRow="0" w:firstColumn="1" '
+                                'w:lastColumn="0" w:noHBand="0" w:noVBand="1"/>')
+        else:
+            table_properties = f'<w:tblW w:w="0" w:type="auto"/>{PLAIN_TABLE_BORDERS}'
+        parts = [f'<w:tbl><w:tblPr>{table_properties}</w:tblPr><w:tblGrid>',
+                 f'<w:gridCol w:w="{width}"/>' * columns, '</w:tblGrid>']
+        for index, row in enumerate(table.rows):
+            header = index < table.header_rows
+            parts.append('<w:tr><w:trPr><w:tblHeader/></w:trPr>' if header else '<w:tr>')
+            for (text, spans), properties in zip(row, column_properties):
+                if header and not style_id:
+                    spans = [(0, len(text), 'bold')]
+                parts.append(f'<w:tc>{cell_properties}<w:p>{properties}{self._runs(text, spans)}</w:p></w:tc>')
+            parts.append('</w:tr>')
+        parts.append('</w:tbl>')
+        return ''.join(parts)
+
+    def append_xml(self, body_xml: str):
+        """Append already rendered body elements, e.g. from a cache"""
+        self.paragraphs.append(body_xml)
+
+    def _runs(self, text: str, spans: Iterable[Tuple[int, int, str]]) -> str:
+        """Render text as runs, one run per formatted or unformatted stretch"""
+        runs = []
+        position = 0
+        for start, end, format_type in sorted(spans):
+            if start < position:
+                continue  # Overlapping spans keep the first format
+            if start > position:
+                runs.append(self._run(text[position:start]))
+            runs.append(self._run(text[start:end], RUN_PROPERTIES.get(format_type, '')))
+            position = end
+        if position < len(text) or not runs:
+            runs.append(self._run(text[position:]))
+        return ''.join(runs)
+
+    def _run(self, text: str, properties: str = '') -> str:
+        """Render a single run, turning line feeds into line breaks"""
+        properties = f'<w:rPr>{properties}</w:rPr>' if properties else ''
+        lines = escape(INVALID_XML_CHARS.sub('', text)).split('\n')
+        content = '<w:br/>'.join(f'<w:t xml:space="preserve">{line}</w:t>' for line in lines)
+        return f'<w:r>{properties}{content}</w:r>'
+
+    def document_xml(self) -> bytes:
+        """Render word/document.xml"""
+        return b''.join(self.iter_document_xml(self.paragraphs))
+
+    def iter_document_xml(self, body: Iterable[str]) -> Iterator[bytes]:
+        """
+        Render word/document.xml in chunks around a stream of body elements
+        Args:
+            body: Rendered <w:p> elements, consumed one at a time
+        Returns:
+            Iterator of UTF-8 chunks of roughly STREAM_CHUNK_SIZE bytes
+        """
+        prefix, suffix = self.template.document_shell()
+        chunk: List[str] = [prefix]
+        size = len(prefix)
+        element = ''
+        for element in body:
+            chunk.append(element)
+            size += len(element)
+            if size >= STREAM_CHUNK_SIZE:
+                yield ''.join(chunk).encode('utf-8')
+                chunk, size = [], 0
+        if element.endswith('</w:tbl>'):
+            chunk.append('<w:p/>')  # Word expects a paragraph between a table and the section properties
+        chunk.append(suffix)
+        yield ''.join(chunk).encode('utf-8')
+
+    def content_types_xml(self) -> bytes:
+        """Render [Content_Types].xml for a document instead of a template"""
+        return self.template.document_content_types
+
+    def document_rels_xml(self) -> Optional[bytes]:
+        """Render word/_rels/document.xml.rels without macro relationships, with the images"""
+        rels = self.template.document_rels
+        if not self.images:
+            return rels
+        relationships = ''.join(
+            f'<Relationship Id="{rid}" Type="{IMAGE_RELATIONSHIP_TYPE}" Target="media/{image.media_name}"/>'
+            for rid, image in self.images.items()
+        )
+        if rels is None:
+            rels = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    f'<Relationships xmlns="{RELATIONSHIPS_NS}"></Relationships>').encode('utf-8')
+        text = rels.decode('utf-8')
+        end = text.rindex('</Relationships>')
+        return (text[:end] + relationships + text[end:]).encode('utf-8')
+
+    def core_properties_xml(self, timestamp: float) -> Optional[bytes]:
+        """Render docProps/core.xml with the creation and modification times set to timestamp"""
+        core_properties = self.template.parts.get(CORE_PROPERTIES_PART)
+        if core_properties is None:
+            return None
+        stamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+        text = re.sub(r'(<dcterms:(created|modified)\b[^>]*>)[^<]*(</dcterms:\2>)',
+                      rf'\g<1>{stamp}\g<3>', core_properties.decode('utf-8'))
+        text = re.sub(r'<cp:revision>[^<]*</cp:revision>', '<cp:revision>1</cp:revision>', text)
+        return text.encode('utf-8')
+
+    def save(self, output_path: str,
+             stream: Optional[Iterable[Union[Table, Image, Tuple[str, str, Iterable[Tuple[int, int, str]]]]]] = None):
+        """
+        Write the .docx package
+        Args:
+            output_path: Path of the .docx file
+            stream: (text, style_name, spans) paragraphs, Tables and Images
+                    rendered straight into document.xml after the appended
+                    ones, so a body of any size never has to be held in memory
+        """
+        count = len(self.paragraphs)
+        body: Iterable[str] = self.paragraphs
+        if stream is not None:
+            def rendered() -> Iterator[str]:
+                nonlocal count
+                for item in stream:
+                    count += 1
+                    yield self.render(item)
+            body = chain(self.paragraphs, rendered())
+
+        timestamp = package_timestamp()
+        level = self.compression_level
+        executor = get_compression_executor()
+        # The small per-document parts compress while the template parts are copied
+        content_types = executor.submit(compress_part, self.content_types_xml(), level)
+        core_properties = self.core_properties_xml(timestamp)
+        if core_properties is not None:
+            core_properties = executor.submit(compress_part, core_properties, level)
+
+        tmp_path = f"{output_path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as file:
+                package = PackageWriter(file, level, time.localtime(timestamp)[:6], executor)
+                # [Content_Types].xml goes first so streaming readers can find it
+                package.write_part(CONTENT_TYPES_PART, content_types.result())
+                for name, data in self.template.parts.items():
+                    if name in (CONTENT_TYPES_PART, DOCUMENT_RELS_PART) or name in MACRO_PARTS:
+                        continue
+                    if name == DOCUMENT_PART:
+                        package.write_stream(DOCUMENT_PART, self.iter_document_xml(body))
+                    elif name == CORE_PROPERTIES_PART and core_properties is not None:
+                        package.write_part(name, core_properties.result())
+                    elif name in self.template.compressed_parts:
+                        package.write_part(name, self.template.compressed_parts[name])
+                    else:
+                        package.write(name, data)
+                # Images and their relationships are known once the body has been rendered
+                for image in self.images.values():
+                    # Apart from BMP the formats are compressed already, deflating them again only costs time
+                    package.write_stream(f'word/media/{image.media_name}', iter_file(image.path),
+                                         level if image.info.format == 'bmp' else 0)
+                rels = self.document_rels_xml()
+                if rels is not None:
+                    package.write(DOCUMENT_RELS_PART, rels)
+                package.close()
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        logging.info(f"Wrote {count} paragraphs and tables to {output_path}")
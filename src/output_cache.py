@@ -0,0 +1,287 @@
+# src/output_cache.py
+
+import os
+import glob
+import json
+import time
+import errno
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .images import resolve_image_path
+from .template_cache import get_template_cache
+from .tokenizer import tokenize
+from .utils import file_sha256, get_cache_dir
+
+# Bump whenever the same inputs would convert to a different document, so older outputs are never served;
+# edits to the package sources change the key anyway, see output_version
+OUTPUT_VERSION = 1
+
+# Total size of cached documents before the least recently used are removed
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Eviction trims the cache to this share of max_bytes, so it does not run on every store
+EVICTION_TARGET = 0.9
+
+# Temporary files older than this were left behind by a crashed writer
+STALE_TMP_SECONDS = 3600
+
+
+_output_version: Optional[str] = None
+
+
+def output_version() -> str:
+    """
+    Version of the converter in cache keys: OUTPUT_VERSION and a hash of the package sources
+    Computed once per process, so a changed converter never serves what an older one produced.
+    """
+    global _output_version
+    if _output_version is None:
+        digest = hashlib.sha256()
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for path in sorted(glob.glob(os.path.join(package_dir, '*.py'))):
+            digest.update(os.path.basename(path).encode('utf-8') + b'\0')
+            digest.update(file_sha256(path).encode('ascii'))
+        _output_version = f"{OUTPUT_VERSION}-{digest.hexdigest()}"
+    return _output_version
+
+
+class OutputCache:
+    """
+    Content-addressed store of converted documents
+    A document is keyed by the SHA-256 of everything its content depends on:
+    the markdown bytes, the template content, the images it embeds, the
+    backend and its options, the style mapping and the converter version
+    (see output_version). A hit hard-links (or copies, across filesystems)
+    the stored .docx to the output path, so an unchanged file costs a hash
+    instead of a conversion.
+
+    Entries are written to a temporary file and renamed into place, so
+    workers sharing the cache never see a partial document. Every hit
+    touches an empty .used file next to its entry, never the entry itself,
+    whose timestamps hard-linked outputs share; when the cache outgrows
+    max_bytes, the entries used least recently are removed first.
+
+    Hard-linked outputs share their bytes with the cache entry. Tools that
+    save a document by replacing the file, as Word does, leave the cache
+    intact; pass link=False if outputs may be modified in place.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES, link: bool = True):
+        """
+        Args:
+            cache_dir: Directory of the cache, defaults to get_cache_dir('outputs')
+            max_bytes: Size the cached documents are trimmed back to
+            link: Hard-link outputs to entries instead of copying them
+        """
+        self.cache_dir = cache_dir or get_cache_dir('outputs')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.link = link
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_since_eviction: Optional[int] = None  # None until the first store checks the size
+
+    def key(self, markdown_path: str, template_path: str, backend: str = 'ooxml',
+            backend_options: Optional[Dict[str, Any]] = None, style_types: Optional[Dict[str, str]] = None) -> str:
+        """
+        Cache key of converting a markdown file
+        Args:
+            markdown_path: Markdown file
+            template_path: Template file, hashed through the template cache
+            backend: Backend name
+            backend_options: Keyword arguments for the backend; objects such as pools count by type only
+            style_types: StyleManager.style_types of the converter
+        Returns:
+            Hex SHA-256
+        """
+        digest = hashlib.sha256()
+        with open(markdown_path, 'rb') as file:
+            markdown = file.read()
+        digest.update(markdown)
+        context = {
+            'version': output_version(),
+            'template': get_template_cache().sha256(template_path),
+            'backend': backend,
+            'options': backend_options or {},
+            'styles': style_types or {},
+            'images': self._image_hashes(markdown, os.path.dirname(os.path.abspath(markdown_path))),
+        }
+        digest.update(json.dumps(context, sort_keys=True, default=lambda value: type(value).__name__).encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _image_hashes(markdown: bytes, base_dir: str) -> List[Tuple[str, str]]:
+        """Content hashes of the images a document embeds, which change its output without changing its text"""
+        if b'![' not in markdown:
+            return []
+        hashes = []
+        lines = markdown.decode('utf-8', errors='replace').splitlines()
+        for block in tokenize(lines):
+            if block.kind != 'image':
+                continue
+            try:
+                hashes.append((block.src, file_sha256(resolve_image_path(block.src, base_dir))))
+            except OSError:
+                hashes.append((block.src, ''))  # Converted to its alt text
+        return hashes
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.docx")
+
+    @staticmethod
+    def used_path(entry: str) -> str:
+        """File whose modification time records when entry was last used"""
+        return f"{os.path.splitext(entry)[0]}.used"
+
+    def _touch(self, entry: str):
+        """Mark entry as used now"""
+        used = self.used_path(entry)
+        with open(used, 'ab'):
+            pass
+        os.utime(used)
+
+    def _tmp_path(self, path: str) -> str:
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def _place(self, source: str, destination: str):
+        """Atomically make destination a hard link to (or copy of) source"""
+        tmp_path = self._tmp_path(destination)
+        try:
+            if self.link:
+                try:
+                    os.link(source, tmp_path)
+                except OSError as e:
+                    if e.errno == errno.ENOENT:
+                        raise
+                    shutil.copyfile(source, tmp_path)  # Another filesystem, or no hard links
+            else:
+                shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, destination)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """
+        Put the cached document for key at output_path
+        Returns:
+            True on a hit; on a miss output_path is left untouched
+        """
+        entry = self.entry_path(key)
+        try:
+            self._place(entry, output_path)
+            self._touch(entry)
+        except FileNotFoundError:
+            with self.lock:
+                self.misses += 1
+            return False
+        except OSError as e:
+            logging.warning(f"Failed to read cached document {entry}: {str(e)}")
+            with self.lock:
+                self.misses += 1
+            return False
+        with self.lock:
+            self.hits += 1
+        logging.info(f"Served {output_path} from the output cache")
+        return True
+
+    def store(self, key: str, output_path: str):
+        """Add a converted document; failures only cost the next run a conversion"""
+        entry = self.entry_path(key)
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            self._place(output_path, entry)
+            self._touch(entry)
+            size = os.path.getsize(entry)
+        except OSError as e:
+            logging.warning(f"Failed to cache {output_path}: {str(e)}")
+            return
+        with self.lock:
+            self.stores += 1
+            check = self.bytes_since_eviction is None or \
+                self.bytes_since_eviction + size >= self.max_bytes * (1 - EVICTION_TARGET)
+            self.bytes_since_eviction = 0 if check else self.bytes_since_eviction + size
+        if check:
+            self.evict()
+
+    def entries(self) -> List[Tuple[int, int, str]]:
+        """(last use in ns, size, path) of every cached document, removing stale temporary files"""
+        entries = []
+        now = time.time()
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            documents: Dict[str, Tuple[int, int, str]] = {}
+            used: Dict[str, Tuple[int, str]] = {}
+            for entry in os.scandir(shard.path):
+                name, extension = os.path.splitext(entry.name)
+                try:
+                    stat = entry.stat()
+                    if extension == '.docx':
+                        documents[name] = (stat.st_mtime_ns, stat.st_size, entry.path)
+                    elif extension == '.used':
+                        used[name] = (stat.st_mtime_ns, entry.path)
+                    elif extension == '.tmp' and now - stat.st_mtime > STALE_TMP_SECONDS:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass  # Evicted or renamed by another worker meanwhile
+            for name, (stored, size, path) in documents.items():
+                entries.append((used[name][0] if name in used else stored, size, path))
+            for name, (last_used, path) in used.items():
+                if name not in documents and now - last_used / 1e9 > STALE_TMP_SECONDS:
+                    self._remove(path)  # Its document was evicted while a hit touched it
+        return entries
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def evict(self) -> int:
+        """
+        Remove least recently used documents until the cache fits
+        Returns:
+            Number of documents removed
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * EVICTION_TARGET:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            self._remove(self.used_path(path))
+            total -= size
+        with self.lock:
+            self.evictions += removed
+        logging.info(f"Evicted {removed} documents from the output cache")
+        return removed
+
+    def stats(self) -> Dict[str, float]:
+        """Hits, misses, stores and evictions of this instance, plus the hit rate"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'stores': self.stores, 'evictions': self.evictions,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        """Remove every cached document"""
+        for _, _, path in self.entries():
+            self._remove(path)
+            self._remove(self.used_path(path))
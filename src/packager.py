@@ -0,0 +1,261 @@
+# src/packager.py
+
+import io
+import os
+import time
+import zlib
+import struct
+import zipfile
+import threading
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# zlib level for the parts that are compressed per document; 0 stores them uncompressed
+COMPRESSION_LEVEL = 6
+
+# Window a deflate chunk may refer back into, primed from the end of the previous chunk
+DEFLATE_WINDOW = 32 * 1024
+
+# Chunks of one part being compressed at once, bounding the memory held by the pool
+MAX_PENDING_CHUNKS = 8
+
+# Bytes read at a time from files copied into a package
+FILE_CHUNK_SIZE = 256 * 1024
+
+# Sizes and offsets above this need ZIP64 records, which this writer does not produce
+ZIP32_LIMIT = 0xFFFFFFFF
+
+LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+END_OF_CENTRAL_DIRECTORY = struct.Struct('<IHHHHIIH')
+LOCAL_HEADER_SIGNATURE = 0x04034b50
+CENTRAL_HEADER_SIGNATURE = 0x02014b50
+END_OF_CENTRAL_DIRECTORY_SIGNATURE = 0x06054b50
+CRC_OFFSET = 14  # Position of crc32, compressed size and size in a local header
+VERSION = 20  # 2.0, deflate
+UTF8_FLAG = 0x800
+
+
+class CompressedPart:
+    """One package entry in its stored form: compressed bytes plus what a zip header needs"""
+
+    __slots__ = ('data', 'crc', 'size', 'method')
+
+    def __init__(self, data: bytes, crc: int, size: int, method: int):
+        self.data = data
+        self.crc = crc
+        self.size = size
+        self.method = method
+
+    def __getstate__(self):
+        return self.data, self.crc, self.size, self.method
+
+    def __setstate__(self, state):
+        self.data, self.crc, self.size, self.method = state
+
+
+def compress_part(data: bytes, level: int = COMPRESSION_LEVEL) -> CompressedPart:
+    """Deflate a whole part, or store it when level is 0"""
+    if level == 0:
+        return CompressedPart(data, zlib.crc32(data), len(data), zipfile.ZIP_STORED)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    compressed = compressor.compress(data) + compressor.flush()
+    return CompressedPart(compressed, zlib.crc32(data), len(data), zipfile.ZIP_DEFLATED)
+
+
+def read_compressed_parts(package_data: bytes) -> Dict[str, CompressedPart]:
+    """
+    Entries of a zip package exactly as they are stored, without decompressing them
+    Entries that are encrypted or use a method other than stored or deflated are left out.
+    """
+    parts: Dict[str, CompressedPart] = {}
+    view = memoryview(package_data)
+    with zipfile.ZipFile(io.BytesIO(package_data)) as package:
+        for info in package.infolist():
+            if info.flag_bits & 0x1 or info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                continue
+            fields = LOCAL_HEADER.unpack_from(view, info.header_offset)
+            start = info.header_offset + LOCAL_HEADER.size + fields[9] + fields[10]
+            parts[info.filename] = CompressedPart(bytes(view[start:start + info.compress_size]),
+                                                  info.CRC, info.file_size, info.compress_type)
+    return parts
+
+
+def _deflate_chunk(data: bytes, window: bytes, level: int) -> bytes:
+    """Deflate one chunk so that chunks compressed independently concatenate into one stream"""
+    if window:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=window)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    # A sync flush ends on a byte boundary without marking the last block
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def deflate_chunks(chunks: Iterable[bytes], level: int, executor: Optional[Executor] = None,
+                   checksum: Optional[List[int]] = None) -> Iterator[bytes]:
+    """
+    Deflate a stream of chunks on a thread pool, in order
+    Each chunk is compressed on its own with the previous chunk's last 32 KB as
+    dictionary, so the result is one deflate stream nearly as small as a
+    sequential one while zlib, which releases the GIL, runs on several
+    chunks at once and alongside whatever produces them.
+    Args:
+        chunks: Uncompressed data
+        level: zlib compression level, 1-9
+        executor: Pool to compress on, the shared one by default
+        checksum: [crc32, size] of the uncompressed data, updated as chunks are read
+    Returns:
+        Iterator of compressed data, ending with the final empty block
+    """
+    executor = executor or get_compression_executor()
+    pending: deque = deque()
+    window = b''
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if checksum is not None:
+            checksum[0] = zlib.crc32(chunk, checksum[0])
+            checksum[1] += len(chunk)
+        pending.append(executor.submit(_deflate_chunk, chunk, window, level))
+        window = chunk[-DEFLATE_WINDOW:]
+        while len(pending) >= MAX_PENDING_CHUNKS:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+    yield zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS).flush()
+
+
+def iter_file(path: str) -> Iterator[bytes]:
+    """Contents of a file in FILE_CHUNK_SIZE pieces"""
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+class PackageWriter:
+    """
+    Writes a zip package entry by entry from parts that are already compressed
+    Unlike zipfile.ZipFile, parts copied from another package keep their
+    compressed bytes, so only the parts that differ are ever deflated.
+    Streamed parts have their sizes patched into the local header afterwards,
+    so the file must be seekable.
+    """
+
+    def __init__(self, file: BinaryIO, level: int = COMPRESSION_LEVEL,
+                 date_time: Optional[Tuple[int, int, int, int, int, int]] = None,
+                 executor: Optional[Executor] = None):
+        """
+        Args:
+            file: Seekable binary file positioned where the package starts
+            level: zlib level for parts compressed by this writer, 0 stores them
+            date_time: Modification time of every entry, now by default
+            executor: Pool that compresses streamed parts, the shared one by default
+        """
+        if not 0 <= level <= 9:
+            raise ValueError(f"Compression level must be between 0 and 9, not {level}")
+        self.file = file
+        self.level = level
+        self.executor = executor
+        self.start = file.tell()
+        # (name, method, crc32, compressed size, size, offset) of every entry for the central directory
+        self.entries: List[Tuple[bytes, int, int, int, int, int]] = []
+        date_time = date_time or time.localtime()[:6]
+        year, month, day, hour, minute, second = date_time
+        self.dos_time = hour << 11 | minute << 5 | second // 2
+        self.dos_date = max(year - 1980, 0) << 9 | month << 5 | day
+
+    def _local_header(self, name: bytes, method: int, crc: int, compressed_size: int, size: int) -> bytes:
+        return LOCAL_HEADER.pack(LOCAL_HEADER_SIGNATURE, VERSION, self._flags(name), method,
+                                 self.dos_time, self.dos_date, crc, compressed_size, size, len(name), 0) + name
+
+    @staticmethod
+    def _flags(name: bytes) -> int:
+        return UTF8_FLAG if not name.isascii() else 0
+
+    def _offset(self) -> int:
+        offset = self.file.tell() - self.start
+        if offset > ZIP32_LIMIT:
+            raise ValueError("Packages larger than 4 GiB are not supported")
+        return offset
+
+    def write_part(self, name: str, part: CompressedPart):
+        """Add an entry from its compressed form, e.g. one read from a template"""
+        encoded = name.encode('utf-8')
+        offset = self._offset()
+        self.file.write(self._local_header(encoded, part.method, part.crc, len(part.data), part.size))
+        self.file.write(part.data)
+        self.entries.append((encoded, part.method, part.crc, len(part.data), part.size, offset))
+
+    def write(self, name: str, data: bytes):
+        """Add an entry, compressing it at the writer's level"""
+        self.write_part(name, compress_part(data, self.level))
+
+    def write_stream(self, name: str, chunks: Iterable[bytes], level: Optional[int] = None):
+        """
+        Add an entry from a stream of any length, compressing it as it arrives
+        Args:
+            name: Entry name
+            chunks: Uncompressed data
+            level: zlib level for this entry, the writer's level by default
+        """
+        level = self.level if level is None else level
+        encoded = name.encode('utf-8')
+        offset = self._offset()
+        method = zipfile.ZIP_DEFLATED if level else zipfile.ZIP_STORED
+        self.file.write(self._local_header(encoded, method, 0, 0, 0))
+        checksum = [0, 0]
+        compressed_size = 0
+        if level:
+            pieces = deflate_chunks(chunks, level, self.executor, checksum)
+        else:
+            pieces = self._checksummed(chunks, checksum)
+        for piece in pieces:
+            self.file.write(piece)
+            compressed_size += len(piece)
+        crc, size = checksum
+        if max(size, compressed_size) > ZIP32_LIMIT:
+            raise ValueError(f"Part {name} is larger than 4 GiB")
+        end = self.file.tell()
+        self.file.seek(self.start + offset + CRC_OFFSET)
+        self.file.write(struct.pack('<III', crc, compressed_size, size))
+        self.file.seek(end)
+        self.entries.append((encoded, method, crc, compressed_size, size, offset))
+
+    @staticmethod
+    def _checksummed(chunks: Iterable[bytes], checksum: List[int]) -> Iterator[bytes]:
+        for chunk in chunks:
+            checksum[0] = zlib.crc32(chunk, checksum[0])
+            checksum[1] += len(chunk)
+            yield chunk
+
+    def close(self):
+        """Write the central directory"""
+        directory_offset = self._offset()
+        for name, method, crc, compressed_size, size, offset in self.entries:
+            self.file.write(CENTRAL_HEADER.pack(
+                CENTRAL_HEADER_SIGNATURE, VERSION, VERSION, self._flags(name), method,
+                self.dos_time, self.dos_date, crc, compressed_size, size, len(name), 0, 0, 0, 0, 0, offset) + name)
+        directory_size = self._offset() - directory_offset
+        self.file.write(END_OF_CENTRAL_DIRECTORY.pack(
+            END_OF_CENTRAL_DIRECTORY_SIGNATURE, 0, 0, len(self.entries), len(self.entries),
+            directory_size, directory_offset, 0))
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+
+def get_compression_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for compressing package parts, recreated after a fork"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                           thread_name_prefix='compress')
+            _executor_pid = os.getpid()
+        return _executor
@@ -0,0 +1,499 @@
+# src/service.py
+
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import contextlib
+import logging
+import argparse
+import tempfile
+import multiprocessing
+import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .backends import BACKENDS
+from .batch import BatchJob, BatchResult, _convert_job, _init_worker
+from .template_cache import get_template
+from .utils import setup_logging
+from .watchdog import WatchdogWorker
+
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+LATENCY_WINDOW = 1000  # Most recent jobs used for latency percentiles
+
+HTTP_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable',
+    504: 'Gateway Timeout',
+}
+
+
+def content_disposition(filename: str) -> str:
+    """
+    Content-Disposition header value for downloading filename
+    The plain filename parameter is reduced to printable ASCII without quotes or
+    backslashes, so no name can break out of it or add header lines; the exact
+    name follows in RFC 5987 form for clients that understand it.
+    """
+    fallback = ''.join(char if ' ' <= char <= '~' and char not in '"\\' else '_' for char in filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{urllib.parse.quote(filename, safe='')}"
+
+
+class ServiceError(Exception):
+    """A request the service answers with an HTTP error status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ConversionRequest:
+    """One conversion submitted to the service"""
+
+    def __init__(self, template: str, markdown: Optional[str] = None, markdown_path: Optional[str] = None,
+                 name: str = 'document', output_dir: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            template: Template path, or a file name inside the service's template directory
+            markdown: Markdown text; either this or markdown_path is required
+            markdown_path: Markdown file readable by the service
+            name: Base name of the output file when markdown is sent inline
+            output_dir: Write the .docx here and return its path instead of its bytes
+            timeout: Seconds before the job is abandoned, defaults to the service timeout
+        """
+        if (markdown is None) == (markdown_path is None):
+            raise ServiceError(400, "Exactly one of markdown and markdown_path is required")
+        self.template = template
+        self.markdown = markdown
+        self.markdown_path = markdown_path
+        self.name = os.path.basename(name) or 'document'
+        self.output_dir = output_dir
+        self.timeout = timeout
+        self.id = uuid.uuid4().hex
+        self.queued_at = time.perf_counter()
+
+    @classmethod
+    def from_json(cls, body: bytes) -> 'ConversionRequest':
+        """
+        Parse a request body
+        Raises:
+            ServiceError: 400 for anything but a JSON object with fields of the expected types
+        """
+        try:
+            fields = json.loads(body)
+        except ValueError as e:
+            raise ServiceError(400, f"Invalid conversion request: {str(e)}")
+        if not isinstance(fields, dict):
+            raise ServiceError(400, "Invalid conversion request: expected a JSON object")
+        if not isinstance(fields.get('template'), str):
+            raise ServiceError(400, "Invalid conversion request: template must be a string")
+        for name in ('markdown', 'markdown_path', 'name', 'output_dir'):
+            if fields.get(name) is not None and not isinstance(fields[name], str):
+                raise ServiceError(400, f"Invalid conversion request: {name} must be a string")
+        timeout = fields.get('timeout')
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float))
+                                    or not 0 < timeout < float('inf')):
+            raise ServiceError(400, "Invalid conversion request: timeout must be a positive number of seconds")
+        return cls(
+            template=fields['template'],
+            markdown=fields.get('markdown'),
+            markdown_path=fields.get('markdown_path'),
+            name=fields.get('name') or 'document',
+            output_dir=fields.get('output_dir'),
+            timeout=timeout,
+        )
+
+
+class ConversionResponse:
+    """Result of a conversion: the .docx bytes or the path it was written to"""
+
+    def __init__(self, request_id: str, seconds: float, data: Optional[bytes] = None,
+                 path: Optional[str] = None):
+        self.request_id = request_id
+        self.seconds = seconds
+        self.data = data
+        self.path = path
+
+
+class ServiceMetrics:
+    """Counters, latency percentiles and worker utilisation"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.started = time.perf_counter()
+        self.busy = 0
+        self.busy_seconds = 0.0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.restarts = 0  # Worker processes killed and replaced because their job hung
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def percentile(self, fraction: float) -> float:
+        """Latency percentile in seconds over the recent window, 0 without data"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    def utilisation(self) -> float:
+        """Fraction of worker capacity spent converting since the service started"""
+        elapsed = time.perf_counter() - self.started
+        return self.busy_seconds / (elapsed * self.workers) if elapsed > 0 else 0.0
+
+    def to_dict(self, queue_depth: int, queue_size: int) -> Dict[str, Any]:
+        return {
+            'queue_depth': queue_depth,
+            'queue_size': queue_size,
+            'workers': self.workers,
+            'busy_workers': self.busy,
+            'utilisation': self.utilisation(),
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out,
+            'restarts': self.restarts,
+            'latency_seconds': {
+                'p50': self.percentile(0.50),
+                'p90': self.percentile(0.90),
+                'p99': self.percentile(0.99),
+            },
+            'uptime_seconds': time.perf_counter() - self.started,
+        }
+
+
+class ConversionService:
+    """
+    Long-running conversion service behind a bounded queue and worker pool
+    Requests wait in a queue of at most queue_size jobs; once it is full new
+    requests are rejected immediately instead of piling up. Each of the
+    worker tasks runs one job at a time in its own worker process, which
+    keeps its converter (and any Word instance) warm between jobs. A job
+    still running at its deadline has its worker process killed, along with
+    that worker's Word instance, and a fresh worker takes over.
+    """
+
+    def __init__(self, workers: int = 2, queue_size: int = 32, timeout: float = 120.0,
+                 backend: str = 'ooxml', backend_options: Optional[Dict[str, Any]] = None,
+                 template_dir: Optional[str] = None, preload: Iterable[str] = ()):
+        """
+        Args:
+            workers: Worker processes, i.e. conversions running at once
+            queue_size: Jobs allowed to wait for a worker
+            timeout: Default seconds from queueing to result before a job is stopped
+            backend: Backend name, see backends.BACKENDS
+            backend_options: Keyword arguments for the backend
+            template_dir: Directory relative template names are resolved in
+            preload: Templates compiled once here and handed to every worker
+        """
+        if workers < 1 or queue_size < 1:
+            raise ValueError("workers and queue_size must be at least 1")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.backend = backend
+        self.backend_options = backend_options or {}
+        self.template_dir = template_dir
+        self.preload = [self.resolve_template(template) for template in preload]
+        self.metrics = ServiceMetrics(workers)
+        self.queue: Optional[asyncio.Queue] = None
+        self.processes: List[WatchdogWorker] = []
+        self.executor: Optional[ThreadPoolExecutor] = None  # Waits on the worker processes
+        self.worker_args: Tuple = ()
+        self.tasks: List[asyncio.Task] = []
+        self.servers: List[asyncio.AbstractServer] = []
+        self.unix_socket: Optional[str] = None
+        self.work_dir: Optional[str] = None
+        self.port: Optional[int] = None
+
+    # Lifecycle
+
+    async def start(self, host: Optional[str] = '127.0.0.1', port: int = 0,
+                    unix_socket: Optional[str] = None):
+        """
+        Start the worker pool and listen for HTTP requests
+        Args:
+            host: Interface to listen on, None to skip TCP; keep it on localhost,
+                  the service has no authentication
+            port: TCP port, 0 picks a free one (see self.port)
+            unix_socket: Also listen on this Unix socket path
+        """
+        self.queue = asyncio.Queue(self.queue_size)
+        self.work_dir = tempfile.mkdtemp(prefix='markdown_to_word_service_')
+        templates = [get_template(template) for template in self.preload]
+        self.worker_args = (self.backend, self.backend_options, False, None, None, templates)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='service')
+        self.processes = [self._start_process() for _ in range(self.workers)]
+        self.tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+        if host is not None:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+            self.port = server.sockets[0].getsockname()[1]
+            self.servers.append(server)
+            logging.info(f"Conversion service listening on http://{host}:{self.port}")
+        if unix_socket is not None:
+            self.servers.append(await asyncio.start_unix_server(self.handle_connection, unix_socket))
+            self.unix_socket = unix_socket
+            logging.info(f"Conversion service listening on {unix_socket}")
+
+    async def stop(self):
+        """Stop accepting requests, cancel the worker tasks and shut the pool down"""
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.servers = []
+        if self.unix_socket is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.unix_socket)
+            self.unix_socket = None
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        for process in self.processes:
+            process.kill()  # Also ends any wait still running on the thread pool
+        self.processes = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        if self.work_dir is not None:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+
+    # Jobs
+
+    def _start_process(self) -> WatchdogWorker:
+        """
+        Start a worker process
+        Workers restarted after a hang start while client connections are open;
+        a forked child would hold their sockets open, so workers come from a
+        fork server (or are spawned where there is none) instead.
+        """
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        return WatchdogWorker(multiprocessing.get_context(method), _init_worker, self.worker_args)
+
+    def _restart_process(self, index: int):
+        """Kill a worker process whose job hung, and its Word instance, and start a fresh one"""
+        self.processes[index].kill()
+        self.processes[index] = self._start_process()
+        self.metrics.restarts += 1
+
+    def resolve_template(self, template: str) -> str:
+        """Absolute template path, looking relative names up in template_dir"""
+        if not os.path.isabs(template) and self.template_dir:
+            template = os.path.join(self.template_dir, template)
+        if not os.path.isfile(template):
+            raise ServiceError(404, f"Template not found: {template}")
+        return os.path.abspath(template)
+
+    async def submit(self, request: ConversionRequest) -> ConversionResponse:
+        """
+        Queue a conversion and wait for its result
+        Raises:
+            ServiceError: 503 when the queue is full, 504 on timeout, 400/404/500 otherwise
+        """
+        template_path = self.resolve_template(request.template)
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((request, template_path, future))
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            raise ServiceError(503, "Conversion queue is full, retry later")
+
+        timeout = request.timeout if request.timeout is not None else self.timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self.metrics.timed_out += 1
+            future.cancel()  # Skipped if still queued; a running job is stopped by its worker task
+            raise ServiceError(504, f"Conversion did not finish within {timeout}s")
+
+    async def _worker(self, index: int):
+        """Take jobs off the queue and run them one at a time on worker process index"""
+        loop = asyncio.get_running_loop()
+        while True:
+            request, template_path, future = await self.queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                self.metrics.busy += 1
+                started = time.perf_counter()
+                try:
+                    job, job_dir = self._prepare(request)
+                    timeout = request.timeout if request.timeout is not None else self.timeout
+                    remaining = max(request.queued_at + timeout - time.perf_counter(), 0.0)
+                    try:
+                        outcome = await loop.run_in_executor(self.executor, self.processes[index].call,
+                                                             _convert_job, (template_path, job), remaining)
+                    except TimeoutError:
+                        logging.warning(f"Job {request.id} hung, restarting its worker process")
+                        shutil.rmtree(job_dir, ignore_errors=True)
+                        await loop.run_in_executor(self.executor, self._restart_process, index)
+                        raise ServiceError(504, f"Conversion did not finish within {timeout}s")
+                    if outcome.error is not None:
+                        if outcome.error.startswith('WorkerDied'):
+                            await loop.run_in_executor(self.executor, self._restart_process, index)
+                        shutil.rmtree(job_dir, ignore_errors=True)
+                        raise ServiceError(500, outcome.error)
+                    response = self._finish(request, outcome.result, job_dir)
+                except Exception as e:
+                    self.metrics.failed += 1
+                    if not future.done():
+                        future.set_exception(e if isinstance(e, ServiceError) else ServiceError(500, str(e)))
+                else:
+                    self.metrics.completed += 1
+                    self.metrics.latencies.append(time.perf_counter() - request.queued_at)
+                    if not future.done():
+                        future.set_result(response)
+                finally:
+                    self.metrics.busy -= 1
+                    self.metrics.busy_seconds += time.perf_counter() - started
+            finally:
+                self.queue.task_done()
+
+    def _prepare(self, request: ConversionRequest) -> Tuple[BatchJob, str]:
+        """Write inline markdown to the job directory and plan the output location"""
+        job_dir = os.path.join(self.work_dir, request.id)
+        os.makedirs(job_dir)
+        if request.markdown is not None:
+            markdown_path = os.path.join(job_dir, f"{request.name}.md")
+            with open(markdown_path, 'w', encoding='utf-8') as file:
+                file.write(request.markdown)
+        else:
+            markdown_path = request.markdown_path
+            if not os.path.isfile(markdown_path):
+                raise ServiceError(404, f"Markdown file not found: {markdown_path}")
+        return BatchJob(markdown_path, request.output_dir or job_dir), job_dir
+
+    def _finish(self, request: ConversionRequest, result: BatchResult, job_dir: str) -> ConversionResponse:
+        """Turn a worker result into a response and remove the job directory"""
+        try:
+            if not result.ok:
+                raise ServiceError(500, result.error)
+            if request.output_dir:
+                return ConversionResponse(request.id, result.seconds, path=result.output_path)
+            with open(result.output_path, 'rb') as file:
+                return ConversionResponse(request.id, result.seconds, data=file.read())
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        return self.metrics.to_dict(self.queue.qsize() if self.queue else 0, self.queue_size)
+
+    # HTTP
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one HTTP/1.1 request per connection"""
+        try:
+            try:
+                method, path, body = await self._read_request(reader)
+                status, content_type, payload, headers = await self._route(method, path, body)
+            except ServiceError as e:
+                status, content_type, headers = e.status, 'application/json', {}
+                payload = json.dumps({'error': str(e)}).encode('utf-8')
+                if e.status == 503:
+                    headers['Retry-After'] = '1'
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as e:
+                logging.exception(f"Failed to handle request: {str(e)}")
+                status, content_type, headers = 500, 'application/json', {}
+                payload = json.dumps({'error': f"{type(e).__name__}: {str(e)}"}).encode('utf-8')
+            head = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+                    f"Content-Type: {content_type}", f"Content-Length: {len(payload)}", "Connection: close"]
+            head.extend(f"{name}: {value}" for name, value in headers.items())
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + payload)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) != 3:
+            raise ServiceError(400, "Malformed request line")
+        method, path, _ = request_line
+        length = 0
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-length':
+                value = value.strip()
+                if not (value.isascii() and value.isdigit()):
+                    raise ServiceError(400, f"Invalid Content-Length: {value!r}")
+                length = int(value)
+        if length > MAX_REQUEST_BYTES:
+            raise ServiceError(413, f"Request body exceeds {MAX_REQUEST_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b''
+        return method, path, body
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes, Dict[str, str]]:
+        if path == '/health':
+            return 200, 'application/json', b'{"status": "ok"}', {}
+        if path == '/metrics':
+            return 200, 'application/json', json.dumps(self.metrics_snapshot()).encode('utf-8'), {}
+        if path != '/convert':
+            raise ServiceError(404, f"No such endpoint: {path}")
+        if method != 'POST':
+            raise ServiceError(405, "Use POST /convert")
+
+        request = ConversionRequest.from_json(body)
+        response = await self.submit(request)
+        headers = {'X-Request-Id': response.request_id, 'X-Conversion-Seconds': f"{response.seconds:.3f}"}
+        if response.path is not None:
+            return 200, 'application/json', json.dumps({'path': response.path}).encode('utf-8'), headers
+        headers['Content-Disposition'] = content_disposition(f"{request.name}.docx")
+        return 200, DOCX_CONTENT_TYPE, response.data, headers
+
+
+async def serve(service: ConversionService, host: Optional[str], port: int, unix_socket: Optional[str]):
+    """Run the service until cancelled"""
+    await service.start(host, port, unix_socket)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the conversion service from the command line"""
+    parser = argparse.ArgumentParser(
+        prog='markdown_to_word.service',
+        description="Serve markdown to Word conversions over localhost HTTP or a Unix socket."
+    )
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="TCP port (default: 8765)")
+    parser.add_argument('--unix-socket', help="Listen on this Unix socket instead of TCP")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: number of CPUs)")
+    parser.add_argument('--queue-size', type=int, default=32, help="Jobs allowed to wait (default: 32)")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Seconds per job (default: 120)")
+    parser.add_argument('-b', '--backend', choices=sorted(BACKENDS), default='ooxml',
+                        help="Document backend (default: ooxml)")
+    parser.add_argument('--template-dir', help="Directory relative template names are resolved in")
+    parser.add_argument('--preload', action='append', default=[],
+                        help="Template to compile before accepting requests, repeatable")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    service = ConversionService(workers=args.workers, queue_size=args.queue_size, timeout=args.timeout,
+                                backend=args.backend, template_dir=args.template_dir, preload=args.preload)
+    host = None if args.unix_socket else args.host
+    try:
+        asyncio.run(serve(service, host, args.port, args.unix_socket))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
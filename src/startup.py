@@ -0,0 +1,150 @@
+# src/startup.py
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+from typing import Dict, List, Optional, Set, Tuple
+
+from .benchmark import write_corpus
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ENTRY_POINT = 'markdown_to_word'
+
+# Modules a headless conversion has no use for; importing any of them is a startup regression
+DEFERRED_MODULES = ('tkinter', 'win32com', 'pythoncom', 'yaml', 'asyncio', 'xml.sax', 'email', 'http.client')
+
+# Run in a child process: one conversion through the CLI, then report what it imported
+LOADED_MODULES_SCRIPT = """
+import sys, json
+from src.cli import main
+main(sys.argv[1:])
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def _run_python(args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+    """Run a fresh interpreter in the project root"""
+    return subprocess.run([sys.executable, *args], cwd=PROJECT_ROOT, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def import_times(module: str = f'{ENTRY_POINT}.__main__') -> List[Tuple[str, int, int]]:
+    """
+    Import a module in a fresh interpreter under -X importtime
+    Returns:
+        (module, self microseconds, cumulative microseconds) for every module imported, in import order
+    """
+    result = _run_python(['-X', 'importtime', '-c', f'import {module}'])
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def loaded_modules(template_path: str, markdown_path: str, output_dir: str,
+                   env: Optional[Dict[str, str]] = None) -> Set[str]:
+    """Modules a fresh interpreter has imported after converting one file through the CLI"""
+    result = _run_python(['-c', LOADED_MODULES_SCRIPT, template_path, markdown_path,
+                          '-o', output_dir, '-j', '1', '-q'], env)
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+def deferred_modules_loaded(modules: Set[str]) -> List[str]:
+    """The DEFERRED_MODULES, or their submodules, among modules"""
+    return sorted(name for name in modules
+                  if any(name == deferred or name.startswith(f'{deferred}.') for deferred in DEFERRED_MODULES))
+
+
+def time_to_first_document(template_path: str, markdown_path: str, output_dir: str, runs: int = 5) -> List[float]:
+    """
+    Wall time of python -m markdown_to_word converting one file, from process start to exit
+    Returns:
+        Seconds per run
+    """
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _run_python(['-m', ENTRY_POINT, template_path, markdown_path, '-o', output_dir, '-j', '1', '-q'])
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def interpreter_start(runs: int = 5) -> List[float]:
+    """Wall time of an interpreter that imports nothing, the floor under every invocation"""
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _run_python(['-c', 'pass'])
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def entry_point_import_ms(times: List[Tuple[str, int, int]]) -> float:
+    """Cumulative import time of the entry point, in milliseconds"""
+    return next((cumulative for name, _, cumulative in reversed(times)
+                 if name == f'{ENTRY_POINT}.__main__'), 0) / 1000
+
+
+def format_report(times: List[Tuple[str, int, int]], interpreter: List[float], conversion: List[float],
+                  deferred: List[str], top: int = 15) -> str:
+    """Import breakdown, startup timings and any deferred modules that were loaded"""
+    rows = [f"{'module':<40} {'self ms':>8} {'cumul. ms':>10}"]
+    for name, self_us, cumulative_us in sorted(times, key=lambda entry: -entry[1])[:top]:
+        rows.append(f"{name:<40} {self_us / 1000:8.1f} {cumulative_us / 1000:10.1f}")
+    summary = [
+        (f"Import of {ENTRY_POINT}", f"{entry_point_import_ms(times):.1f} ms ({len(times)} modules)"),
+        ("Interpreter start (median)", f"{statistics.median(interpreter) * 1000:.1f} ms"),
+        ("First document (median)", f"{statistics.median(conversion) * 1000:.1f} ms"),
+        ("Deferred modules loaded", ', '.join(deferred) or 'none'),
+    ]
+    rows.append('')
+    rows += [f"{label + ':':<32} {value}" for label, value in summary]
+    return '\n'.join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Measure startup from the command line, failing when it exceeds the budget"""
+    parser = argparse.ArgumentParser(
+        prog='markdown_to_word.startup',
+        description="Measure import time and time to the first converted document of the headless entry point."
+    )
+    parser.add_argument('template', help="Word template (.dotm or .dotx)")
+    parser.add_argument('--markdown', help="File to convert (default: a generated 1KB document)")
+    parser.add_argument('--runs', type=int, default=5, help="Conversions to time (default: 5)")
+    parser.add_argument('--top', type=int, default=15, help="Slowest modules to list (default: 15)")
+    parser.add_argument('--budget-ms', type=float,
+                        help="Fail when importing the entry point takes longer than this")
+    args = parser.parse_args(argv)
+
+    template_path = os.path.abspath(args.template)
+    with tempfile.TemporaryDirectory(prefix='markdown_to_word_startup_') as work_dir:
+        markdown_path = os.path.abspath(args.markdown or write_corpus(os.path.join(work_dir, 'sample.md'), 1024))
+        output_dir = os.path.join(work_dir, 'out')
+        # The first conversion may fill caches, e.g. the parsed logging config; later ones are what users see
+        loaded_modules(template_path, markdown_path, output_dir)
+        deferred = deferred_modules_loaded(loaded_modules(template_path, markdown_path, output_dir))
+        times = import_times()
+        conversion = time_to_first_document(template_path, markdown_path, output_dir, max(args.runs, 1))
+        interpreter = interpreter_start(max(args.runs, 1))
+
+    print(format_report(times, interpreter, conversion, deferred, args.top))
+    total_ms = entry_point_import_ms(times)
+    if deferred:
+        print(f"\nFAIL: a headless conversion imported {', '.join(deferred)}")
+        return 1
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\nFAIL: import took {total_ms:.1f} ms, budget is {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,19 @@
 # src/style_manager.py
 
+import os
+import json
+import hashlib
 import logging
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Optional, Tuple
+
+from .template_cache import get_template_cache
+from .utils import get_cache_dir
+
+if TYPE_CHECKING:
+    from .backends import DocumentBackend
+
+# Table styles tried for a table under a heading of level N, {level} filled in
+TABLE_STYLE_NAMES = ('Table {level}', 'Table 0', 'Table Grid')
 
 class StyleManager:
     """Manages Word document styles for markdown conversion"""
@@ -16,6 +28,10 @@ class StyleManager:
             'blockquote': 'Blockquote',
             'code': 'Code'
         }
+        # (element_type, level) -> resolved style name, see load_style_index
+        self.style_index: Optional[Dict[Tuple[str, int], str]] = None
+        # Indexes already loaded by this instance, so repeat conversions skip the disk cache
+        self.loaded_indexes: Dict[str, Dict[Tuple[str, int], str]] = {}
         logging.debug("StyleManager initialized")
 
     def get_style_name(self, element_type: str, level: Optional[int] = None) -> str:
@@ -31,63 +47,182 @@ class StyleManager:
         try:
             base_style = self.style_types[element_type.lower()]
             style_name = f"{base_style} {use_level}"
-            logging.debug(f"Generated style name: {style_name} for {element_type} level {use_level}")
+            logging.debug("Generated style name: %s for %s level %s", style_name, element_type, use_level)
             return style_name
         except KeyError:
             fallback = f"Body {use_level}"
             logging.warning(f"Unknown element type {element_type}, falling back to {fallback}")
             return fallback
 
-    def verify_style_exists(self, word_doc, style_name: str) -> bool:
+    def verify_style_exists(self, backend: 'DocumentBackend', style_name: str) -> bool:
         """
         Check if a style exists in the document
         Args:
-            word_doc: Word document object
+            backend: Document backend holding the document
             style_name: Name of the style to check
         Returns:
             bool: True if style exists, False otherwise
         """
         try:
-            _ = word_doc.Styles(style_name)
-            return True
+            return backend.style_exists(style_name)
         except Exception as e:
-            logging.debug(f"Style {style_name} not found: {str(e)}")
+            logging.debug("Style %s not found: %s", style_name, e)
             return False
 
-    def apply_style(self, word_doc, paragraph, style_type: str, level: Optional[int] = None) -> None:
+    def resolve_style_name(self, style_type: str, has_style: Callable[[str], bool],
+                           level: Optional[int] = None, quiet: bool = False) -> str:
+        """
+        Resolve the style to use through the fallback chain
+        Args:
+            style_type: Type of style to apply
+            has_style: Predicate telling whether a style name exists
+            level: Optional level override
+            quiet: Do not log the fallbacks taken
+        Returns:
+            str: Specific level style, else the level 0 style, else "Normal"
+        """
+        # Get the appropriate style name
+        style_name = self.get_style_name(style_type, level)
+        if has_style(style_name):
+            return style_name
+
+        # Try base style (level 0)
+        base_style = f"{self.style_types.get(style_type.lower(), 'Body')} 0"
+        if has_style(base_style):
+            if not quiet:
+                logging.info(f"Using base style: {base_style}")
+            return base_style
+
+        # Final fallback to Normal
+        if not quiet:
+            logging.warning(f"Neither {style_name} nor {base_style} found, falling back to Normal")
+        return "Normal"
+
+    def build_style_index(self, available_styles: Iterable[str]) -> Dict[Tuple[str, int], str]:
+        """
+        Resolve every (element type, level) pair through the fallback chain up front
+        Each style the template lacks is logged once, with the style used instead.
+        Args:
+            available_styles: Names of the styles the template defines
+        Returns:
+            dict: (element_type, level) -> style name to apply
+        """
+        available = {name.lower() for name in available_styles}
+        index: Dict[Tuple[str, int], str] = {}
+        for element_type in self.style_types:
+            for level in range(10):
+                style_name = self.resolve_style_name(
+                    element_type, lambda name: name.lower() in available, level, quiet=True
+                )
+                index[(element_type, level)] = style_name
+                wanted = self.get_style_name(element_type, level)
+                if style_name == 'Normal' and wanted != 'Normal':
+                    logging.warning(f"Style {wanted} not found, falling back to Normal")
+                elif style_name != wanted:
+                    logging.info(f"Style {wanted} not found, using base style {style_name}")
+        return index
+
+    def load_style_index(self, backend: 'DocumentBackend', template_path: str,
+                         cache_dir: Optional[str] = None) -> Dict[Tuple[str, int], str]:
+        """
+        Load the style index for a template, enumerating its styles only on a cache miss
+        Args:
+            backend: Document backend holding a document created from the template
+            template_path: Template file, whose content hash keys the on-disk cache
+            cache_dir: Cache directory, defaults to get_cache_dir('style_index')
+        Returns:
+            dict: The index, also stored in self.style_index
+        """
+        # The style type mapping is part of the key so editing it invalidates old entries
+        mapping_hash = hashlib.sha256(json.dumps(self.style_types, sort_keys=True).encode('utf-8')).hexdigest()
+        cache_key = f"{get_template_cache().sha256(template_path)}_{mapping_hash[:16]}"
+        if cache_key in self.loaded_indexes:
+            self.style_index = self.loaded_indexes[cache_key]
+            return self.style_index
+        cache_path = os.path.join(cache_dir or get_cache_dir('style_index'), f"{cache_key}.json")
+
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                entries = json.load(file)
+            self.style_index = {(element_type, level): name for element_type, level, name in entries}
+            self.loaded_indexes[cache_key] = self.style_index
+            logging.info(f"Loaded style index from cache: {cache_path}")
+            return self.style_index
+        except (OSError, ValueError):
+            pass
+
+        self.style_index = self.build_style_index(backend.list_styles())
+        self.loaded_indexes[cache_key] = self.style_index
+
+        # Write atomically so concurrent conversions never read a partial file
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump([[element_type, level, name] for (element_type, level), name
+                           in sorted(self.style_index.items())], file)
+            os.replace(tmp_path, cache_path)
+            logging.info(f"Saved style index to cache: {cache_path}")
+        except OSError as e:
+            logging.warning(f"Failed to save style index cache: {str(e)}")
+
+        return self.style_index
+
+    def lookup_style(self, backend: 'DocumentBackend', style_type: str, level: Optional[int] = None) -> str:
+        """
+        Get the style to apply, from the style index when one is loaded
+        Args:
+            backend: Document backend probed when the index has no entry
+            style_type: Type of style to apply
+            level: Optional level override
+        Returns:
+            str: The resolved style name
+        """
+        use_level = level if level is not None else self.current_level
+        if self.style_index is not None:
+            style_name = self.style_index.get((style_type.lower(), use_level))
+            if style_name is not None:
+                return style_name
+        return self.resolve_style_name(
+            style_type,
+            lambda name: self.verify_style_exists(backend, name),
+            level
+        )
+
+    def lookup_table_style(self, backend: 'DocumentBackend', level: Optional[int] = None) -> Optional[str]:
+        """
+        Find the table style for tables at a heading level
+        Args:
+            backend: Document backend probed for the candidate styles
+            level: Optional level override
+        Returns:
+            str: First of TABLE_STYLE_NAMES the document defines, None if none is
+        """
+        use_level = level if level is not None else self.current_level
+        for candidate in TABLE_STYLE_NAMES:
+            style_name = candidate.format(level=use_level)
+            if self.verify_style_exists(backend, style_name):
+                return style_name
+        logging.debug("No table style found for level %s", use_level)
+        return None
+
+    def apply_style(self, backend: 'DocumentBackend', paragraph, style_type: str, level: Optional[int] = None) -> None:
         """
         Apply style to paragraph with fallback handling
         Args:
-            word_doc: Word document object
-            paragraph: Paragraph object to style
+            backend: Document backend holding the document
+            paragraph: Paragraph handle to style
             style_type: Type of style to apply
             level: Optional level override
         """
         try:
-            # Get the appropriate style name
-            style_name = self.get_style_name(style_type, level)
-            
-            # Try to apply the specific level style
-            if self.verify_style_exists(word_doc, style_name):
-                paragraph.Range.Style = style_name
-                logging.info(f"Applied style: {style_name}")
-                return
-            
-            # Try base style (level 0)
-            base_style = f"{self.style_types.get(style_type.lower(), 'Body')} 0"
-            if self.verify_style_exists(word_doc, base_style):
-                paragraph.Range.Style = base_style
-                logging.info(f"Applied base style: {base_style}")
-                return
-            
-            # Final fallback to Normal
-            logging.warning(f"Neither {style_name} nor {base_style} found, falling back to Normal")
-            paragraph.Range.Style = "Normal"
+            style_name = self.lookup_style(backend, style_type, level)
+            backend.set_style(paragraph, style_name)
+            logging.debug("Applied style: %s", style_name)
             
         except Exception as e:
             logging.error(f"Failed to apply style {style_type}: {str(e)}")
             try:
-                paragraph.Range.Style = "Normal"
+                backend.set_style(paragraph, "Normal")
             except:
                 logging.error("Failed to apply Normal style as fallback")
 
@@ -98,7 +233,7 @@ class StyleManager:
             level: Heading level (1-9)
         """
         self.current_level = min(max(level, 0), 9)  # Ensure level is between 0 and 9
-        logging.debug(f"Set heading level to: {self.current_level}")
+        logging.debug("Set heading level to: %d", self.current_level)
 
     def get_current_level(self) -> int:
         """Get current heading level"""
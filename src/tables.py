@@ -0,0 +1,93 @@
+# src/tables.py
+
+import re
+from typing import List, Optional, Tuple
+
+# A delimiter row cell: dashes with optional colons marking the alignment
+DELIMITER_CELL = re.compile(r':?-+:?')
+
+# Cell separators, except escaped pipes
+CELL_SEPARATOR = re.compile(r'(?<!\\)\|')
+
+ALIGNMENTS = {(False, False): '', (True, False): 'left', (True, True): 'center', (False, True): 'right'}
+
+Spans = List[Tuple[int, int, str]]
+
+
+def split_row(line: str) -> List[str]:
+    """
+    Cells of a pipe table row
+    Args:
+        line: Stripped source line, with or without leading and trailing pipes
+    Returns:
+        Stripped cell texts, escaped pipes unescaped
+    """
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+    return [cell.strip().replace('\\|', '|') for cell in CELL_SEPARATOR.split(line)]
+
+
+def parse_delimiter_row(line: str) -> Optional[List[str]]:
+    """
+    Column alignments of a table delimiter row such as '| :--- | :---: |'
+    Returns:
+        One of '', 'left', 'center' or 'right' per column, or None if the line
+        is not a delimiter row
+    """
+    if '|' not in line or '-' not in line:
+        return None
+    alignments = []
+    for cell in split_row(line):
+        if not DELIMITER_CELL.fullmatch(cell):
+            return None
+        alignments.append(ALIGNMENTS[(cell.startswith(':'), cell.endswith(':'))])
+    return alignments
+
+
+class Table:
+    """
+    A table ready to emit, with cell formatting and styles resolved
+    Tables travel through the same stream as (text, style_name, spans)
+    paragraphs, so a backend writes each one in a single operation.
+    """
+
+    def __init__(self, rows: List[List[Tuple[str, Spans]]], alignments: List[str],
+                 style_name: Optional[str] = None, paragraph_style: str = 'Normal', header_rows: int = 1):
+        """
+        Args:
+            rows: Rows of (text, spans) cells, header rows first
+            alignments: '', 'left', 'center' or 'right' per column
+            style_name: Table style from the template, None to use plain borders
+            paragraph_style: Paragraph style of the cell text
+            header_rows: Leading rows repeated as the header on every page
+        """
+        self.rows = rows
+        self.alignments = alignments
+        self.style_name = style_name
+        self.paragraph_style = paragraph_style
+        self.header_rows = header_rows
+
+    @property
+    def columns(self) -> int:
+        return len(self.alignments)
+
+    def row_text(self, row: List[Tuple[str, Spans]], separator: str = '\t') -> Tuple[str, Spans]:
+        """
+        One row as separator-delimited text, for backends that build tables from text
+        Returns:
+            (text, spans) with the cell spans moved to row offsets
+        """
+        texts = []
+        spans = []
+        position = 0
+        for text, cell_spans in row:
+            text = text.replace(separator, ' ')
+            spans.extend((position + start, position + end, format_type) for start, end, format_type in cell_spans)
+            texts.append(text)
+            position += len(text) + len(separator)
+        return separator.join(texts), spans
+
+    def __repr__(self) -> str:
+        return f'Table({len(self.rows)}x{self.columns}, style={self.style_name!r})'
@@ -0,0 +1,125 @@
+# src/template_cache.py
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from .ooxml_writer import TemplatePackage
+from .utils import file_sha256
+
+# (absolute path, mtime in ns, size) identifies a template file without reading it
+TemplateKey = Tuple[str, int, int]
+
+
+def template_key(template_path: str) -> TemplateKey:
+    """Cache key of a template file, from its metadata only"""
+    path = os.path.abspath(template_path)
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+class TemplateCache:
+    """
+    LRU of compiled templates keyed by path, mtime and content hash
+    A lookup only stats the file. When the path or mtime changed, the file
+    is hashed and an already compiled template with the same content is
+    reused; it is parsed only when its content has never been seen.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        """
+        Args:
+            max_entries: Compiled templates kept before the least recently used is dropped
+        """
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[TemplateKey, TemplatePackage]' = OrderedDict()
+        self.hashes: Dict[TemplateKey, str] = {}  # Content hashes of templates that are not zip packages
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, template_path: str) -> TemplatePackage:
+        """
+        Get the compiled template for a file, compiling it on first use
+        Raises:
+            ValueError: The file is not an Office Open XML package
+        """
+        key = template_key(template_path)
+        with self.lock:
+            template = self.entries.get(key)
+            if template is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return template
+
+        content_hash = file_sha256(key[0])
+        with self.lock:
+            for other in self.entries.values():
+                if other.sha256 == content_hash:
+                    # Same content under another path or mtime, e.g. a touched or copied file
+                    self._store(key, other)
+                    self.hits += 1
+                    return other
+
+        template = TemplatePackage(key[0])
+        with self.lock:
+            self.misses += 1
+            self._store(key, template)
+        logging.info(f"Compiled template {key[0]}")
+        return template
+
+    def sha256(self, template_path: str) -> str:
+        """Content hash of any template, without rehashing unchanged files"""
+        key = template_key(template_path)
+        with self.lock:
+            template = self.entries.get(key)
+            if template is not None:
+                return template.sha256
+            content_hash = self.hashes.get(key)
+        if content_hash is None:
+            content_hash = file_sha256(key[0])
+            with self.lock:
+                self.hashes[key] = content_hash
+        return content_hash
+
+    def add(self, template: TemplatePackage):
+        """Seed the cache with a template compiled elsewhere, e.g. in the parent process"""
+        key = (os.path.abspath(template.template_path), template.mtime_ns, template.size)
+        with self.lock:
+            self._store(key, template)
+
+    def _store(self, key: TemplateKey, template: TemplatePackage):
+        self.entries[key] = template
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def templates(self) -> Iterable[TemplatePackage]:
+        """Distinct compiled templates, most recently used last"""
+        with self.lock:
+            return list({id(template): template for template in self.entries.values()}.values())
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hashes.clear()
+
+
+_default_cache: Optional[TemplateCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_template_cache() -> TemplateCache:
+    """Process-wide template cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TemplateCache()
+        return _default_cache
+
+
+def get_template(template_path: str) -> TemplatePackage:
+    """Compiled template from the process-wide cache"""
+    return get_template_cache().get(template_path)
@@ -0,0 +1,169 @@
+# src/tokenizer.py
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+from .tables import parse_delimiter_row, split_row
+
+# One compiled alternation classifies a line in a single match call
+LINE_PATTERN = re.compile(
+    r'(?P<fence>(?:`{3,}|~{3,}))(?P<info>.*)'
+    r'|(?P<hashes>#{1,9})\s+(?P<heading>.+?)(?:\s*>>\s*(?P<metadata>.*))?'
+    r'|[-*+]\s+(?P<bullet>.+)'
+    r'|\d+\.\s+(?P<numbered>.+)'
+    r'|>\s*(?P<blockquote>.+)'
+    r'|!\[(?P<alt>[^\]]*)\]\(\s*(?P<image><[^<>]+>|[^\s<>]+)(?:\s+["\'(].*["\')])?\s*\)'
+)
+
+# Prefix checks agreeing with LINE_PATTERN, for scanners that skip full tokenizing
+FENCE_PATTERN = re.compile(r'`{3,}|~{3,}')
+HEADING_PATTERN = re.compile(r'(#{1,9})\s+\S')
+
+TAB_WIDTH = 4
+
+
+@dataclass
+class Block:
+    """A block-level markdown element"""
+    kind: str           # heading, bullet, numbered, blockquote, code, table, image or body
+    text: str
+    level: int = 0      # Heading level 1-9, 0 for other blocks
+    depth: int = 0      # List nesting depth, 0 for top-level items
+    metadata: str = ''  # Text after '>>' on a heading
+    info: str = ''      # Info string after a code fence
+    line: int = 0       # 1-based source line the block starts on
+    rows: Optional[List[List[str]]] = None  # Table cells, header row first
+    alignments: Optional[List[str]] = None  # Table column alignments, see tables.parse_delimiter_row
+    src: str = ''       # Image path or URL as written, the text being its alt text
+
+
+def table_block(rows: List[List[str]], alignments: List[str], line: int) -> Block:
+    """Table Block, its text being the cells as plain tab-separated rows"""
+    return Block('table', '\n'.join('\t'.join(row) for row in rows), line=line, rows=rows, alignments=alignments)
+
+
+class BlockTokenizer:
+    """
+    Single-pass tokenizer turning markdown lines into Blocks
+    Lines are consumed one at a time, so the input may be any iterable of
+    lines, including an open file.
+    """
+
+    def __init__(self):
+        self.list_indents: List[int] = []
+
+    def list_depth(self, indent: int) -> int:
+        """Nesting depth of a list item from its indentation"""
+        while self.list_indents and self.list_indents[-1] > indent:
+            self.list_indents.pop()
+        if not self.list_indents or self.list_indents[-1] < indent:
+            self.list_indents.append(indent)
+        return len(self.list_indents) - 1
+
+    def tokenize(self, lines: Iterable[str]) -> Iterator[Block]:
+        """
+        Tokenize markdown lines
+        Args:
+            lines: Markdown source lines, with or without line endings
+        Returns:
+            Iterator of Blocks in document order
+        """
+        fence = None  # Opening fence marker while inside a code block
+        code_lines: List[str] = []
+        code_info = ''
+        code_start = 0
+        table_rows: Optional[List[List[str]]] = None  # Rows of the table being read
+        table_alignments: List[str] = []
+        table_start = 0
+        candidate = None  # (line number, text, cells) of a body line that may be a table header
+        self.list_indents = []
+
+        for number, line in enumerate(lines, 1):
+            line = line.rstrip('\r\n')
+            stripped = line.strip()
+
+            if fence is not None:
+                if stripped.startswith(fence):
+                    if code_lines:
+                        yield Block('code', '\n'.join(code_lines), info=code_info, line=code_start)
+                    fence = None
+                else:
+                    code_lines.append(line)
+                continue
+
+            if table_rows is not None:
+                # Rows continue until a blank line or the start of another block
+                if stripped and ('|' in stripped or not LINE_PATTERN.fullmatch(stripped)):
+                    cells = split_row(stripped)
+                    columns = len(table_alignments)
+                    table_rows.append(cells[:columns] + [''] * (columns - len(cells)))
+                    continue
+                yield table_block(table_rows, table_alignments, table_start)
+                table_rows = None
+
+            if candidate is not None:
+                # A header row becomes a table only when a matching delimiter row follows
+                header_number, header_text, header_cells = candidate
+                candidate = None
+                alignments = parse_delimiter_row(stripped)
+                if alignments is not None and len(alignments) == len(header_cells):
+                    table_rows, table_alignments, table_start = [header_cells], alignments, header_number
+                    continue
+                yield Block('body', header_text, line=header_number)
+
+            if not stripped:
+                continue
+
+            match = LINE_PATTERN.fullmatch(stripped)
+            kind = match.lastgroup if match else None
+
+            if match and match.group('fence'):
+                fence = match.group('fence')
+                code_info = match.group('info').strip()
+                code_lines = []
+                code_start = number
+                continue
+
+            if kind in ('bullet', 'numbered'):
+                indent = len(line.expandtabs(TAB_WIDTH)) - len(line.expandtabs(TAB_WIDTH).lstrip())
+                yield Block(kind, match.group(kind), depth=self.list_depth(indent), line=number)
+                continue
+
+            self.list_indents = []
+            if match and match.group('hashes'):
+                yield Block('heading', match.group('heading'), level=len(match.group('hashes')),
+                            metadata=(match.group('metadata') or '').strip(), line=number)
+            elif kind == 'blockquote':
+                yield Block('blockquote', match.group('blockquote').strip(), line=number)
+            elif kind == 'image':
+                yield Block('image', match.group('alt').strip(), src=match.group('image').strip('<>'), line=number)
+            elif '|' in stripped:
+                candidate = (number, stripped, split_row(stripped))
+            else:
+                yield Block('body', stripped, line=number)
+
+        if table_rows is not None:
+            yield table_block(table_rows, table_alignments, table_start)
+        if candidate is not None:
+            yield Block('body', candidate[1], line=candidate[0])
+        # An unterminated fence runs to the end of the document
+        if fence is not None and code_lines:
+            yield Block('code', '\n'.join(code_lines), info=code_info, line=code_start)
+
+
+def tokenize(lines: Iterable[str]) -> Iterator[Block]:
+    """Tokenize markdown lines into Blocks"""
+    return BlockTokenizer().tokenize(lines)
+
+
+def parse_markdown(content: str) -> List[Block]:
+    """Parse a markdown string into its list of Blocks"""
+    return list(tokenize(content.splitlines()))
+
+
+def parse_line(line: str) -> Optional[Block]:
+    """Classify one line outside any code block, None for blank lines"""
+    for block in tokenize([line]):
+        return block
+    return None
@@ -0,0 +1,345 @@
+# src/tracing.py
+
+import os
+import json
+import time
+import inspect
+import threading
+from collections import Counter
+from functools import wraps
+from typing import Any, Dict, Iterable, List
+
+# Backend methods timed and counted when a backend is instrumented
+TRACED_BACKEND_METHODS = (
+    'start', 'open', 'clear', 'add_paragraph', 'style_exists', 'list_styles', 'set_style', 'format_span',
+    'add_table', 'add_image', 'write_paragraphs', 'stream_paragraphs', 'save', 'close', 'quit',
+)
+
+# Word object model members and the type of object they return, for readable call counts
+COM_TYPE_NAMES = {
+    'ActiveDocument': 'Document',
+    'Add': 'Document',
+    'AddPicture': 'InlineShape',
+    'Application': 'Application',
+    'Content': 'Range',
+    'Item': 'Paragraph',
+    'Range': 'Range',
+}
+
+# Values COM returns by value; anything else is an object worth counting calls on
+PLAIN_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+class DocumentTrace:
+    """Stage timings, call counts and trace events of one conversion"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pid = os.getpid()
+        self.started = time.time()
+        self.seconds = 0.0
+        self.stages: Dict[str, List[float]] = {}  # name -> [seconds, calls]
+        self.calls: Counter = Counter()
+        self.events: List[Dict[str, Any]] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'document': self.name,
+            'pid': self.pid,
+            'seconds': self.seconds,
+            'stages': {name: {'seconds': seconds, 'calls': int(calls)}
+                       for name, (seconds, calls) in self.stages.items()},
+            'calls': dict(self.calls.most_common()),
+        }
+
+
+class Span:
+    """Context manager timing one stage into the current DocumentTrace"""
+
+    __slots__ = ('tracer', 'name', 'category', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.category, self.start, time.perf_counter() - self.start)
+
+
+class NullSpan:
+    """Span that does nothing, shared by every disabled tracer"""
+
+    def __enter__(self) -> 'NullSpan':
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """
+    Collects per-document stage timings and backend/COM call counts
+    Each conversion is wrapped in document(); spans and counts recorded
+    while it runs are attributed to that document. Individual trace events
+    are kept only when record_events is set, since a large document
+    produces several events per paragraph.
+    """
+
+    enabled = True
+
+    def __init__(self, record_events: bool = False):
+        """
+        Args:
+            record_events: Keep every span for Chrome trace export
+        """
+        self.record_events = record_events
+        self.documents: List[DocumentTrace] = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @property
+    def current(self) -> DocumentTrace:
+        """Trace of the document being converted on this thread"""
+        current = getattr(self.local, 'document', None)
+        if current is None:
+            current = self.local.document = DocumentTrace('(no document)')
+            with self.lock:
+                self.documents.append(current)
+        return current
+
+    def document(self, name: str) -> 'DocumentScope':
+        """Context manager attributing everything recorded inside it to one document"""
+        return DocumentScope(self, name)
+
+    def span(self, name: str, category: str = 'stage') -> Span:
+        """Context manager timing a stage"""
+        return Span(self, name, category)
+
+    def record(self, name: str, category: str, start: float, seconds: float):
+        """Add a finished span to the current document"""
+        current = self.current
+        stage = current.stages.get(name)
+        if stage is None:
+            current.stages[name] = [seconds, 1]
+        else:
+            stage[0] += seconds
+            stage[1] += 1
+        if self.record_events:
+            current.events.append({
+                'name': name, 'cat': category, 'ph': 'X',
+                'ts': start * 1e6, 'dur': seconds * 1e6,
+                'pid': current.pid, 'tid': threading.get_ident(),
+            })
+
+    def count(self, name: str, calls: int = 1):
+        """Count a backend or COM call"""
+        self.current.calls[name] += calls
+
+    def add_documents(self, documents: Iterable[DocumentTrace]):
+        """Merge traces collected elsewhere, e.g. in a worker process"""
+        with self.lock:
+            self.documents.extend(documents)
+
+    def take_documents(self) -> List[DocumentTrace]:
+        """Remove and return the finished document traces"""
+        with self.lock:
+            documents, self.documents = self.documents, []
+        return documents
+
+    def summary(self) -> Dict[str, Any]:
+        """Machine-readable per-document and total stage timings and call counts"""
+        stages: Dict[str, List[float]] = {}
+        calls: Counter = Counter()
+        for document in self.documents:
+            for name, (seconds, count) in document.stages.items():
+                total = stages.setdefault(name, [0.0, 0])
+                total[0] += seconds
+                total[1] += count
+            calls.update(document.calls)
+        return {
+            'documents': [document.to_dict() for document in self.documents],
+            'totals': {
+                'documents': sum(1 for document in self.documents if document.name != '(no document)'),
+                'seconds': sum(document.seconds for document in self.documents),
+                'stages': {name: {'seconds': seconds, 'calls': int(count)}
+                           for name, (seconds, count) in stages.items()},
+                'calls': dict(calls.most_common()),
+            },
+        }
+
+    def write_summary(self, path: str):
+        """Write summary() as JSON"""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.summary(), file, indent=2)
+
+    def write_chrome_trace(self, path: str):
+        """
+        Write recorded spans in Chrome trace-event format
+        Timestamps come from the system-wide monotonic clock, so documents
+        converted in different worker processes line up. Open the file in
+        chrome://tracing or https://ui.perfetto.dev.
+        """
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': f'markdown_to_word {pid}'}}
+                  for pid in sorted({document.pid for document in self.documents})]
+        for document in self.documents:
+            events.extend(document.events)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+
+class DocumentScope:
+    """Makes a new DocumentTrace current for the duration of a conversion"""
+
+    def __init__(self, tracer: Tracer, name: str):
+        self.tracer = tracer
+        self.trace = DocumentTrace(name)
+
+    def __enter__(self) -> DocumentTrace:
+        self.previous = getattr(self.tracer.local, 'document', None)
+        self.tracer.local.document = self.trace
+        self.start = time.perf_counter()
+        return self.trace
+
+    def __exit__(self, *exc_info):
+        self.trace.seconds = time.perf_counter() - self.start
+        if self.tracer.record_events:
+            self.trace.events.insert(0, {
+                'name': os.path.basename(self.trace.name), 'cat': 'document', 'ph': 'X',
+                'ts': self.start * 1e6, 'dur': self.trace.seconds * 1e6,
+                'pid': self.trace.pid, 'tid': threading.get_ident(),
+                'args': {'path': self.trace.name, 'calls': dict(self.trace.calls)},
+            })
+        self.tracer.local.document = self.previous
+        with self.tracer.lock:
+            self.tracer.documents.append(self.trace)
+
+
+class NullTracer(Tracer):
+    """Tracer that records nothing, so untraced conversions pay almost nothing"""
+
+    enabled = False
+
+    def __init__(self):
+        super().__init__()
+
+    def document(self, name: str) -> NullSpan:
+        return NULL_SPAN
+
+    def span(self, name: str, category: str = 'stage') -> NullSpan:
+        return NULL_SPAN
+
+    def record(self, name: str, category: str, start: float, seconds: float):
+        pass
+
+    def count(self, name: str, calls: int = 1):
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+
+class ComCallCounter:
+    """
+    Proxy around a COM object counting every member access as one call
+    Objects returned by the wrapped object are wrapped as well, labelled by
+    the member they came from, so counts read like 'Selection.TypeParagraph'
+    or 'Range.Style'.
+    """
+
+    __slots__ = ('_target', '_label', '_tracer')
+
+    def __init__(self, target: object, tracer: Tracer, label: str = 'Application'):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_label', label)
+        object.__setattr__(self, '_tracer', tracer)
+
+    def _wrap(self, value: object, label: str) -> object:
+        if isinstance(value, PLAIN_TYPES):
+            return value
+        return ComCallCounter(value, self._tracer, COM_TYPE_NAMES.get(label, label))
+
+    def __getattr__(self, name: str) -> object:
+        self._tracer.count(f'{self._label}.{name}')
+        value = getattr(self._target, name)
+        if inspect.isroutine(value):
+            @wraps(value)
+            def call(*args, **kwargs):
+                args, kwargs = _unwrap_arguments(args, kwargs)
+                return self._wrap(value(*args, **kwargs), name)
+            return call
+        return self._wrap(value, name)
+
+    def __setattr__(self, name: str, value: object):
+        self._tracer.count(f'{self._label}.{name}')
+        setattr(self._target, name, _unwrap(value))
+
+    def __call__(self, *args, **kwargs) -> object:
+        args, kwargs = _unwrap_arguments(args, kwargs)
+        return self._wrap(self._target(*args, **kwargs), self._label)
+
+    def __iter__(self):
+        for item in self._target:
+            yield self._wrap(item, self._label)
+
+    def __bool__(self) -> bool:
+        return bool(self._target)
+
+    def __repr__(self) -> str:
+        return f'ComCallCounter({self._label}, {self._target!r})'
+
+
+def _unwrap(value: object) -> object:
+    """The COM object behind a ComCallCounter; COM cannot marshal the proxy itself"""
+    return value._target if isinstance(value, ComCallCounter) else value
+
+
+def _unwrap_arguments(args: tuple, kwargs: Dict[str, Any]) -> tuple:
+    return tuple(_unwrap(arg) for arg in args), {name: _unwrap(arg) for name, arg in kwargs.items()}
+
+
+def instrument_backend(backend: object, tracer: Tracer) -> object:
+    """
+    Time and count every DocumentBackend call made on one backend instance
+    Methods are wrapped on the instance, so the backend keeps its type and
+    attributes. A Word application is additionally wrapped in a
+    ComCallCounter once the backend has started it.
+    Returns:
+        The same backend
+    """
+    for method_name in TRACED_BACKEND_METHODS:
+        method = getattr(backend, method_name, None)
+        if method is None:
+            continue
+        setattr(backend, method_name, _traced(method, f'backend.{method_name}', tracer))
+
+    if hasattr(backend, 'word_app'):
+        start = backend.start
+
+        @wraps(start)
+        def start_and_count():
+            start()
+            if backend.word_app is not None and not isinstance(backend.word_app, ComCallCounter):
+                backend.word_app = ComCallCounter(backend.word_app, tracer)
+        backend.start = start_and_count
+    return backend
+
+
+def _traced(method, name: str, tracer: Tracer):
+    """Wrap a bound method in a span and a call count"""
+    @wraps(method)
+    def traced(*args, **kwargs):
+        tracer.count(name)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            tracer.record(name, 'backend', start, time.perf_counter() - start)
+    return traced
@@ -1,10 +1,20 @@
 # src/utils.py
 
 import os
+import json
+import queue
+import atexit
+import hashlib
 import logging
-import logging.handlers  # Add this import
-import yaml
+import logging.config
+import logging.handlers
+import threading
 from datetime import datetime
+from typing import Optional
+
+CACHE_DIR_ENV = 'MARKDOWN_TO_WORD_CACHE_DIR'
+LOG_FILE_ENV = 'MARKDOWN_TO_WORD_LOG_FILE'
+DEFAULT_LOG_FILE = 'markdown_to_word_debug.log'
 
 def create_unique_filename(markdown_path: str, output_dir: str) -> str:
     """Generate unique output filename with timestamp"""
@@ -13,47 +23,141 @@ def create_unique_filename(markdown_path: str, output_dir: str) -> str:
     new_filename = f"{timestamp}_{markdown_name}.docx"
     return os.path.join(output_dir, new_filename)
 
-def setup_logging():
-    """Setup logging configuration"""
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'logging_config.yaml')
-    
-    if os.path.exists(config_path):
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def get_cache_dir(name: str) -> str:
+    """
+    Get (and create) a named cache directory
+    Args:
+        name: Subdirectory for one kind of cached data
+    Returns:
+        str: $MARKDOWN_TO_WORD_CACHE_DIR/name, or ~/.cache/markdown_to_word/name
+    """
+    base_dir = os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.expanduser('~'), '.cache', 'markdown_to_word')
+    cache_dir = os.path.join(base_dir, name)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+# Set by setup_logging in the process that configured logging
+_logging_listener: Optional[logging.handlers.QueueListener] = None
+_logging_pid: Optional[int] = None
+_logging_lock = threading.Lock()
+
+LOGGING_CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config', 'logging_config.yaml')
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so the record needs no pickling
+        return record
+
+def setup_logging(config_path: Optional[str] = None, force: bool = False):
+    """
+    Configure logging once per process from config/logging_config.yaml
+    The handlers defined in the config file are moved behind a QueueHandler
+    and run on a background QueueListener thread, so formatting and disk
+    writes stay off the conversion hot path. Calling this again is a no-op,
+    except in a forked child, which gets its own listener.
+    Args:
+        config_path: dictConfig YAML file, defaults to config/logging_config.yaml,
+                     whose log file $MARKDOWN_TO_WORD_LOG_FILE replaces when set
+        force: Reconfigure even if logging is already set up
+    """
+    global _logging_listener, _logging_pid
+    with _logging_lock:
+        if _logging_pid == os.getpid() and not force:
+            return
+        _stop_listener()
+
+        log_file = None if config_path else os.environ.get(LOG_FILE_ENV)
+        config_path = config_path or LOGGING_CONFIG_PATH
         try:
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-                
-            # Configure logging manually
-            formatter = logging.Formatter(config['formatters']['detailed']['format'])
-            
-            # Console handler
-            console_handler = logging.StreamHandler()
-            console_handler.setLevel(logging.DEBUG)
-            console_handler.setFormatter(formatter)
-            
-            # File handler
-            file_handler = logging.FileHandler("markdown_to_word_debug.log")
-            file_handler.setLevel(logging.DEBUG)
-            file_handler.setFormatter(formatter)
-            
-            # Root logger
-            root_logger = logging.getLogger()
-            root_logger.setLevel(logging.DEBUG)
-            root_logger.addHandler(console_handler)
-            root_logger.addHandler(file_handler)
-            
+            config = load_logging_config(config_path)
+            if log_file:
+                for handler in config.get('handlers', {}).values():
+                    if 'filename' in handler:
+                        handler['filename'] = log_file
+            logging.config.dictConfig(config)
+            config_error = None
         except Exception as e:
             _setup_default_logging()
-            logging.warning(f"Failed to load logging config, using defaults: {str(e)}")
-    else:
-        _setup_default_logging()
+            config_error = e
+
+        root_logger = logging.getLogger()
+        handlers = [handler for handler in root_logger.handlers
+                    if not isinstance(handler, logging.handlers.QueueHandler)]
+        log_queue: 'queue.SimpleQueue[logging.LogRecord]' = queue.SimpleQueue()
+        for handler in list(root_logger.handlers):
+            root_logger.removeHandler(handler)
+        root_logger.addHandler(DeferredQueueHandler(log_queue))
+
+        _logging_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _logging_listener.start()
+        _logging_pid = os.getpid()
+
+    if config_error is not None:
+        logging.warning("Failed to load logging config %s, using defaults: %s", config_path, config_error)
+
+def load_logging_config(config_path: str) -> dict:
+    """
+    Read a dictConfig YAML file through a JSON copy in the cache
+    PyYAML takes longer to import than a short conversion takes to run, so
+    it is only imported when the file changed since it was last read.
+    """
+    stat = os.stat(config_path)
+    key = f"{os.path.abspath(config_path)}:{stat.st_mtime_ns}:{stat.st_size}"
+    cache_path = os.path.join(get_cache_dir('logging_config'),
+                              f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}.json")
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    import yaml
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f)
+    try:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError):
+        pass  # Not JSON-compatible or not writable, parsed again next time
+    return config
+
+def _stop_listener():
+    """Flush and stop the listener this process started, if any"""
+    global _logging_listener, _logging_pid
+    if _logging_listener is not None and _logging_pid == os.getpid():
+        _logging_listener.stop()
+        for handler in _logging_listener.handlers:
+            handler.close()
+    _logging_listener = None
+    _logging_pid = None
+
+def shutdown_logging():
+    """Write out queued records and stop the background writer"""
+    with _logging_lock:
+        _stop_listener()
+
+atexit.register(shutdown_logging)
 
 def _setup_default_logging():
     """Setup default logging if config file is unavailable"""
     logging.basicConfig(
-        level=logging.DEBUG,
+        level=logging.INFO,
         format="%(asctime)s - %(levelname)s - %(message)s",
         handlers=[
             logging.StreamHandler(),
-            logging.FileHandler("markdown_to_word_debug.log"),
+            logging.FileHandler(os.environ.get(LOG_FILE_ENV) or DEFAULT_LOG_FILE),
         ],
-    )
\ No newline at end of file
+        force=True,
+    )
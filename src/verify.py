@@ -0,0 +1,479 @@
+# src/verify.py
+
+import os
+import sys
+import time
+import zipfile
+import argparse
+import logging
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import zip_longest
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .backends import create_backend
+from .converter import read_markdown_lines
+from .formatters import TextFormatter
+from .images import Image
+from .ooxml_writer import DOCUMENT_PART, INVALID_XML_CHARS, W
+from .style_manager import StyleManager
+from .tables import Table
+from .template_cache import get_template
+from .tokenizer import tokenize
+
+STYLES_PART = 'word/styles.xml'
+WP = '{http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing}'
+
+# Fonts a run is set in when it holds inline code
+CODE_FONTS = ('Consolas',)
+
+# Mismatches kept per document; later ones are only counted
+MAX_MISMATCHES = 20
+
+Spans = List[Tuple[int, int, str]]
+
+
+class DocxParagraph:
+    """Text, style and character formatting of one paragraph"""
+
+    __slots__ = ('text', 'style', 'spans', 'image')
+
+    def __init__(self, text: str, style: Optional[str], spans: Spans, image: Optional[str] = None):
+        self.text = text
+        self.style = style  # Style name, None when the paragraph has the default style
+        self.spans = spans  # Merged (start, end, format_type) runs, as parse_inline reports them
+        self.image = image  # Alternative text of an inline picture, None without one
+
+    def describe(self) -> str:
+        if self.image is not None:
+            return f"image [{self.image}] ({self.style})"
+        return f"{self.text[:60]!r} ({self.style})"
+
+
+class DocxTable:
+    """Style and cell text of one table"""
+
+    __slots__ = ('style', 'rows')
+
+    def __init__(self, style: Optional[str], rows: List[List[str]]):
+        self.style = style
+        self.rows = rows
+
+    def describe(self) -> str:
+        return f"table of {len(self.rows)} rows ({self.style})"
+
+
+BodyItem = Union[DocxParagraph, DocxTable]
+
+
+def merge_spans(spans: Iterable[Tuple[int, int, str]]) -> Spans:
+    """Spans as they end up in a document: sorted, overlaps dropped, touching spans of one format joined"""
+    merged: Spans = []
+    position = 0
+    for start, end, format_type in sorted(spans):
+        if start < position or start >= end:
+            continue  # Overlapping spans keep the first format, as the writer does
+        if merged and merged[-1][1] == start and merged[-1][2] == format_type:
+            merged[-1] = (merged[-1][0], end, format_type)
+        else:
+            merged.append((start, end, format_type))
+        position = end
+    return merged
+
+
+def _on(element: Optional[ET.Element]) -> bool:
+    """Whether a toggle property such as <w:b/> is present and not switched off"""
+    return element is not None and element.get(f'{W}val', 'true') not in ('0', 'false', 'off')
+
+
+def run_format(properties: Optional[ET.Element]) -> Optional[str]:
+    """Format type of a run from its <w:rPr>, None for plain text"""
+    if properties is None:
+        return None
+    fonts = properties.find(f'{W}rFonts')
+    if fonts is not None and fonts.get(f'{W}ascii') in CODE_FONTS:
+        return 'code'
+    bold, italic = _on(properties.find(f'{W}b')), _on(properties.find(f'{W}i'))
+    if bold and italic:
+        return 'bold-italic'
+    return 'bold' if bold else 'italic' if italic else None
+
+
+def read_paragraph(element: ET.Element, style_names: Dict[str, str]) -> DocxParagraph:
+    """DocxParagraph of a <w:p> element"""
+    style_element = element.find(f'{W}pPr/{W}pStyle')
+    style = None
+    if style_element is not None:
+        style_id = style_element.get(f'{W}val')
+        style = style_names.get(style_id, style_id)
+    parts: List[str] = []
+    spans: Spans = []
+    image = None
+    position = 0
+    for run in element.iter(f'{W}r'):
+        format_type = run_format(run.find(f'{W}rPr'))
+        start = position
+        for child in run:
+            if child.tag == f'{W}t':
+                text = child.text or ''
+            elif child.tag == f'{W}tab':
+                text = '\t'
+            elif child.tag in (f'{W}br', f'{W}cr'):
+                text = '\n'
+            else:
+                if child.tag == f'{W}drawing':
+                    properties = next(child.iter(f'{WP}docPr'), None)
+                    image = properties.get('descr', '') if properties is not None else ''
+                continue
+            parts.append(text)
+            position += len(text)
+        if format_type and position > start:
+            spans.append((start, position, format_type))
+    return DocxParagraph(''.join(parts), style, merge_spans(spans), image)
+
+
+def read_table(element: ET.Element, style_names: Dict[str, str]) -> DocxTable:
+    """DocxTable of a <w:tbl> element, each cell's paragraphs joined by line feeds"""
+    style_element = element.find(f'{W}tblPr/{W}tblStyle')
+    style = None
+    if style_element is not None:
+        style_id = style_element.get(f'{W}val')
+        style = style_names.get(style_id, style_id)
+    rows = [[('\n'.join(read_paragraph(paragraph, style_names).text for paragraph in cell.iter(f'{W}p')))
+             for cell in row.iter(f'{W}tc')]
+            for row in element.iter(f'{W}tr')]
+    return DocxTable(style, rows)
+
+
+class DocxReader:
+    """
+    Streams the body of a .docx as DocxParagraph and DocxTable items
+    word/document.xml is read with an incremental parser and every body
+    element is dropped once read, so memory use depends on the largest
+    paragraph or table rather than on the size of the document.
+    """
+
+    def __init__(self, docx_path: str):
+        self.docx_path = docx_path
+        self.style_names: Dict[str, str] = {}
+        self.default_style: Optional[str] = None
+        with zipfile.ZipFile(docx_path) as package:
+            if STYLES_PART in package.namelist():
+                self._load_styles(package.read(STYLES_PART))
+
+    def _load_styles(self, styles_xml: bytes):
+        """Map style IDs to names and find the default paragraph style"""
+        for style in ET.fromstring(styles_xml).iter(f'{W}style'):
+            name = style.find(f'{W}name')
+            if name is None:
+                continue
+            self.style_names[style.get(f'{W}styleId')] = name.get(f'{W}val')
+            if style.get(f'{W}type') == 'paragraph' and style.get(f'{W}default') in ('1', 'true', 'on'):
+                self.default_style = name.get(f'{W}val')
+
+    def __iter__(self) -> Iterator[BodyItem]:
+        with zipfile.ZipFile(self.docx_path) as package, package.open(DOCUMENT_PART) as stream:
+            body = None
+            depth = 0  # Open elements below <w:body>
+            for event, element in ET.iterparse(stream, events=('start', 'end')):
+                if event == 'start':
+                    if body is not None:
+                        depth += 1
+                    elif element.tag == f'{W}body':
+                        body = element
+                    continue
+                if body is None:
+                    continue
+                if element is body:
+                    return
+                depth -= 1
+                if depth:
+                    continue
+                if element.tag == f'{W}p':
+                    yield read_paragraph(element, self.style_names)
+                elif element.tag == f'{W}tbl':
+                    yield read_table(element, self.style_names)
+                body.remove(element)
+
+
+def extract_text(docx_path: str) -> Iterator[Tuple[Optional[str], str]]:
+    """
+    (style name, text) of every body paragraph of a .docx, in order
+    Tables come out as one item each, their cells separated by tabs and
+    their rows by line feeds, with the table style as style name.
+    """
+    reader = DocxReader(docx_path)
+    for item in reader:
+        if isinstance(item, DocxTable):
+            yield item.style, '\n'.join('\t'.join(row) for row in item.rows)
+        else:
+            yield item.style or reader.default_style, item.text
+
+
+class Mismatch:
+    """A body item of the document that differs from what the markdown converts to"""
+
+    def __init__(self, index: int, message: str, expected: Optional[BodyItem], actual: Optional[BodyItem]):
+        self.index = index  # Position in the body, counting paragraphs and tables
+        self.message = message
+        self.expected = expected
+        self.actual = actual
+
+    def __str__(self) -> str:
+        expected = self.expected.describe() if self.expected is not None else 'nothing'
+        actual = self.actual.describe() if self.actual is not None else 'nothing'
+        return f"item {self.index}: {self.message}: expected {expected}, found {actual}"
+
+
+class VerificationResult:
+    """Outcome of checking one document against its markdown"""
+
+    def __init__(self, markdown_path: str, docx_path: str, items: int = 0,
+                 mismatches: Optional[List[Mismatch]] = None, mismatch_count: int = 0,
+                 error: Optional[str] = None, seconds: float = 0.0):
+        self.markdown_path = markdown_path
+        self.docx_path = docx_path
+        self.items = items
+        self.mismatches = mismatches or []  # The first MAX_MISMATCHES
+        self.mismatch_count = mismatch_count
+        self.error = error
+        self.seconds = seconds
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.mismatch_count == 0
+
+
+def compare_items(expected: Optional[BodyItem], actual: Optional[BodyItem],
+                  default_style: Optional[str]) -> Optional[str]:
+    """What differs between an expected and an actual body item, None when they match"""
+    if expected is None:
+        return "unexpected item"
+    if actual is None:
+        return "missing item"
+    if type(expected) is not type(actual):
+        return "paragraph and table swapped"
+    same_style = ((expected.style or default_style or '').casefold() ==
+                  (actual.style or default_style or '').casefold())
+    if isinstance(expected, DocxTable):
+        if not same_style:
+            return "different table style"
+        if expected.rows != actual.rows:
+            return "different cells"
+        return None
+    if (expected.image is None) != (actual.image is None):
+        return "image and paragraph swapped"
+    if expected.image is not None and expected.image != actual.image:
+        return "different image text"
+    if not same_style:
+        return "different style"
+    if expected.text != actual.text:
+        return "different text"
+    if expected.spans != actual.spans:
+        return "different formatting"
+    return None
+
+
+class DocumentVerifier:
+    """
+    Checks .docx files against the markdown they were converted from
+    The markdown is tokenized and styled the way the converter does it,
+    against the same template, and compared item by item with the body
+    read by DocxReader. Both sides are streamed, so a document is checked
+    in bounded memory. One verifier is reused for many documents, keeping
+    the template and its style index loaded.
+    """
+
+    def __init__(self, template_path: str, max_mismatches: int = MAX_MISMATCHES):
+        """
+        Args:
+            template_path: Template the documents were converted with
+            max_mismatches: Mismatches kept per document
+        """
+        self.template_path = os.path.abspath(template_path)
+        self.template = get_template(self.template_path)
+        self.max_mismatches = max_mismatches
+        self.backend = create_backend('ooxml')
+        self.backend.open(self.template_path)
+        self.style_manager = StyleManager()
+        self.style_manager.load_style_index(self.backend, self.template_path)
+        self.text_formatter = TextFormatter()
+
+    def expected_item(self, item: Union[Table, Image, Tuple[str, str, Spans]]) -> BodyItem:
+        """What the writer renders for an item of the converter's paragraph stream"""
+        if isinstance(item, Table):
+            style = item.style_name if item.style_name and self.template.has_table_style(item.style_name) else None
+            return DocxTable(style, [[INVALID_XML_CHARS.sub('', text) for text, _ in row] for row in item.rows])
+        if isinstance(item, Image):
+            style = item.style_name if self.template.has_style(item.style_name) else None
+            return DocxParagraph('', style, [], item.alt)
+        text, style_name, spans = item
+        style = style_name if self.template.has_style(style_name) else None
+        return DocxParagraph(INVALID_XML_CHARS.sub('', text), style, merge_spans(spans))
+
+    def expected(self, markdown_path: str) -> Iterator[BodyItem]:
+        """Body items markdown_path should convert to"""
+        with open(markdown_path, 'r', encoding='utf-8') as file:
+            self.style_manager.current_level = 0
+            self.text_formatter.base_dir = os.path.dirname(os.path.abspath(markdown_path))
+            stream = self.text_formatter.iter_block_paragraphs(
+                self.backend, tokenize(read_markdown_lines(file)), self.style_manager)
+            for item in stream:
+                yield self.expected_item(item)
+
+    def verify(self, markdown_path: str, docx_path: str) -> VerificationResult:
+        """
+        Compare a document with its markdown
+        Returns:
+            VerificationResult listing the items that differ
+        Raises:
+            OSError, ValueError, zipfile.BadZipFile, ET.ParseError: A file is unreadable
+        """
+        start = time.perf_counter()
+        reader = DocxReader(docx_path)
+        result = VerificationResult(markdown_path, docx_path)
+        for index, (expected, actual) in enumerate(zip_longest(self.expected(markdown_path), reader)):
+            if isinstance(actual, DocxParagraph) and expected is None and not actual.text and actual.image is None:
+                continue  # The empty paragraph Word requires after a final table
+            result.items += 1
+            message = compare_items(expected, actual, reader.default_style)
+            if message is None:
+                continue
+            result.mismatch_count += 1
+            if len(result.mismatches) < self.max_mismatches:
+                result.mismatches.append(Mismatch(index, message, expected, actual))
+        result.seconds = time.perf_counter() - start
+        return result
+
+
+# Verifier reused by every document a worker process checks
+_worker_verifier: Optional[DocumentVerifier] = None
+
+
+def _init_worker(template_path: str, max_mismatches: int):
+    global _worker_verifier
+    _worker_verifier = DocumentVerifier(template_path, max_mismatches)
+
+
+def _verify_pair(markdown_path: str, docx_path: str) -> VerificationResult:
+    """Verify one document, never raising so one unreadable file cannot stop the sweep"""
+    start = time.perf_counter()
+    try:
+        return _worker_verifier.verify(markdown_path, docx_path)
+    except Exception as e:
+        return VerificationResult(markdown_path, docx_path, error=f"{type(e).__name__}: {str(e)}",
+                                  seconds=time.perf_counter() - start)
+
+
+def verify_batch(template_path: str, pairs: List[Tuple[str, str]], workers: int = 1,
+                 max_mismatches: int = MAX_MISMATCHES,
+                 on_result: Optional[Callable[[VerificationResult], None]] = None) -> List[VerificationResult]:
+    """
+    Verify documents, in parallel worker processes when workers > 1
+    Args:
+        template_path: Template the documents were converted with
+        pairs: (markdown path, .docx path) of every document
+        workers: Number of worker processes; 1 verifies in this process
+        max_mismatches: Mismatches kept per document
+        on_result: Called with each result as it completes
+    Returns:
+        Results in completion order
+    """
+    results = []
+
+    def completed(result: VerificationResult):
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    if workers <= 1 or len(pairs) <= 1:
+        _init_worker(template_path, max_mismatches)
+        for markdown_path, docx_path in pairs:
+            completed(_verify_pair(markdown_path, docx_path))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pairs)), initializer=_init_worker,
+                                 initargs=(template_path, max_mismatches)) as executor:
+            futures = {executor.submit(_verify_pair, *pair): pair for pair in pairs}
+            for future in as_completed(futures):
+                try:
+                    completed(future.result())
+                except Exception as e:
+                    # The worker process itself died
+                    completed(VerificationResult(*futures[future], error=f"{type(e).__name__}: {str(e)}"))
+    return results
+
+
+def find_output(markdown_path: str, output_dir: str) -> Optional[str]:
+    """
+    Newest document converted from markdown_path into output_dir
+    Both the timestamped names of a batch run and the NAME.docx of watch
+    mode are recognised; the newest by modification time wins.
+    """
+    name = os.path.splitext(os.path.basename(markdown_path))[0]
+    try:
+        candidates = [os.path.join(output_dir, entry) for entry in os.listdir(output_dir)
+                      if entry == f"{name}.docx" or (entry.endswith(f"_{name}.docx")
+                                                     and entry[:15].replace('_', '').isdigit())]
+    except FileNotFoundError:
+        return None
+    return max(candidates, key=os.path.getmtime, default=None)
+
+
+def print_verification(result: VerificationResult, quiet: bool = False):
+    """Status line per document, then its mismatches"""
+    if result.error:
+        print(f"ERROR {result.docx_path}: {result.error}")
+    elif result.mismatch_count:
+        print(f"FAIL  {result.docx_path}: {result.mismatch_count} of {result.items} items differ")
+        for mismatch in result.mismatches:
+            print(f"      {mismatch}")
+    elif not quiet:
+        print(f"OK    {result.docx_path} ({result.items} items, {result.seconds:.2f}s)")
+    sys.stdout.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Verify converted documents from the command line"""
+    from .batch import MARKDOWN_PATTERNS, collect_inputs, plan_jobs
+
+    parser = argparse.ArgumentParser(
+        prog='markdown_to_word.verify',
+        description="Check converted .docx files against their markdown without opening Word."
+    )
+    parser.add_argument('template', help="Template the documents were converted with")
+    parser.add_argument('inputs', nargs='*',
+                        help="Markdown files, glob patterns or directories (searched recursively)")
+    parser.add_argument('-o', '--output-dir', help="Directory the documents were converted into")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: number of CPUs)")
+    parser.add_argument('--text', metavar='DOCX', help="Print the paragraphs of one document and exit")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Only print failures and the summary")
+    args = parser.parse_args(argv)
+
+    if args.text:
+        for style, text in extract_text(args.text):
+            print(f"[{style}] {text}")
+        return 0
+    if not args.inputs or not args.output_dir:
+        parser.error("inputs and --output-dir are required unless --text is given")
+
+    pairs = []
+    for job in plan_jobs(collect_inputs(args.inputs, MARKDOWN_PATTERNS), args.output_dir):
+        docx_path = find_output(job.markdown_path, job.output_dir)
+        if docx_path is None:
+            logging.warning(f"No document found for {job.markdown_path} in {job.output_dir}")
+            print(f"ERROR {job.markdown_path}: no converted document in {job.output_dir}")
+            pairs.append((job.markdown_path, None))
+        else:
+            pairs.append((job.markdown_path, docx_path))
+
+    start = time.perf_counter()
+    results = verify_batch(args.template, [pair for pair in pairs if pair[1]], max(args.workers, 1),
+                           on_result=lambda result: print_verification(result, args.quiet))
+    failed = sum(1 for result in results if not result.ok) + sum(1 for _, docx in pairs if docx is None)
+    print(f"\n{len(pairs) - failed} verified, {failed} failed in {time.perf_counter() - start:.2f}s")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
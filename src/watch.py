@@ -0,0 +1,275 @@
+# src/watch.py
+
+import os
+import sys
+import glob
+import time
+import errno
+import select
+import fnmatch
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .batch import MARKDOWN_PATTERNS, BatchJob, BatchResult, plan_jobs
+from .converter import MarkdownToWordConverter
+from .incremental import IncrementalConverter
+
+# Quiet period after the last change before converting, so a burst of saves converts once
+DEBOUNCE_SECONDS = 0.2
+
+# Seconds between scans when polling
+POLL_INTERVAL = 0.25
+
+# inotify(7) events that mean a file in a watched directory may have new content
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+INOTIFY_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# File state compared between scans
+FileState = Tuple[int, int]  # (mtime in ns, size)
+
+
+class PollingWatcher:
+    """
+    Detects new and modified markdown files by comparing stat results between scans
+    Works on every filesystem, including network mounts that never deliver
+    change notifications.
+    """
+
+    def __init__(self, inputs: Iterable[str], patterns: Iterable[str] = MARKDOWN_PATTERNS,
+                 extra_paths: Iterable[str] = (), interval: float = POLL_INTERVAL):
+        """
+        Args:
+            inputs: Markdown files, glob patterns or directories (searched recursively)
+            patterns: File name patterns matched inside directories
+            extra_paths: Other files whose changes are reported, e.g. the template
+            interval: Seconds between scans
+        """
+        self.inputs = list(inputs)
+        self.patterns = list(patterns)
+        self.extra_paths = [os.path.abspath(path) for path in extra_paths]
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def markdown_paths(self) -> List[str]:
+        """Markdown files currently matched by the inputs, sorted"""
+        found = set()
+        for item in self.inputs:
+            if glob.has_magic(item):
+                found.update(os.path.abspath(path) for path in glob.glob(item, recursive=True)
+                             if os.path.isfile(path))
+            elif os.path.isdir(item):
+                for directory, _, files in os.walk(item):
+                    found.update(os.path.abspath(os.path.join(directory, name)) for name in files
+                                 if any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns))
+            else:
+                found.add(os.path.abspath(item))  # May be missing for a moment while an editor saves
+        return sorted(found)
+
+    def scan(self) -> Dict[str, FileState]:
+        """State of every watched file that exists"""
+        snapshot = {}
+        for path in self.markdown_paths() + self.extra_paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _wait(self, timeout: float) -> bool:
+        """Sleep until something may have changed; False when nothing can have"""
+        time.sleep(min(timeout, self.interval))
+        return True
+
+    def changes(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Wait for files to be created or modified
+        Args:
+            timeout: Seconds to wait at most, None waits until something changes
+        Returns:
+            Paths that are new or changed since the previous call, empty on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.interval if deadline is None else max(deadline - time.monotonic(), 0.0)
+            if self._wait(remaining):
+                snapshot = self.scan()
+                changed = {path for path, state in snapshot.items() if self.snapshot.get(path) != state}
+                self.snapshot = snapshot
+                if changed:
+                    return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher(PollingWatcher):
+    """
+    PollingWatcher that sleeps on inotify instead of a timer (Linux)
+    The directories holding the inputs are watched, which also catches
+    editors that save by writing a temporary file and renaming it. An event
+    only triggers a scan; what changed is still decided by stat, so missed
+    or coalesced events cannot hide a change.
+    """
+
+    def __init__(self, inputs: Iterable[str], patterns: Iterable[str] = MARKDOWN_PATTERNS,
+                 extra_paths: Iterable[str] = (), interval: float = POLL_INTERVAL):
+        """
+        Raises:
+            OSError: inotify is unavailable, e.g. not Linux or out of instances
+        """
+        import ctypes
+        import ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(self.libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watched: Set[str] = set()
+        super().__init__(inputs, patterns, extra_paths, interval)
+
+    def directories(self, snapshot: Dict[str, FileState]) -> Set[str]:
+        """Directories whose entries can affect the watched files"""
+        directories = {os.path.dirname(path) for path in snapshot}
+        for item in self.inputs:
+            if glob.has_magic(item):
+                # Deepest directory above the first wildcard, and everything below it for '**'
+                base = os.path.dirname(item[:min(item.index(char) for char in '*?[' if char in item)]) or '.'
+                directories.add(os.path.abspath(base))
+                if '**' in item:
+                    directories.update(os.path.abspath(directory) for directory, _, _ in os.walk(base))
+            elif os.path.isdir(item):
+                directories.update(os.path.abspath(directory) for directory, _, _ in os.walk(item))
+            else:
+                directories.add(os.path.dirname(os.path.abspath(item)))
+        return directories
+
+    def scan(self) -> Dict[str, FileState]:
+        snapshot = super().scan()
+        # New subdirectories show up in scans; watch them before their files change
+        for directory in self.directories(snapshot) - self.watched:
+            if self.libc.inotify_add_watch(self.fd, os.fsencode(directory), INOTIFY_MASK) >= 0:
+                self.watched.add(directory)
+        return snapshot
+
+    def _wait(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            while os.read(self.fd, 64 * 1024):
+                pass  # Drain the queue; the scan works out what changed
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def create_watcher(inputs: Iterable[str], patterns: Iterable[str] = MARKDOWN_PATTERNS,
+                   extra_paths: Iterable[str] = (), poll: bool = False,
+                   interval: float = POLL_INTERVAL) -> PollingWatcher:
+    """Inotify-based watcher on Linux, polling everywhere else or when poll is set"""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(inputs, patterns, extra_paths, interval)
+        except OSError as e:
+            logging.warning(f"Falling back to polling, inotify is unavailable: {str(e)}")
+    return PollingWatcher(inputs, patterns, extra_paths, interval)
+
+
+def stable_output_path(job: BatchJob) -> str:
+    """Output of a watched file: the same name on every save, so viewers can reload it"""
+    name = os.path.splitext(os.path.basename(job.markdown_path))[0]
+    return os.path.join(job.output_dir, f"{name}.docx")
+
+
+def convert_watched(converter: MarkdownToWordConverter, template_path: str, job: BatchJob) -> BatchResult:
+    """Convert one file into its stable output path, never raising"""
+    start = time.perf_counter()
+    try:
+        output_path = converter.convert(template_path, job.markdown_path, job.output_dir)
+        os.replace(output_path, stable_output_path(job))
+        return BatchResult(job, output_path=stable_output_path(job), seconds=time.perf_counter() - start)
+    except Exception as e:
+        return BatchResult(job, error=f"{type(e).__name__}: {str(e)}", seconds=time.perf_counter() - start)
+
+
+def watch(template_path: str, inputs: Iterable[str], output_dir: str, backend: str = 'ooxml',
+          backend_options: Optional[Dict[str, Any]] = None, incremental: bool = False,
+          patterns: Iterable[str] = MARKDOWN_PATTERNS, debounce: float = DEBOUNCE_SECONDS,
+          poll: bool = False, interval: float = POLL_INTERVAL, initial: bool = True,
+          on_result: Optional[Callable[[BatchResult], None]] = None,
+          stop_event: Optional[threading.Event] = None):
+    """
+    Reconvert markdown files whenever they are saved, until stop_event is set
+    One converter serves every conversion, so the compiled template, the
+    resolved style index and the backend (a running Word instance for the
+    word backend) stay warm between saves. After a change the watcher waits
+    until nothing has changed for debounce seconds, then converts only the
+    files that changed, or every file when the template changed. Outputs
+    keep one name per file, see stable_output_path.
+    Args:
+        template_path: Word template used for every document
+        inputs: Markdown files, glob patterns or directories (searched recursively)
+        output_dir: Directory for the .docx files, mirroring the input layout
+        backend: Backend name, see backends.BACKENDS
+        backend_options: Keyword arguments for the backend
+        incremental: Re-render only changed sections (ooxml backend only)
+        patterns: File name patterns matched inside directories
+        debounce: Quiet period in seconds before converting
+        poll: Scan periodically instead of waiting for inotify events
+        interval: Seconds between scans when polling
+        initial: Convert every file once before waiting for changes
+        on_result: Called with each result
+        stop_event: Ends the loop once set
+    """
+    template_path = os.path.abspath(template_path)
+    if incremental:
+        converter = IncrementalConverter(backend_options=backend_options)
+    else:
+        converter = MarkdownToWordConverter(backend=backend, backend_options=backend_options)
+    stop_event = stop_event or threading.Event()
+    watcher = create_watcher(inputs, patterns, [template_path], poll, interval)
+    logging.info(f"Watching {len(watcher.markdown_paths())} markdown files with {type(watcher).__name__}")
+
+    def convert(paths: Set[str]):
+        # Jobs are planned over every watched file, so output directories match a full batch run
+        markdown_paths = [path for path in watcher.markdown_paths() if os.path.isfile(path)]
+        for job in plan_jobs(markdown_paths, output_dir):
+            if job.markdown_path in paths:
+                result = convert_watched(converter, template_path, job)
+                if on_result:
+                    on_result(result)
+
+    try:
+        if initial:
+            convert(set(watcher.snapshot))
+        while not stop_event.is_set():
+            changed = watcher.changes(timeout=0.5)
+            if not changed:
+                continue
+            while not stop_event.is_set():
+                more = watcher.changes(timeout=debounce)
+                if not more:
+                    break
+                changed |= more
+            if template_path in changed:
+                logging.info("Template changed, reconverting every file")
+                changed = set(watcher.snapshot)
+            convert(changed)
+    finally:
+        watcher.close()
@@ -0,0 +1,256 @@
+# src/watchdog.py
+
+import os
+import time
+import signal
+import logging
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+# Attempts a task gets after its first one timed out or killed its worker
+DEFAULT_RETRIES = 1
+
+# Seconds a worker gets to exit after being asked to, before it is killed
+SHUTDOWN_GRACE = 5.0
+
+# Pipe to the parent of a watchdog worker process, None anywhere else
+_worker_connection: Optional[Connection] = None
+
+
+def report_process(process_id: Optional[int]):
+    """
+    Tell the watchdog about a helper process this worker started, e.g. a Word instance
+    Helpers are killed together with the worker when one of its tasks hangs.
+    Outside a watchdog worker this does nothing.
+    """
+    if _worker_connection is not None and process_id:
+        _worker_connection.send(('process', process_id))
+
+
+def report_process_exit(process_id: Optional[int]):
+    """
+    Tell the watchdog a helper reported through report_process has exited
+    Its process ID may be reused by an unrelated process, which must not be
+    killed with the worker. Outside a watchdog worker this does nothing.
+    """
+    if _worker_connection is not None and process_id:
+        _worker_connection.send(('exited', process_id))
+
+
+def _worker_main(connection: Connection, initializer: Optional[Callable], initargs: Sequence):
+    """Run tasks sent by the watchdog until told to stop"""
+    global _worker_connection
+    _worker_connection = connection
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return  # The parent went away
+        if message is None:
+            return
+        task_id, function, args = message
+        try:
+            connection.send(('result', task_id, function(*args)))
+        except Exception as e:
+            connection.send(('error', task_id, f"{type(e).__name__}: {str(e)}"))
+
+
+class TaskOutcome:
+    """Result of one task, or why it has none"""
+
+    def __init__(self, task_id: int, result: Any = None, error: Optional[str] = None, attempts: int = 1):
+        self.task_id = task_id  # Position of the task's arguments in the list given to run()
+        self.result = result
+        self.error = error
+        self.attempts = attempts
+
+
+class WatchdogWorker:
+    """A worker process, the task it is running and the helper processes it reported"""
+
+    def __init__(self, context, initializer: Optional[Callable], initargs: Sequence):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection, initializer, initargs),
+                                       daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.task_id: Optional[int] = None
+        self.deadline: Optional[float] = None
+        self.helpers: Set[int] = set()
+
+    def receive(self) -> Optional[Tuple]:
+        """
+        Next message from the worker, keeping track of the helpers it reports
+        Returns:
+            ('result', task_id, value) or ('error', task_id, message), None for bookkeeping messages
+        Raises:
+            EOFError, OSError: The worker is gone
+        """
+        message = self.connection.recv()
+        if message[0] == 'process':
+            self.helpers.add(message[1])
+            return None
+        if message[0] == 'exited':
+            self.helpers.discard(message[1])
+            return None
+        return message
+
+    def died(self) -> str:
+        return f"WorkerDied: worker exited with code {self.process.exitcode}"
+
+    def call(self, function: Callable, args: Tuple, timeout: Optional[float] = None) -> TaskOutcome:
+        """
+        Run one task on this worker and wait for it
+        Returns:
+            TaskOutcome with the result, the error the task raised, or the reason the worker died
+        Raises:
+            TimeoutError: No result within timeout; the worker is still running and should be killed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.connection.send((0, function, args))
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            ready = wait([self.connection, self.process.sentinel], remaining)
+            if self.connection in ready:
+                try:
+                    message = self.receive()
+                except (EOFError, OSError):
+                    return TaskOutcome(0, error=self.died())
+                if message is not None:
+                    kind, _, payload = message
+                    return TaskOutcome(0, payload, None) if kind == 'result' else TaskOutcome(0, error=payload)
+            elif self.process.sentinel in ready:
+                return TaskOutcome(0, error=self.died())
+            elif deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"no result after {timeout:g}s")
+
+    def kill(self):
+        """Kill the worker and every helper it reported, leaving other workers alone"""
+        for process_id in self.helpers:
+            try:
+                os.kill(process_id, signal.SIGTERM)  # TerminateProcess on Windows
+            except OSError:
+                pass  # Already gone
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def stop(self):
+        """Ask the worker to exit, killing it if it does not"""
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(SHUTDOWN_GRACE)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.connection.close()
+
+
+class WatchdogPool:
+    """
+    Worker processes that run tasks under a per-task timeout
+    Unlike ProcessPoolExecutor, a task that hangs or kills its worker
+    costs only that worker: it is killed together with the helper processes
+    it reported through report_process (its Word instance, say), a fresh
+    worker takes its place and the task is retried a bounded number of
+    times. Every other worker keeps running its task undisturbed.
+    """
+
+    def __init__(self, workers: int, initializer: Optional[Callable] = None, initargs: Sequence = (),
+                 timeout: Optional[float] = None, retries: int = DEFAULT_RETRIES):
+        """
+        Args:
+            workers: Number of worker processes
+            initializer: Called with initargs in every worker process, including restarted ones
+            initargs: Arguments for initializer
+            timeout: Seconds a task may run, None for no limit
+            retries: Further attempts for a task that timed out or whose worker died
+        """
+        if workers < 1:
+            raise ValueError("A watchdog pool needs at least one worker")
+        self.workers = workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self.timeout = timeout
+        self.retries = max(retries, 0)
+        self.context = multiprocessing.get_context()
+        self.restarts = 0
+
+    def _start(self) -> WatchdogWorker:
+        return WatchdogWorker(self.context, self.initializer, self.initargs)
+
+    def run(self, function: Callable, tasks: List[Tuple]) -> Iterator[TaskOutcome]:
+        """
+        Run function(*args) for every args in tasks
+        Args:
+            function: Module-level function, so workers can unpickle it
+            tasks: Arguments of every call
+        Returns:
+            Iterator of TaskOutcome in completion order, one per task
+        """
+        pending: Deque[int] = deque(range(len(tasks)))
+        attempts: Dict[int, int] = {}
+        workers = [self._start() for _ in range(min(self.workers, len(tasks)))]
+        try:
+            while pending or any(worker.task_id is not None for worker in workers):
+                for worker in workers:
+                    if worker.task_id is None and pending:
+                        task_id = pending.popleft()
+                        attempts[task_id] = attempts.get(task_id, 0) + 1
+                        worker.task_id = task_id
+                        worker.deadline = None if self.timeout is None else time.monotonic() + self.timeout
+                        worker.connection.send((task_id, function, tasks[task_id]))
+
+                busy = [worker for worker in workers if worker.task_id is not None]
+                deadlines = [worker.deadline for worker in busy if worker.deadline is not None]
+                wait_seconds = max(min(deadlines) - time.monotonic(), 0.0) if deadlines else None
+                ready = set(wait([worker.connection for worker in busy] +
+                                 [worker.process.sentinel for worker in busy], wait_seconds))
+
+                for index, worker in enumerate(workers):
+                    if worker.task_id is None:
+                        continue
+                    task_id = worker.task_id
+                    failure = None
+                    if worker.connection in ready:
+                        try:
+                            message = worker.receive()
+                        except (EOFError, OSError):
+                            failure = worker.died()
+                        else:
+                            if message is None:
+                                continue
+                            kind, _, payload = message
+                            worker.task_id = None
+                            result, error = (payload, None) if kind == 'result' else (None, payload)
+                            yield TaskOutcome(task_id, result, error, attempts[task_id])
+                            continue
+                    elif worker.process.sentinel in ready:
+                        failure = worker.died()
+                    elif worker.deadline is not None and time.monotonic() >= worker.deadline:
+                        failure = f"TimeoutError: no result after {self.timeout:g}s"
+                    if failure is None:
+                        continue
+
+                    logging.warning(f"Restarting worker {worker.process.pid} after task {task_id} failed "
+                                    f"(attempt {attempts[task_id]}): {failure}")
+                    worker.kill()
+                    workers[index] = self._start()
+                    self.restarts += 1
+                    if attempts[task_id] <= self.retries:
+                        pending.appendleft(task_id)
+                    else:
+                        yield TaskOutcome(task_id, error=f"{failure} (attempt {attempts[task_id]})",
+                                          attempts=attempts[task_id])
+        finally:
+            for worker in workers:
+                if worker.task_id is None:
+                    worker.stop()
+                else:
+                    worker.kill()
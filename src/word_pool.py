@@ -0,0 +1,209 @@
+# src/word_pool.py
+
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+WD_DO_NOT_SAVE_CHANGES = 0
+
+
+def dispatch_word() -> object:
+    """Start a dedicated Word process, never attaching to the user's Word"""
+    # Imported here so the pool runs where pywin32 is unavailable
+    import win32com.client
+    return win32com.client.DispatchEx("Word.Application")
+
+
+def word_process_id(app: object) -> Optional[int]:
+    """Process ID of a Word application from its main window, None when it cannot be found"""
+    try:
+        import win32process
+        _, process_id = win32process.GetWindowThreadProcessId(app.Hwnd)
+        return process_id or None
+    except Exception:
+        return None  # Not Windows, no pywin32, or a stand-in without a window
+
+
+class PooledWord:
+    """A Word application owned by a WordInstancePool"""
+
+    def __init__(self, app: object, instance_id: int, process_id: Optional[int] = None):
+        self.app = app
+        self.instance_id = instance_id
+        self.process_id = process_id  # WINWORD.EXE of this instance, so it alone can be killed
+        self.documents_converted = 0
+        self.created_at = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f"PooledWord(id={self.instance_id}, documents={self.documents_converted})"
+
+
+class WordInstancePool:
+    """
+    Keeps long-lived Word instances warm and hands them out one conversion at a time
+    Instances are health-checked when handed out and replaced after
+    max_documents conversions or after any failed conversion. Only Word
+    processes started by the pool are ever quit.
+    """
+
+    def __init__(self, size: int = 1, max_documents: int = 100,
+                 application_factory: Optional[Callable[[], object]] = None,
+                 visible: bool = False):
+        """
+        Args:
+            size: Maximum number of Word instances alive at once
+            max_documents: Conversions an instance serves before it is recycled
+            application_factory: Returns a new Word.Application-like object;
+                                 defaults to a dedicated COM Word process
+            visible: Whether to show the Word windows
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.size = size
+        self.max_documents = max_documents
+        self.application_factory = application_factory or dispatch_word
+        self.visible = visible
+        self.idle: List[PooledWord] = []  # Most recently released last, so warm instances are reused first
+        self.lock = threading.Lock()
+        # Signalled whenever an instance is released or a slot frees up
+        self.available = threading.Condition(self.lock)
+        self.created = 0
+        self.live = 0
+        self.recycled = 0
+        self.closed = False
+        # Called with every new instance, e.g. to tell a batch watchdog which process to kill on a hang
+        self.on_start: Optional[Callable[[PooledWord], None]] = None
+        # Called with every instance once it has been quit, e.g. so that watchdog forgets its process
+        self.on_stop: Optional[Callable[[PooledWord], None]] = None
+
+    def _create(self) -> PooledWord:
+        """Start a new Word instance"""
+        app = self.application_factory()
+        app.Visible = self.visible
+        with self.lock:
+            self.created += 1
+            instance = PooledWord(app, self.created, word_process_id(app))
+        logging.info(f"Started pooled Word instance {instance.instance_id}")
+        if self.on_start is not None:
+            self.on_start(instance)
+        return instance
+
+    def _discard(self, instance: PooledWord, reason: str):
+        """Quit an instance and free its slot"""
+        logging.info(f"Recycling Word instance {instance.instance_id}: {reason}")
+        try:
+            instance.app.Quit(SaveChanges=WD_DO_NOT_SAVE_CHANGES)
+        except Exception as e:
+            logging.warning(f"Failed to quit Word instance {instance.instance_id}: {str(e)}")
+        if self.on_stop is not None:
+            self.on_stop(instance)
+        with self.available:
+            self.live -= 1
+            self.recycled += 1
+            self.available.notify()
+
+    def is_healthy(self, instance: PooledWord) -> bool:
+        """Check that the instance still answers automation calls"""
+        try:
+            _ = instance.app.Documents.Count
+            return True
+        except Exception as e:
+            logging.warning(f"Word instance {instance.instance_id} failed health check: {str(e)}")
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledWord:
+        """
+        Take a healthy instance out of the pool, starting one if a slot is free
+        Args:
+            timeout: Seconds to wait for a busy instance, None waits forever
+        Returns:
+            PooledWord: Instance reserved for the caller until release()
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            instance = None
+            with self.available:
+                while True:
+                    if self.closed:
+                        raise RuntimeError("Word instance pool is closed")
+                    if self.idle:
+                        instance = self.idle.pop()
+                        break
+                    if self.live < self.size:
+                        self.live += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No Word instance became available")
+                    self.available.wait(remaining)
+
+            if instance is None:
+                try:
+                    return self._create()
+                except Exception:
+                    with self.available:
+                        self.live -= 1
+                        self.available.notify()
+                    raise
+            if self.is_healthy(instance):
+                return instance
+            self._discard(instance, "unhealthy")
+
+    def release(self, instance: PooledWord, failed: bool = False):
+        """
+        Return an instance after a conversion
+        Args:
+            instance: Instance from acquire()
+            failed: Whether the conversion failed, which recycles the instance
+        """
+        instance.documents_converted += 1
+        if failed:
+            self._discard(instance, "conversion failed")
+        elif instance.documents_converted >= self.max_documents:
+            self._discard(instance, f"served {instance.documents_converted} documents")
+        else:
+            with self.available:
+                if not self.closed:
+                    self.idle.append(instance)
+                    self.available.notify()
+                    return
+            self._discard(instance, "pool closed")
+
+    @contextmanager
+    def instance(self, timeout: Optional[float] = None) -> Iterator[PooledWord]:
+        """Context manager around acquire() and release()"""
+        instance = self.acquire(timeout)
+        failed = False
+        try:
+            yield instance
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(instance, failed=failed)
+
+    def close(self):
+        """Quit every idle instance; busy ones are quit when released"""
+        with self.available:
+            self.closed = True
+            instances, self.idle = self.idle, []
+            self.available.notify_all()  # Waiters raise instead of waiting for instances that never come
+        for instance in instances:
+            self._discard(instance, "pool closed")
+
+
+_default_pool: Optional[WordInstancePool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> WordInstancePool:
+    """Process-wide pool the 'word' backend uses unless given its own"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None or _default_pool.closed:
+            _default_pool = WordInstancePool(visible=True)
+            atexit.register(_default_pool.close)
+        return _default_pool
@@ -0,0 +1,22 @@
+# tests/conftest.py
+
+import pytest
+
+from src.utils import LOG_FILE_ENV
+
+
+@pytest.fixture(autouse=True, scope='session')
+def isolated_log_file(tmp_path_factory):
+    """Log to a temporary file, also in worker processes, instead of markdown_to_word_debug.log"""
+    log_file = tmp_path_factory.mktemp('logs') / 'markdown_to_word_debug.log'
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv(LOG_FILE_ENV, str(log_file))
+        yield log_file
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep on-disk caches out of the user's home directory"""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv('MARKDOWN_TO_WORD_CACHE_DIR', str(cache_dir))
+    return cache_dir
@@ -0,0 +1,77 @@
+# tests/test_async_api.py
+
+import os
+import sys
+import asyncio
+import zipfile
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.async_api import AsyncConverter, convert_async, convert_many
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+def _body(path):
+    with zipfile.ZipFile(path) as package:
+        return package.read('word/document.xml').decode('utf-8')
+
+
+@pytest.mark.parametrize('backend', ['ooxml', 'fake'])
+def test_convert_many_runs_concurrently_with_isolated_state(tmp_path, backend):
+    paths = []
+    for index in range(6):
+        path = tmp_path / "docs" / f"doc{index}.md"
+        path.parent.mkdir(exist_ok=True)
+        # Different heading depths, so shared style state would leak levels between documents
+        path.write_text(f"{'#' * (index % 3 + 1)} Title {index}\nBody of document {index}\n", encoding='utf-8')
+        paths.append(str(path))
+
+    async def scenario():
+        return [result async for result in convert_many(TEMPLATE, paths, str(tmp_path / "out"),
+                                                        backend=backend, max_concurrency=3)]
+
+    results = asyncio.run(scenario())
+    assert len(results) == 6 and all(result.ok for result in results)
+    for result in results:
+        index = os.path.basename(result.job.markdown_path)[3]
+        body = _body(result.output_path)
+        assert f"Body of document {index}" in body
+        assert all(f"document {other}" not in body for other in "012345" if other != index)
+    if backend == 'ooxml':
+        single = asyncio.run(convert_async(TEMPLATE, paths[2], str(tmp_path / "single")))
+        by_name = {os.path.basename(result.job.markdown_path): result for result in results}
+        assert _body(single) == _body(by_name['doc2.md'].output_path)
+
+
+def test_cancelling_a_conversion_stops_it_without_output(tmp_path):
+    markdown = tmp_path / "large.md"
+    markdown.write_text("## Section\nSome body text with **bold** words.\n" * 200000, encoding='utf-8')
+    output_dir = tmp_path / "out"
+
+    async def scenario():
+        async with AsyncConverter(max_concurrency=1) as converter:
+            task = asyncio.create_task(converter.convert(TEMPLATE, str(markdown), str(output_dir)))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # The slot is free again once the cancelled conversion has stopped
+            small = tmp_path / "small.md"
+            small.write_text("Still works", encoding='utf-8')
+            return await asyncio.wait_for(converter.convert(TEMPLATE, str(small), str(tmp_path / "next")), 30)
+
+    assert os.path.isfile(asyncio.run(scenario()))
+    assert not output_dir.exists() or os.listdir(output_dir) == []
+
+
+def test_word_backend_is_refused_on_threads(tmp_path):
+    with pytest.raises(ValueError):
+        AsyncConverter(backend='word')
+    with pytest.raises(ValueError):
+        asyncio.run(convert_async(TEMPLATE, str(tmp_path / "doc.md"), str(tmp_path / "out"), backend='word'))
+    assert AsyncConverter(backend='word', processes=True).processes
@@ -0,0 +1,111 @@
+# tests/test_backends.py
+
+import os
+import sys
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.backends import WordBackend, create_backend
+from src.fake_word import FakeWordApplication
+from src.formatters import TextFormatter
+from src.style_manager import StyleManager
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+SAMPLE = """# Title
+Intro with **bold** text.
+## Section
+- item
+"""
+
+
+def _render(backend):
+    backend.start()
+    backend.open(TEMPLATE)
+    TextFormatter().process_content(backend, SAMPLE, StyleManager())
+    return backend
+
+
+def test_fake_word_records_calls_and_styles():
+    app = FakeWordApplication()
+    backend = _render(WordBackend(application_factory=lambda: app, visible=False))
+
+    paragraphs = backend.doc.paragraphs()
+    # Word keeps the empty paragraph left behind by Content.Delete()
+    assert [style for _, style, _ in paragraphs[1:]] == ['Heading 1', 'Body 1', 'Heading 2', 'Bullet 2']
+    assert paragraphs[2] == ('Intro with bold text.', 'Body 1', [(11, 15, 'bold')])
+
+    counts = app.recorder.counts
+    assert counts['Selection.TypeParagraph'] == 4
+    assert counts['Styles.Item'] == 4
+    assert counts['Font.Bold'] == 1
+    assert app.recorder.total > 40
+
+
+def test_missing_style_falls_back_through_backend():
+    app = FakeWordApplication(styles=['Normal', 'Body 0'])
+    backend = WordBackend(application_factory=lambda: app, visible=False)
+    backend.start()
+    backend.doc = app.Documents.Add()
+    TextFormatter().process_content(backend, "# Title\nText", StyleManager())
+
+    assert [style for _, style, _ in backend.doc.paragraphs()[1:]] == ['Normal', 'Body 0']
+
+
+def test_backend_factory():
+    assert create_backend('ooxml').name == 'ooxml'
+    assert isinstance(create_backend('fake'), WordBackend)
+    with pytest.raises(ValueError):
+        create_backend('pdf')
+
+
+def test_batch_mode_matches_per_paragraph_output_with_fewer_calls():
+    content = "\n".join(["# Title", "Body **bold**", "Body", "- a", "- b", "```", "x", "y", "```"] * 50)
+    results = []
+    for batch in (False, True):
+        app = FakeWordApplication()
+        backend = WordBackend(application_factory=lambda: app, visible=False, batch=batch)
+        backend.start()
+        backend.open(TEMPLATE)
+        TextFormatter().process_content(backend, content, StyleManager())
+        paragraphs = [paragraph for paragraph in backend.doc.paragraphs() if paragraph[0]]
+        results.append((paragraphs, app.recorder.counts))
+
+    (per_paragraph, per_paragraph_calls), (batched, batched_calls) = results
+    assert batched == per_paragraph
+    assert batched_calls['Range.InsertAfter'] == 1
+    assert batched_calls['Selection.TypeParagraph'] == 0
+    # One style call per run of same-styled paragraphs, not per paragraph
+    assert batched_calls['Range.Style'] == 200
+    assert sum(batched_calls.values()) * 3 < sum(per_paragraph_calls.values())
+
+
+def test_tables_convert_once_per_table_on_com_and_ooxml(tmp_path):
+    rows = "\n".join(f"| row {index} | **{index}** |" for index in range(2000))
+    content = f"# Data\n| Key | Value |\n|---|--:|\n{rows}\n\nAfter"
+    app = FakeWordApplication(styles=['Normal', 'Heading 1', 'Body 1', 'Table Grid'])
+    backend = WordBackend(application_factory=lambda: app, visible=False, batch=True)
+    backend.start()
+    backend.doc = app.Documents.Add()
+    TextFormatter().process_content(backend, content, StyleManager())
+
+    counts = app.recorder.counts
+    assert counts['Range.InsertAfter'] == 1 and counts['Range.ConvertToTable'] == 1
+    assert counts['Table.Style'] == 1 and counts['Table.Column.Select'] == 1
+    # Cell formatting is applied before conversion, so calls do not grow per cell
+    assert sum(counts.values()) < 2000 * 6
+    table = backend.doc.items()[1]
+    assert (table.style_name, table.alignments, table.header_rows) == ('Table Grid', ['', 'right'], 1)
+    assert table.rows[5] == [('row 4', []), ('4', [(0, 1, 'bold')])]
+
+    ooxml = create_backend('ooxml')
+    ooxml.open(TEMPLATE)
+    TextFormatter().process_content(ooxml, content, StyleManager())
+    document_xml = ooxml.document.document_xml().decode('utf-8')
+    assert document_xml.count('<w:tbl>') == 1 and document_xml.count('<w:tr>') == 2001
+    assert document_xml.count('<w:gridCol ') == 2 and document_xml.count('<w:tblHeader/>') == 1
+    assert document_xml.count('<w:jc w:val="right"/>') == 2001
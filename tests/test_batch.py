@@ -0,0 +1,136 @@
+# tests/test_batch.py
+
+import os
+import sys
+import zipfile
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.backends import OoxmlBackend
+from src.batch import collect_inputs, plan_jobs, run_batch
+from src.journal import BatchJournal
+from src.cli import EXIT_FAILURES, EXIT_OK, EXIT_USAGE, main
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+class EditingBackend(OoxmlBackend):
+    """Appends to the markdown file named by a paragraph reading EDIT <path>, as a user saving mid-conversion"""
+
+    def stream_paragraphs(self, output_path, paragraphs):
+        def edited():
+            for item in paragraphs:
+                if isinstance(item, tuple) and item[0].startswith('EDIT '):
+                    with open(item[0][len('EDIT '):], 'a', encoding='utf-8') as file:
+                        file.write("\nSaved while converting\n")
+                yield item
+        super().stream_paragraphs(output_path, edited())
+
+
+def _write_tree(root):
+    for relative in ("guide.md", "a/readme.md", "b/readme.md", "b/notes.txt"):
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# {relative}\nBody text", encoding='utf-8')
+
+
+def test_collect_and_plan_mirror_directories(tmp_path):
+    _write_tree(tmp_path / "docs")
+    paths = collect_inputs([str(tmp_path / "docs"), str(tmp_path / "docs" / "*.md")])
+    assert [os.path.relpath(path, tmp_path / "docs") for path in paths] == [
+        os.path.join('a', 'readme.md'), os.path.join('b', 'readme.md'), 'guide.md'
+    ]
+
+    jobs = plan_jobs(paths, str(tmp_path / "out"))
+    assert [os.path.relpath(job.output_dir, tmp_path / "out") for job in jobs] == ['a', 'b', '.']
+
+
+def test_parallel_batch_converts_every_file(tmp_path):
+    _write_tree(tmp_path / "docs")
+    jobs = plan_jobs(collect_inputs([str(tmp_path / "docs")]), str(tmp_path / "out"))
+    summary = run_batch(TEMPLATE, jobs, workers=2)
+
+    assert summary.succeeded == 3 and summary.failed == 0
+    assert summary.docs_per_second > 0
+    for result in summary.results:
+        with zipfile.ZipFile(result.output_path) as package:
+            assert b'Heading1' in package.read('word/document.xml')
+
+
+def test_journal_resumes_where_a_run_stopped(tmp_path):
+    _write_tree(tmp_path / "docs")
+    journal_path = str(tmp_path / "journal.jsonl")
+    jobs = plan_jobs(collect_inputs([str(tmp_path / "docs")]), str(tmp_path / "out"))
+
+    journal = BatchJournal(journal_path)
+    run_batch(TEMPLATE, jobs[:2], journal=journal)
+    journal.close()
+    with open(journal_path, 'a', encoding='utf-8') as file:
+        file.write('{"input": "torn by a cra')  # Interrupted mid-write
+
+    (tmp_path / "docs" / "a" / "readme.md").write_text("# Changed", encoding='utf-8')
+    journal = BatchJournal(journal_path)
+    summary = run_batch(TEMPLATE, plan_jobs(collect_inputs([str(tmp_path / "docs")]), str(tmp_path / "out")),
+                        journal=journal, resume=True)
+    journal.close()
+
+    assert summary.skipped == 1
+    assert sorted(os.path.relpath(result.job.markdown_path, tmp_path / "docs") for result in summary.results) == [
+        os.path.join('a', 'readme.md'), 'guide.md'
+    ]
+    entries = BatchJournal(journal_path).entries
+    assert len(entries) == 3 and all(entry['status'] == 'ok' for entry in entries.values())
+
+
+def test_journal_does_not_resume_inputs_edited_during_conversion(tmp_path):
+    markdown = tmp_path / "doc.md"
+    markdown.write_text(f"EDIT {markdown}\n", encoding='utf-8')
+    os.utime(markdown, ns=(10**9, 10**9))  # So the edit changes the mtime even on coarse clocks
+    journal_path = str(tmp_path / "journal.jsonl")
+
+    def resume():
+        journal = BatchJournal(journal_path)
+        try:
+            return run_batch(TEMPLATE, plan_jobs([str(markdown)], str(tmp_path / "out")), backend=EditingBackend,
+                             journal=journal, resume=True)
+        finally:
+            journal.close()
+
+    assert resume().succeeded == 1
+    # The output holds the old contents, so the edited file is converted again
+    assert resume().skipped == 0
+
+
+def test_journal_only_resumes_runs_with_the_same_settings(tmp_path):
+    _write_tree(tmp_path / "docs")
+    journal_path = str(tmp_path / "journal.jsonl")
+
+    def resume(output_dir, **options):
+        journal = BatchJournal(journal_path)
+        try:
+            jobs = plan_jobs(collect_inputs([str(tmp_path / "docs")]), str(tmp_path / output_dir))
+            return run_batch(TEMPLATE, jobs, journal=journal, resume=True, **options).skipped
+        finally:
+            journal.close()
+
+    assert resume("out") == 0
+    assert resume("out") == 3
+    assert resume("elsewhere") == 0
+    assert resume("out", backend_options={'streaming': False}) == 0
+    assert resume("out", backend='fake') == 0
+
+
+def test_cli_exit_codes(tmp_path, capsys):
+    _write_tree(tmp_path / "docs")
+    out = str(tmp_path / "out")
+    assert main([TEMPLATE, str(tmp_path / "docs"), '-o', out, '-j', '1']) == EXIT_OK
+    assert "3 converted, 0 failed" in capsys.readouterr().out
+
+    (tmp_path / "docs" / "empty.md").write_text("", encoding='utf-8')
+    assert main([TEMPLATE, str(tmp_path / "docs"), '-o', out, '-j', '1', '-q']) == EXIT_FAILURES
+    assert "FAIL" in capsys.readouterr().out
+
+    assert main([TEMPLATE, str(tmp_path / "missing"), '-o', out]) == EXIT_USAGE
+
@@ -0,0 +1,50 @@
+# tests/test_benchmark.py
+
+import os
+import sys
+import json
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.benchmark import STAGES, CorpusGenerator, benchmark_file, main, write_corpus
+from src.tokenizer import parse_markdown
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+def test_generator_is_deterministic_and_covers_every_block_kind():
+    first = '\n'.join(CorpusGenerator(seed=7).lines(50000))
+    assert first == '\n'.join(CorpusGenerator(seed=7).lines(50000))
+    assert first != '\n'.join(CorpusGenerator(seed=8).lines(50000))
+    assert len(first) >= 50000
+
+    blocks = parse_markdown(first)
+    assert {block.kind for block in blocks} == {'heading', 'body', 'bullet', 'numbered', 'blockquote', 'code'}
+    assert max(block.level for block in blocks) > 3
+    assert max(block.depth for block in blocks) > 0
+    assert all(marker in first for marker in ('***', '**', '`'))
+
+
+def test_mix_limits_block_kinds():
+    text = '\n'.join(CorpusGenerator(mix={'heading': 1, 'code': 1}).lines(5000))
+    assert {block.kind for block in parse_markdown(text)} == {'heading', 'code'}
+
+
+def test_every_stage_is_reported_for_headless_backends(tmp_path):
+    markdown_path = write_corpus(str(tmp_path / "corpus.md"), 20000)
+    for backend in ('ooxml', 'fake'):
+        run = benchmark_file(TEMPLATE, markdown_path, str(tmp_path / f"{backend}.docx"), backend)
+        assert [stage.name for stage in run.stages] == list(STAGES)
+        assert run.paragraphs > 100
+        assert all(stage.peak_bytes >= 0 for stage in run.stages)
+        assert os.path.getsize(tmp_path / f"{backend}.docx") > 0
+
+
+def test_cli_writes_json(tmp_path, capsys):
+    json_path = tmp_path / "results.json"
+    assert main([TEMPLATE, '--sizes', '1KB', '--work-dir', str(tmp_path), '--json', str(json_path)]) == 0
+    assert 'ooxml' in capsys.readouterr().out
+    results = json.loads(json_path.read_text(encoding='utf-8'))
+    assert [stage['stage'] for stage in results[0]['stages']] == list(STAGES)
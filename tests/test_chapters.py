@@ -0,0 +1,66 @@
+# tests/test_chapters.py
+
+import os
+import sys
+import zipfile
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.chapters import ChapterConverter, renumber_drawings
+from src.converter import MarkdownToWordConverter
+from src.incremental import split_sections
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+BOOK = """Preamble with *italic* text.
+
+# Chapter One
+1. first
+2. second
+## Section
+| A | B |
+|---|--:|
+| 1 | **2** |
+# Chapter Two
+```
+# not a chapter
+```
+### Deep
+- bullet
+    - nested
+# Chapter Three
+> quoted
+"""
+
+
+def _parts(path):
+    with zipfile.ZipFile(path) as package:
+        return {name: package.read(name) for name in package.namelist()}
+
+
+def test_chapters_split_at_top_level_headings_only():
+    chapters = split_sections(BOOK.splitlines(), max_level=1)
+    assert [chapter.level for chapter in chapters] == [0, 1, 1, 1]
+    assert chapters[2].lines[:2] == ['# Chapter Two', '```']
+    assert renumber_drawings('<wp:docPr id="1" name="Picture 1"/><wp:docPr id="2" name="Picture 2"/>', 7) == \
+        '<wp:docPr id="7" name="Picture 7"/><wp:docPr id="8" name="Picture 8"/>'
+
+
+def test_parallel_chapters_match_sequential_output(tmp_path, monkeypatch):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')  # Same core properties in every package
+    markdown_path = tmp_path / 'book.md'
+    markdown_path.write_text(BOOK, encoding='utf-8')
+
+    for backend, options in (('ooxml', {}), ('fake', {'batch': True})):
+        expected = _parts(MarkdownToWordConverter(backend=backend, backend_options=options).convert(
+            TEMPLATE, str(markdown_path), str(tmp_path / f'{backend}_sequential')))
+        for workers in (1, 2):
+            converter = ChapterConverter(backend=backend, backend_options=options, workers=workers)
+            try:
+                output_path = converter.convert(TEMPLATE, str(markdown_path), str(tmp_path / f'{backend}_{workers}'))
+            finally:
+                converter.close()
+            assert converter.last_stats == {'chapters': 4, 'workers': workers}
+            assert _parts(output_path) == expected
@@ -0,0 +1,92 @@
+# tests/test_images.py
+
+import os
+import sys
+import struct
+import zipfile
+import zlib
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.backends import WordBackend, create_backend
+from src.fake_word import FakeWordApplication
+from src.formatters import TextFormatter
+from src.images import EMU_PER_PIXEL, ImageCache, probe_image
+from src.style_manager import StyleManager
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+def _png(width, height, color=b'\xff\x00\x00'):
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    pixels = b''.join(b'\x00' + color * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(pixels)) + chunk(b'IEND', b''))
+
+
+def test_probe_reads_dimensions_from_headers():
+    assert probe_image(_png(40, 20)) == ('png', 40, 20)
+    assert probe_image(b'GIF89a' + struct.pack('<HH', 7, 9) + b'\x00' * 8) == ('gif', 7, 9)
+    assert probe_image(b'BM' + b'\x00' * 16 + struct.pack('<ii', 12, -5)) == ('bmp', 12, 5)
+    # APP0 segment first, then a baseline frame header holding height and width
+    jpeg = (b'\xff\xd8\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9
+            + b'\xff\xc0' + struct.pack('>HBHH', 17, 8, 300, 640) + b'\x00' * 12)
+    assert probe_image(jpeg) == ('jpeg', 640, 300)
+
+
+def test_images_are_deduplicated_fitted_and_match_on_com(tmp_path):
+    assets = tmp_path / 'docs' / 'assets'
+    assets.mkdir(parents=True)
+    (assets / 'logo.png').write_bytes(_png(40, 20))
+    (assets / 'copy.png').write_bytes(_png(40, 20))
+    (assets / 'wide.png').write_bytes(_png(2000, 500, b'\x00\x00\xff'))
+    content = ("# Logos\n![Logo](assets/logo.png)\n\n![Copy](assets/copy.png)\n\n"
+               "![Wide](<assets/wide.png> \"Banner\")\n\n![Gone](assets/missing.png)\n\n"
+               + "![Logo](assets/logo.png)\n\n" * 50)
+    cache = ImageCache(cache_dir=str(tmp_path / 'cache'))
+
+    def formatter():
+        text_formatter = TextFormatter(image_cache=cache)
+        text_formatter.base_dir = str(tmp_path / 'docs')
+        return text_formatter
+
+    ooxml = create_backend('ooxml', streaming=False)
+    ooxml.open(TEMPLATE)
+    formatter().process_content(ooxml, content, StyleManager())
+    output_path = str(tmp_path / 'out.docx')
+    ooxml.save(output_path)
+    assert cache.misses == 3  # Each file is read once however often it is referenced
+
+    with zipfile.ZipFile(output_path) as package:
+        media = [name for name in package.namelist() if name.startswith('word/media/')]
+        document_xml = package.read('word/document.xml').decode('utf-8')
+        rels = package.read('word/_rels/document.xml.rels').decode('utf-8')
+    # Identical content is stored once, under its hash
+    assert len(media) == 2 and rels.count('relationships/image') == 2
+    assert document_xml.count('<w:drawing>') == 53
+    assert f'<wp:extent cx="{40 * EMU_PER_PIXEL}" cy="{20 * EMU_PER_PIXEL}"/>' in document_xml
+    # Wide images are scaled down to the 6.5 inch text width
+    assert '<wp:extent cx="5943600" cy="1485900"/>' in document_xml
+    assert 'Gone' in document_xml
+
+    app = FakeWordApplication()
+    word = WordBackend(application_factory=lambda: app, visible=False, batch=True)
+    word.start()
+    word.open(TEMPLATE)
+    formatter().process_content(word, content, StyleManager())
+    assert app.recorder.counts['Range.InsertAfter'] == 1
+    assert app.recorder.counts['InlineShapes.AddPicture'] == 53
+    com_path = str(tmp_path / 'com.docx')
+    word.save(com_path)
+    with zipfile.ZipFile(com_path) as package:
+        # Word keeps the empty paragraph left behind by Content.Delete()
+        assert package.read('word/document.xml').decode('utf-8').replace('<w:p/>', '', 1) \
+            .replace('<w:body><w:p></w:p>', '<w:body>') == document_xml
+
+    # A fresh cache finds the probes on disk without reading the images again
+    second = ImageCache(cache_dir=str(tmp_path / 'cache'))
+    assert second.probe(str(assets / 'wide.png')).width == 2000
+    assert (second.hits, second.misses) == (1, 0)
@@ -0,0 +1,63 @@
+# tests/test_incremental.py
+
+import os
+import sys
+import zipfile
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.converter import MarkdownToWordConverter
+from src.incremental import IncrementalConverter, split_sections
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+MARKDOWN = """Intro paragraph
+
+# Chapter One
+Some **bold** text
+- item
+  - nested
+
+```python
+# not a heading
+x = 1
+```
+
+## Details
+> quoted
+
+# Chapter Two
+Closing text
+"""
+
+
+def _document_xml(path):
+    with zipfile.ZipFile(path) as package:
+        return package.read('word/document.xml')
+
+
+def test_split_sections_ignores_headings_in_code():
+    sections = split_sections(MARKDOWN.splitlines())
+    assert [(section.level, section.lines[0]) for section in sections] == [
+        (0, 'Intro paragraph'), (1, '# Chapter One'), (2, '## Details'), (1, '# Chapter Two')
+    ]
+
+
+def test_only_changed_sections_are_rerendered(tmp_path):
+    markdown_path = tmp_path / "doc.md"
+    markdown_path.write_text(MARKDOWN, encoding='utf-8')
+    converter = IncrementalConverter(cache_dir=str(tmp_path))
+
+    converter.convert(TEMPLATE, str(markdown_path), str(tmp_path / "out"))
+    assert converter.last_stats == {'sections': 4, 'rendered': 4, 'reused': 0}
+
+    markdown_path.write_text(MARKDOWN.replace("quoted", "edited quote"), encoding='utf-8')
+    output_path = converter.convert(TEMPLATE, str(markdown_path), str(tmp_path / "out"))
+    assert converter.last_stats == {'sections': 4, 'rendered': 1, 'reused': 3}
+
+    full_path = MarkdownToWordConverter(backend='ooxml').convert(
+        TEMPLATE, str(markdown_path), str(tmp_path / "full")
+    )
+    assert _document_xml(output_path) == _document_xml(full_path)
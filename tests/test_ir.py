@@ -0,0 +1,65 @@
+# tests/test_ir.py
+
+import os
+import pickle
+import sys
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.backends import create_backend
+from src.formatters import TextFormatter
+from src.ir import DocumentIR
+from src.style_manager import StyleManager
+from src.tokenizer import tokenize
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+SAMPLE = """# Title
+Intro with **bold** and `code`, café ünïcode.
+## Section
+- item *one*
+    - nested
+| A | B |
+|---|:-:|
+| 1 | **2** |
+
+```python
+x = 1
+```
+> quoted
+"""
+
+
+def test_ir_holds_the_paragraph_stream_and_round_trips(tmp_path):
+    backend = create_backend('ooxml', streaming=False)
+    backend.open(TEMPLATE)
+    expected = TextFormatter().build_block_paragraphs(backend, tokenize(SAMPLE.splitlines()), StyleManager())
+    document = TextFormatter().build_ir(backend, tokenize(SAMPLE.splitlines()), StyleManager())
+
+    assert len(document) == len(expected)
+    assert [document.kind(index) for index in range(len(document))] == \
+        ['heading', 'body', 'heading', 'bullet', 'bullet', 'table', 'code', 'blockquote']
+    assert list(document.levels) == [1, 1, 2, 2, 2, 2, 2, 2]
+    assert document[1] == expected[1] == ('Intro with bold and code, café ünïcode.', 'Body 1',
+                                          [(11, 15, 'bold'), (20, 24, 'code')])
+
+    def rendered(items):
+        backend.clear()
+        backend.write_paragraphs(items)
+        return backend.document.document_xml()
+
+    assert rendered(document) == rendered(expected)
+
+    # The binary form and pickling (used between processes) restore the same stream
+    path = str(tmp_path / 'sample.mdir')
+    document.save(path)
+    for restored in (DocumentIR.load(path), pickle.loads(pickle.dumps(document))):
+        assert restored == document
+        assert rendered(restored) == rendered(expected)
+
+    with pytest.raises(ValueError):
+        DocumentIR.from_bytes(b'not an IR')
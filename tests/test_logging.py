@@ -0,0 +1,80 @@
+# tests/test_logging.py
+
+import os
+import sys
+import logging
+import logging.handlers
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.converter import MarkdownToWordConverter
+from src.utils import LOG_FILE_ENV, setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def restore_logging():
+    yield
+    setup_logging(force=True)
+
+
+def _queue_handlers():
+    return [handler for handler in logging.getLogger().handlers
+            if isinstance(handler, logging.handlers.QueueHandler)]
+
+
+def test_setup_is_idempotent_and_uses_config_levels():
+    for _ in range(3):
+        MarkdownToWordConverter(backend='ooxml')
+    setup_logging()
+    # pytest attaches its own capture handlers to the root logger
+    ours = [handler for handler in logging.getLogger().handlers
+            if not type(handler).__module__.startswith('_pytest')]
+    assert ours == _queue_handlers() and len(ours) == 1
+    assert logging.getLogger().level == logging.INFO
+
+
+def test_records_are_written_by_background_listener(tmp_path, restore_logging):
+    log_path = tmp_path / "run.log"
+    config_path = tmp_path / "logging.yaml"
+    config_path.write_text(
+        "version: 1\n"
+        "handlers:\n"
+        "    file:\n"
+        "        class: logging.FileHandler\n"
+        "        level: DEBUG\n"
+        f"        filename: {log_path.as_posix()}\n"
+        "root:\n"
+        "    level: DEBUG\n"
+        "    handlers: [file]\n",
+        encoding='utf-8'
+    )
+    setup_logging(str(config_path), force=True)
+    logging.debug("Converted %d paragraphs", 42)
+    shutdown_logging()
+    assert "Converted 42 paragraphs" in log_path.read_text(encoding='utf-8')
+
+
+def test_filtered_messages_are_never_formatted(restore_logging):
+    class Expensive:
+        formatted = 0
+
+        def __str__(self):
+            Expensive.formatted += 1
+            return "expensive"
+
+    setup_logging(force=True)
+    logging.debug("Paragraph %s", Expensive())
+    assert Expensive.formatted == 0
+
+
+def test_default_log_file_can_be_redirected(tmp_path, monkeypatch, restore_logging):
+    log_path = tmp_path / "redirected.log"
+    monkeypatch.setenv(LOG_FILE_ENV, str(log_path))
+    setup_logging(force=True)
+    logging.info("Redirected %s", "record")
+    shutdown_logging()
+    assert "Redirected record" in log_path.read_text(encoding='utf-8')
@@ -0,0 +1,102 @@
+# tests/test_ooxml_writer.py
+
+import os
+import sys
+import zipfile
+import tracemalloc
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.converter import MarkdownToWordConverter
+from src.ooxml_writer import OoxmlDocument
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+SAMPLE = """# Introduction >> owner: docs
+Body with **bold**, *italic* and `code`.
+
+## Details
+- First bullet
+1. First step
+> Quoted text
+
+```
+x = 1 < 2
+```
+"""
+
+
+def _convert(tmp_path, markdown: str) -> str:
+    markdown_path = tmp_path / "sample.md"
+    markdown_path.write_text(markdown, encoding='utf-8')
+    converter = MarkdownToWordConverter(backend='ooxml')
+    return converter.convert(TEMPLATE, str(markdown_path), str(tmp_path / "out"))
+
+
+def test_styles_match_style_manager(tmp_path):
+    output_path = _convert(tmp_path, SAMPLE)
+    with zipfile.ZipFile(output_path) as package:
+        document_xml = package.read('word/document.xml').decode('utf-8')
+
+    styles = [
+        'Heading1', 'Body1', 'Heading2', 'Bullet2', 'Numbered2', 'Blockquote2', 'Code2'
+    ]
+    positions = [document_xml.index(f'<w:pStyle w:val="{style}"/>') for style in styles]
+    assert positions == sorted(positions)
+    assert 'owner: docs' not in document_xml
+    assert '<w:b/></w:rPr><w:t xml:space="preserve">bold</w:t>' in document_xml
+    assert 'x = 1 &lt; 2' in document_xml
+
+
+def test_package_is_macro_free_document(tmp_path):
+    output_path = _convert(tmp_path, SAMPLE)
+    with zipfile.ZipFile(output_path) as package:
+        names = package.namelist()
+        content_types = package.read('[Content_Types].xml').decode('utf-8')
+        rels = package.read('word/_rels/document.xml.rels').decode('utf-8')
+
+    assert names[0] == '[Content_Types].xml'
+    assert 'word/styles.xml' in names and 'word/numbering.xml' in names
+    assert 'word/theme/theme1.xml' in names
+    assert 'word/vbaProject.bin' not in names
+    assert 'wordprocessingml.document.main+xml' in content_types
+    assert 'vbaProject' not in rels and 'customizations.xml' not in rels
+
+
+def test_style_names_resolve_case_insensitively():
+    document = OoxmlDocument(TEMPLATE)
+    document.add_paragraph('heading', 'Heading 3')
+    document.add_paragraph('unknown', 'No Such Style')
+    assert document.has_style('Heading 3') and not document.has_style('No Such Style')
+    assert '<w:pStyle w:val="Heading3"/>' in document.paragraphs[0]
+    assert '<w:pStyle' not in document.paragraphs[1]
+
+
+def test_streaming_matches_buffered_output_in_bounded_memory(tmp_path):
+    markdown_path = tmp_path / "large.md"
+    with open(markdown_path, 'w', encoding='utf-8') as file:
+        for number in range(5000):
+            file.write(f"## Section {number}\nText with **bold** and `code` {number}\n- item\n")
+    outputs = []
+    peaks = []
+    for streaming in (True, False):
+        converter = MarkdownToWordConverter(backend='ooxml', backend_options={'streaming': streaming})
+        tracemalloc.start()
+        outputs.append(converter.convert(TEMPLATE, str(markdown_path), str(tmp_path / str(streaming))))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    with zipfile.ZipFile(outputs[0]) as streamed, zipfile.ZipFile(outputs[1]) as buffered:
+        assert streamed.namelist() == buffered.namelist()
+        assert streamed.read('word/document.xml') == buffered.read('word/document.xml')
+    assert peaks[0] < peaks[1] / 4
+
+
+def test_empty_markdown_leaves_no_output(tmp_path):
+    with pytest.raises(ValueError):
+        _convert(tmp_path, "\n   \n")
+    assert not os.listdir(tmp_path / "out")
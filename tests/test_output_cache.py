@@ -0,0 +1,130 @@
+# tests/test_output_cache.py
+
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.batch import plan_jobs, run_batch
+from src.cli import EXIT_OK, main
+from src.converter import MarkdownToWordConverter
+from src import output_cache
+from src.output_cache import OUTPUT_VERSION, OutputCache, output_version
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+def test_second_conversion_is_served_from_the_cache(tmp_path):
+    markdown = tmp_path / 'doc.md'
+    markdown.write_text('# Title\n\nSome **bold** text\n', encoding='utf-8')
+    cache = OutputCache(str(tmp_path / 'cache'))
+    converter = MarkdownToWordConverter(backend='ooxml', output_cache=cache)
+
+    first = converter.convert(TEMPLATE, str(markdown), str(tmp_path / 'one'))
+    assert not converter.cache_hit
+    second = converter.convert(TEMPLATE, str(markdown), str(tmp_path / 'two'))
+    assert converter.cache_hit
+
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        assert a.read() == b.read()
+    assert os.stat(first).st_ino == os.stat(second).st_ino  # Hard-linked, not copied
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['stores']) == (1, 1, 1)
+    assert stats['hit_rate'] == 0.5
+
+    markdown.write_text('# Title\n\nOther text\n', encoding='utf-8')
+    converter.convert(TEMPLATE, str(markdown), str(tmp_path / 'three'))
+    assert not converter.cache_hit
+
+
+def test_key_covers_template_images_and_options(tmp_path):
+    markdown = tmp_path / 'doc.md'
+    markdown.write_text('# Title\n\n![Logo](logo.png)\n', encoding='utf-8')
+    (tmp_path / 'logo.png').write_bytes(b'first image')
+    template = tmp_path / 'template.dotm'
+    template.write_bytes(open(TEMPLATE, 'rb').read())
+    cache = OutputCache(str(tmp_path / 'cache'))
+
+    key = cache.key(str(markdown), str(template))
+    assert cache.key(str(markdown), str(template)) == key
+    assert cache.key(str(markdown), str(template), backend_options={'compression_level': 1}) != key
+
+    (tmp_path / 'logo.png').write_bytes(b'second image')
+    image_key = cache.key(str(markdown), str(template))
+    assert image_key != key
+
+    with open(template, 'ab') as file:
+        file.write(b'\0')
+    assert cache.key(str(markdown), str(template)) != image_key
+
+
+def test_key_changes_with_the_converter_sources(tmp_path, monkeypatch):
+    markdown = tmp_path / 'doc.md'
+    markdown.write_text('# Title\n', encoding='utf-8')
+    cache = OutputCache(str(tmp_path / 'cache'))
+    key = cache.key(str(markdown), TEMPLATE)
+    assert output_version() == output_version() and output_version().startswith(f"{OUTPUT_VERSION}-")
+
+    # As if the package were edited: a new process hashes different sources
+    monkeypatch.setattr(output_cache, '_output_version', f"{OUTPUT_VERSION}-edited")
+    assert cache.key(str(markdown), TEMPLATE) != key
+
+
+def test_eviction_removes_least_recently_used_entries(tmp_path):
+    cache = OutputCache(str(tmp_path / 'cache'), link=False)
+    for index in range(3):
+        document = tmp_path / f'{index}.docx'
+        document.write_bytes(bytes([index]) * 1000)
+        key = f'{index:064x}'
+        cache.store(key, str(document))
+        # Distinct last-use times, oldest first
+        os.utime(cache.used_path(cache.entry_path(key)), ns=(index * 10**9, index * 10**9))
+    assert cache.fetch(f'{0:064x}', str(tmp_path / 'used.docx'))
+
+    cache.max_bytes = 2500
+    assert cache.evict() == 1
+    assert os.path.exists(cache.entry_path(f'{0:064x}'))
+    assert not os.path.exists(cache.entry_path(f'{1:064x}'))
+    assert not os.path.exists(cache.used_path(cache.entry_path(f'{1:064x}')))
+    assert os.path.exists(cache.entry_path(f'{2:064x}'))
+
+
+def test_hits_leave_hard_linked_outputs_untouched(tmp_path):
+    cache = OutputCache(str(tmp_path / 'cache'))
+    document = tmp_path / 'converted.docx'
+    document.write_bytes(b'document')
+    os.utime(document, ns=(10**9, 10**9))
+    key = f'{7:064x}'
+    cache.store(key, str(document))
+
+    assert cache.fetch(key, str(tmp_path / 'again.docx'))
+    # The user's output shares its inode, and so its timestamps, with the entry
+    assert os.stat(document).st_ino == os.stat(cache.entry_path(key)).st_ino
+    assert os.stat(document).st_mtime_ns == 10**9
+    assert os.path.getmtime(cache.used_path(cache.entry_path(key))) > 1
+
+
+def test_batch_reports_cache_hits(tmp_path):
+    for name in ('a', 'b'):
+        (tmp_path / f'{name}.md').write_text(f'# {name}\n', encoding='utf-8')
+    jobs = plan_jobs([str(tmp_path / 'a.md'), str(tmp_path / 'b.md')], str(tmp_path / 'out'))
+    cache_options = {'cache_dir': str(tmp_path / 'cache')}
+
+    assert run_batch(TEMPLATE, jobs, workers=2, cache_options=cache_options).cache_hits == 0
+    summary = run_batch(TEMPLATE, jobs, workers=1, cache_options=cache_options)
+    assert summary.succeeded == 2 and summary.cache_hits == 2
+
+
+def test_cli_can_copy_outputs_out_of_the_cache(tmp_path, capsys):
+    (tmp_path / 'docs').mkdir()
+    (tmp_path / 'docs' / 'a.md').write_text('# A\n', encoding='utf-8')
+    arguments = [TEMPLATE, str(tmp_path / 'docs'), '-j', '1', '-q', '--cache', '--cache-copy',
+                 '--cache-dir', str(tmp_path / 'cache')]
+    assert main(arguments + ['-o', str(tmp_path / 'one')]) == EXIT_OK
+    assert main(arguments + ['-o', str(tmp_path / 'two')]) == EXIT_OK
+    assert 'Output cache: 1 hits, 0 misses' in capsys.readouterr().out
+
+    outputs = [entry.path for directory in ('one', 'two') for entry in os.scandir(tmp_path / directory)]
+    assert len(outputs) == 2 and all(os.stat(path).st_nlink == 1 for path in outputs)
@@ -0,0 +1,60 @@
+# tests/test_packager.py
+
+import os
+import sys
+import zlib
+import zipfile
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.ooxml_writer import OoxmlDocument
+from src.packager import deflate_chunks, read_compressed_parts
+from src.template_cache import get_template
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+def test_template_parts_are_copied_without_recompressing(tmp_path, monkeypatch):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+    document = OoxmlDocument(TEMPLATE)
+    document.add_paragraph('Hello', 'Body 1')
+    output_path = str(tmp_path / 'out.docx')
+    document.save(output_path)
+
+    with open(output_path, 'rb') as file:
+        data = file.read()
+    with open(TEMPLATE, 'rb') as file:
+        template = read_compressed_parts(file.read())
+    written = read_compressed_parts(data)
+    for name in ('word/styles.xml', 'word/theme/theme1.xml', 'word/glossary/document.xml'):
+        assert written[name].data == template[name].data
+    assert 'word/vbaProject.bin' not in written
+
+    with zipfile.ZipFile(output_path) as package:
+        assert package.testzip() is None
+        assert b'Hello' in package.read('word/document.xml')
+        core = package.read('docProps/core.xml').decode('utf-8')
+    assert '>2023-11-14T22:13:20Z</dcterms:created>' in core
+    assert '>2023-11-14T22:13:20Z</dcterms:modified>' in core
+    assert '<cp:revision>1</cp:revision>' in core
+
+    # Level 0 stores the per-document parts, the template parts stay deflated
+    stored = OoxmlDocument(get_template(TEMPLATE), compression_level=0)
+    stored.add_paragraph('Hello', 'Body 1')
+    stored.save(output_path)
+    with zipfile.ZipFile(output_path) as package:
+        assert package.getinfo('word/document.xml').compress_type == zipfile.ZIP_STORED
+        assert package.getinfo('word/styles.xml').compress_type == zipfile.ZIP_DEFLATED
+        assert package.read('docProps/core.xml').decode('utf-8') == core
+
+
+def test_chunks_deflated_in_parallel_form_one_stream():
+    chunks = [f'<w:p>{number} {"text " * (number % 50)}</w:p>'.encode('utf-8') * 300 for number in range(40)]
+    checksum = [0, 0]
+    compressed = b''.join(deflate_chunks(chunks, 6, checksum=checksum))
+    data = b''.join(chunks)
+    assert zlib.decompress(compressed, -zlib.MAX_WBITS) == data
+    assert checksum == [zlib.crc32(data), len(data)]
+    assert len(compressed) < len(zlib.compress(data, 6)) * 1.1
@@ -0,0 +1,239 @@
+# tests/test_service.py
+
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import zipfile
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.backends import OoxmlBackend
+from src.service import ConversionRequest, ConversionService, ServiceError, content_disposition
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+class HangingBackend(OoxmlBackend):
+    """Never finishes a document with a paragraph reading HANG"""
+
+    def stream_paragraphs(self, output_path, paragraphs):
+        def checked():
+            for item in paragraphs:
+                if isinstance(item, tuple) and item[0] == 'HANG':
+                    time.sleep(3600)
+                yield item
+        super().stream_paragraphs(output_path, checked())
+
+
+async def _http(unix_socket, method, path, payload=None, head=None):
+    reader, writer = await asyncio.open_unix_connection(unix_socket)
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+                 + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    response_head, _, body = response.partition(b'\r\n\r\n')
+    if head is not None:
+        head.extend(response_head.decode('latin-1').split('\r\n')[1:])
+    return int(response_head.split()[1]), body
+
+
+def test_service_converts_over_unix_socket(tmp_path):
+    unix_socket = str(tmp_path / "service.sock")
+
+    async def scenario():
+        service = ConversionService(workers=2, queue_size=4, template_dir=os.path.dirname(TEMPLATE),
+                                    preload=['Normal.dotm'])
+        await service.start(host=None, unix_socket=unix_socket)
+        try:
+            inline, by_path = await asyncio.gather(
+                _http(unix_socket, 'POST', '/convert', {'template': 'Normal.dotm', 'markdown': "# Title\nHello"}),
+                _http(unix_socket, 'POST', '/convert', {'template': TEMPLATE, 'markdown': "Second",
+                                                        'output_dir': str(tmp_path / "out")}),
+            )
+            missing = await _http(unix_socket, 'POST', '/convert', {'template': 'nope.dotx', 'markdown': "x"})
+            metrics = await _http(unix_socket, 'GET', '/metrics')
+        finally:
+            await service.stop()
+        return inline, by_path, missing, metrics
+
+    inline, by_path, missing, metrics = asyncio.run(scenario())
+    assert inline[0] == 200
+    with zipfile.ZipFile(io.BytesIO(inline[1])) as package:
+        assert "Hello" in package.read('word/document.xml').decode('utf-8')
+    assert by_path[0] == 200
+    assert os.path.isfile(json.loads(by_path[1])['path'])
+    assert missing[0] == 404
+
+    stats = json.loads(metrics[1])
+    assert stats['completed'] == 2 and stats['workers'] == 2 and stats['queue_depth'] == 0
+    assert 0 < stats['latency_seconds']['p50'] <= stats['latency_seconds']['p99']
+    assert 0 < stats['utilisation'] <= 1
+
+
+def test_service_rejects_when_full_and_times_out(tmp_path):
+    async def scenario():
+        # Not started: nothing drains the queue, so the second job cannot be queued
+        service = ConversionService(workers=1, queue_size=1)
+        service.queue = asyncio.Queue(1)
+        waiting = asyncio.create_task(service.submit(ConversionRequest(TEMPLATE, markdown="a", timeout=0.2)))
+        await asyncio.sleep(0)
+        with pytest.raises(ServiceError) as rejected:
+            await service.submit(ConversionRequest(TEMPLATE, markdown="b"))
+        with pytest.raises(ServiceError) as timed_out:
+            await waiting
+        return service, rejected.value, timed_out.value
+
+    service, rejected, timed_out = asyncio.run(scenario())
+    assert rejected.status == 503 and timed_out.status == 504
+    assert service.metrics.rejected == 1 and service.metrics.timed_out == 1
+
+
+def test_hung_job_is_killed_and_its_worker_replaced(tmp_path):
+    unix_socket = str(tmp_path / "service.sock")
+
+    async def scenario():
+        service = ConversionService(workers=1, queue_size=4, timeout=2.0, backend=HangingBackend)
+        await service.start(host=None, unix_socket=unix_socket)
+        try:
+            hung_pid = service.processes[0].process.pid
+            hung = await _http(unix_socket, 'POST', '/convert', {'template': TEMPLATE, 'markdown': "HANG"})
+            start = time.monotonic()
+            fine = await _http(unix_socket, 'POST', '/convert', {'template': TEMPLATE, 'markdown': "Fine"})
+            return hung, fine, time.monotonic() - start, hung_pid, service.processes[0].process.pid, \
+                service.metrics_snapshot()
+        finally:
+            await service.stop()
+
+    hung, fine, seconds, hung_pid, new_pid, stats = asyncio.run(scenario())
+    assert hung[0] == 504
+    # The only worker was free again for the next job instead of converting HANG forever
+    assert fine[0] == 200 and seconds < 30
+    assert new_pid != hung_pid
+    assert stats['restarts'] == 1 and stats['completed'] == 1
+
+
+def test_download_name_cannot_inject_headers(tmp_path):
+    unix_socket = str(tmp_path / "service.sock")
+    name = '报告 "q1"\r\nX-Injected: 1'
+
+    async def scenario():
+        service = ConversionService(workers=1, queue_size=2)
+        await service.start(host=None, unix_socket=unix_socket)
+        try:
+            head = []
+            status, _ = await _http(unix_socket, 'POST', '/convert',
+                                    {'template': TEMPLATE, 'markdown': "x", 'name': name}, head)
+            return status, head
+        finally:
+            await service.stop()
+
+    status, head = asyncio.run(scenario())
+    assert status == 200
+    assert not any(line.startswith('X-Injected') for line in head)
+    assert f"Content-Disposition: {content_disposition(name + '.docx')}" in head
+    assert content_disposition(name + '.docx') == (
+        "attachment; filename=\"__ _q1___X-Injected: 1.docx\"; "
+        "filename*=UTF-8''%E6%8A%A5%E5%91%8A%20%22q1%22%0D%0AX-Injected%3A%201.docx"
+    )
+
+
+def test_invalid_content_length_is_a_bad_request(tmp_path):
+    unix_socket = str(tmp_path / "service.sock")
+
+    async def send(length):
+        reader, writer = await asyncio.open_unix_connection(unix_socket)
+        writer.write(f"POST /convert HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return int(response.split()[1])
+
+    async def scenario():
+        service = ConversionService(workers=1, queue_size=2)
+        await service.start(host=None, unix_socket=unix_socket)
+        try:
+            return [await send(length) for length in ('abc', '-5', '+2', '')]
+        finally:
+            await service.stop()
+
+    assert asyncio.run(scenario()) == [400, 400, 400, 400]
+
+
+@pytest.mark.parametrize('fields', [
+    {'template': TEMPLATE, 'markdown': "x", 'timeout': "5"},
+    {'template': TEMPLATE, 'markdown': "x", 'timeout': -1},
+    {'template': TEMPLATE, 'markdown': "x", 'timeout': 0},
+    {'template': TEMPLATE, 'markdown': "x", 'timeout': True},
+    {'template': 5, 'markdown': "x"},
+    {'markdown': "x"},
+    {'template': TEMPLATE, 'markdown': ["x"]},
+    {'template': TEMPLATE, 'markdown_path': 5},
+    {'template': TEMPLATE, 'markdown': "x", 'name': 5},
+    {'template': TEMPLATE, 'markdown': "x", 'output_dir': {}},
+    ["not", "an", "object"],
+])
+def test_mistyped_request_fields_are_bad_requests(fields):
+    with pytest.raises(ServiceError) as rejected:
+        ConversionRequest.from_json(json.dumps(fields).encode('utf-8'))
+    assert rejected.value.status == 400
+
+
+def test_mistyped_requests_get_a_400_response_and_never_run(tmp_path):
+    unix_socket = str(tmp_path / "service.sock")
+
+    async def scenario():
+        service = ConversionService(workers=1, queue_size=2)
+        await service.start(host=None, unix_socket=unix_socket)
+        try:
+            responses = [await _http(unix_socket, 'POST', '/convert', fields) for fields in (
+                {'template': TEMPLATE, 'markdown': "x", 'timeout': "5"},
+                {'template': 5, 'markdown': "x"},
+                {'template': TEMPLATE, 'markdown': "x", 'timeout': -1},
+            )]
+            return responses, service.metrics_snapshot()
+        finally:
+            await service.stop()
+
+    responses, stats = asyncio.run(scenario())
+    assert [status for status, _ in responses] == [400, 400, 400]
+    assert all('error' in json.loads(body) for _, body in responses)
+    assert stats['restarts'] == 0 and stats['completed'] == 0 and stats['failed'] == 0
+
+
+class _RecordingWriter:
+    def __init__(self):
+        self.data = b''
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_unexpected_errors_are_answered_with_500():
+    async def scenario():
+        reader = asyncio.StreamReader(limit=1024)
+        reader.feed_data(b"GET /" + b"x" * 4096 + b" HTTP/1.1\r\n\r\n")  # Request line over the limit
+        reader.feed_eof()
+        writer = _RecordingWriter()
+        await ConversionService(workers=1, queue_size=1).handle_connection(reader, writer)
+        return writer
+
+    writer = asyncio.run(scenario())
+    head, _, body = writer.data.partition(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.1 500 Internal Server Error')
+    assert 'error' in json.loads(body) and writer.closed
@@ -0,0 +1,31 @@
+# tests/test_startup.py
+
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.startup import ENTRY_POINT, deferred_modules_loaded, import_times, loaded_modules
+from src.utils import CACHE_DIR_ENV
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+def test_headless_conversion_leaves_gui_com_and_yaml_unimported(tmp_path):
+    markdown_path = tmp_path / 'doc.md'
+    markdown_path.write_text("# Title\nSome **bold** text\n", encoding='utf-8')
+    env = dict(os.environ, **{CACHE_DIR_ENV: str(tmp_path / 'cache')})
+
+    # The first run parses the logging config with PyYAML and caches it
+    first = loaded_modules(TEMPLATE, str(markdown_path), str(tmp_path / 'out'), env)
+    assert 'yaml' in first
+    second = loaded_modules(TEMPLATE, str(markdown_path), str(tmp_path / 'out'), env)
+    assert deferred_modules_loaded(second) == []
+    assert len(os.listdir(tmp_path / 'out')) >= 1
+
+    modules = [name for name, _, _ in import_times()]
+    assert f'{ENTRY_POINT}.__main__' in modules
+    assert deferred_modules_loaded(set(modules)) == []
+    assert 'src.service' not in modules and 'src.fake_word' not in modules
@@ -0,0 +1,69 @@
+# tests/test_style_manager.py
+
+import os
+import sys
+import logging
+from collections import Counter
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.backends import WordBackend
+from src.fake_word import FakeWordApplication
+from src.formatters import TextFormatter
+from src.style_manager import StyleManager
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+def _open_fake(app):
+    backend = WordBackend(application_factory=lambda: app, visible=False)
+    backend.start()
+    backend.open(TEMPLATE)
+    return backend
+
+
+def test_build_style_index_applies_fallback_chain():
+    index = StyleManager().build_style_index(['Normal', 'Body 0', 'Body 2', 'heading 1'])
+    assert index[('body', 2)] == 'Body 2'
+    assert index[('body', 5)] == 'Body 0'
+    assert index[('bullet', 3)] == 'Normal'
+    assert index[('heading', 1)] == 'Heading 1'
+
+
+def test_build_style_index_logs_each_missing_style_once(caplog):
+    with caplog.at_level(logging.INFO):
+        StyleManager().build_style_index(['Normal', 'Body 0', 'Body 2'])
+    messages = Counter(record.getMessage() for record in caplog.records)
+    assert max(messages.values()) == 1
+    # Every type and level but Body 0 and Body 2 is missing
+    assert len(messages) == 6 * 10 - 2
+    assert messages['Style Body 5 not found, using base style Body 0'] == 1
+    assert messages['Style Bullet 0 not found, falling back to Normal'] == 1
+
+
+def test_style_index_is_cached_by_template_hash(tmp_path):
+    first_app = FakeWordApplication()
+    first = StyleManager()
+    index = first.load_style_index(_open_fake(first_app), TEMPLATE, cache_dir=str(tmp_path))
+    assert first_app.recorder.counts['Styles.__iter__'] == 1
+    assert len(os.listdir(tmp_path)) == 1
+
+    second_app = FakeWordApplication()
+    second = StyleManager()
+    assert second.load_style_index(_open_fake(second_app), TEMPLATE, cache_dir=str(tmp_path)) == index
+    assert second_app.recorder.counts['Styles.__iter__'] == 0
+
+
+def test_indexed_styles_skip_per_paragraph_probing(tmp_path):
+    app = FakeWordApplication()
+    backend = _open_fake(app)
+    style_manager = StyleManager()
+    style_manager.load_style_index(backend, TEMPLATE, cache_dir=str(tmp_path))
+    app.recorder.reset()
+
+    TextFormatter().process_content(backend, "# One\nText\n## Two\n- item", style_manager)
+
+    assert app.recorder.counts['Styles.Item'] == 0
+    assert [style for _, style, _ in backend.doc.paragraphs()[1:]] == ['Heading 1', 'Body 1', 'Heading 2', 'Bullet 2']
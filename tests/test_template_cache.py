@@ -0,0 +1,60 @@
+# tests/test_template_cache.py
+
+import os
+import sys
+import pickle
+import shutil
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.ooxml_writer import OoxmlDocument
+from src.template_cache import TemplateCache
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+def test_templates_are_compiled_once_per_content(tmp_path):
+    cache = TemplateCache()
+    template = cache.get(TEMPLATE)
+    assert cache.get(TEMPLATE) is template
+
+    copy_path = tmp_path / "copy.dotm"
+    shutil.copyfile(TEMPLATE, copy_path)
+    assert cache.get(str(copy_path)) is template
+    assert (cache.misses, cache.hits) == (1, 2)
+
+    other_path = tmp_path / "other.dotm"
+    with open(TEMPLATE, 'rb') as source, open(other_path, 'wb') as target:
+        target.write(source.read() + b'\0')  # Trailing data after the zip still reads
+    assert cache.get(str(other_path)) is not template
+    assert cache.misses == 2
+
+
+def test_least_recently_used_template_is_evicted(tmp_path):
+    cache = TemplateCache(max_entries=1)
+    first = cache.get(TEMPLATE)
+    other_path = tmp_path / "other.dotm"
+    with open(TEMPLATE, 'rb') as source, open(other_path, 'wb') as target:
+        target.write(source.read() + b'\0')
+    cache.get(str(other_path))
+    assert cache.get(TEMPLATE) is not first
+
+
+def test_compiled_template_is_immutable_and_picklable(tmp_path):
+    template = TemplateCache().get(TEMPLATE)
+    with pytest.raises(AttributeError):
+        template.sha256 = 'changed'
+    with pytest.raises(TypeError):
+        template.parts['word/document.xml'] = b''
+    assert template.theme_xml and template.numbering_xml and template.header_footer_parts == {}
+
+    copy = pickle.loads(pickle.dumps(template))
+    assert copy.sha256 == template.sha256 and copy.style_names == template.style_names
+    document = OoxmlDocument(copy)
+    document.add_paragraph("Title", "Heading 1")
+    document.save(str(tmp_path / "out.docx"))
+    assert os.path.getsize(tmp_path / "out.docx") > 0
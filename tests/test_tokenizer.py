@@ -0,0 +1,60 @@
+# tests/test_tokenizer.py
+
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.tokenizer import Block, parse_line, parse_markdown
+
+
+def test_block_kinds_and_heading_metadata():
+    blocks = parse_markdown(
+        "## Scope >> owner: security >> v2\n"
+        "Plain *text*\n"
+        "> Quoted\n"
+        "1. Step\n"
+        "```python\n"
+        "# not a heading\n"
+        "- not a bullet\n"
+        "```\n"
+    )
+    assert blocks == [
+        Block('heading', 'Scope', level=2, metadata='owner: security >> v2', line=1),
+        Block('body', 'Plain *text*', line=2),
+        Block('blockquote', 'Quoted', line=3),
+        Block('numbered', 'Step', line=4),
+        Block('code', '# not a heading\n- not a bullet', info='python', line=5),
+    ]
+
+
+def test_list_nesting_depth():
+    blocks = parse_markdown("- a\n  - b\n    - c\n  - d\n- e\n\tsecond\n1. f\n   * g\n")
+    assert [(block.kind, block.text, block.depth) for block in blocks] == [
+        ('bullet', 'a', 0), ('bullet', 'b', 1), ('bullet', 'c', 2), ('bullet', 'd', 1),
+        ('bullet', 'e', 0), ('body', 'second', 0), ('numbered', 'f', 0), ('bullet', 'g', 1),
+    ]
+
+
+def test_unterminated_fence_and_blank_lines():
+    assert parse_markdown("~~~\nx\n\ny") == [Block('code', 'x\n\ny', line=1)]
+    assert parse_line("   ") is None
+    assert parse_line("######### Nine").level == 9
+    assert parse_line("########## Ten").kind == 'body'
+
+
+def test_pipe_tables_need_a_matching_delimiter_row():
+    blocks = parse_markdown(
+        "| Name | Note \\| escaped | Qty |\n|:--|:-:|--:|\n| a | **b** |\nc | d | e | f\n\n"
+        "x | y\nnot a delimiter\n| p | q |\n|---|---|---|"
+    )
+    table = blocks[0]
+    assert table.kind == 'table' and table.line == 1
+    assert table.alignments == ['left', 'center', 'right']
+    # Short rows are padded and long rows cut to the header's width
+    assert table.rows == [['Name', 'Note | escaped', 'Qty'], ['a', '**b**', ''], ['c', 'd', 'e']]
+    assert [(block.kind, block.text) for block in blocks[1:]] == [
+        ('body', 'x | y'), ('body', 'not a delimiter'), ('body', '| p | q |'), ('body', '|---|---|---|')
+    ]
@@ -0,0 +1,109 @@
+# tests/test_tracing.py
+
+import os
+import sys
+import json
+import pstats
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.batch import collect_inputs, plan_jobs, run_batch
+from src.cli import main
+from src.converter import MarkdownToWordConverter
+from src.tracing import ComCallCounter, Tracer
+from tests.test_images import _png
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+MARKDOWN = "# Title\nBody with **bold**\n- item\n"
+
+
+def test_stages_and_com_calls_are_counted_per_document(tmp_path):
+    markdown_path = tmp_path / "doc.md"
+    markdown_path.write_text(MARKDOWN, encoding='utf-8')
+    tracer = Tracer(record_events=True)
+    converter = MarkdownToWordConverter(backend='fake', tracer=tracer)
+    converter.convert(TEMPLATE, str(markdown_path), str(tmp_path / "out"))
+    converter.convert(TEMPLATE, str(markdown_path), str(tmp_path / "out"))
+
+    summary = tracer.summary()
+    assert summary['totals']['documents'] == 2
+    document = summary['documents'][0]
+    assert document['document'] == str(markdown_path)
+    for stage in ('init_backend', 'create_document', 'process_content', 'save', 'backend.set_style'):
+        assert document['stages'][stage]['calls'] >= 1
+    assert document['calls']['backend.add_paragraph'] == 3
+    assert document['calls']['Selection.TypeParagraph'] == 3
+    assert document['calls']['Document.SaveAs'] == 1
+
+    trace_path = tmp_path / "trace.json"
+    tracer.write_chrome_trace(str(trace_path))
+    events = json.loads(trace_path.read_text(encoding='utf-8'))['traceEvents']
+    assert {event['ph'] for event in events} == {'M', 'X'}
+    assert sum(1 for event in events if event.get('cat') == 'document') == 2
+
+
+class _Range:
+    def __init__(self):
+        self.received = []
+        self.FormattedText = None
+
+    def Duplicate(self):
+        return _Range()
+
+    def InRange(self, other, Strict=None):
+        self.received += [other, Strict]
+        return True
+
+
+def test_com_arguments_are_unwrapped():
+    tracer = Tracer()
+    target = _Range()
+    counted = ComCallCounter(target, tracer, 'Range')
+    other = counted.Duplicate()
+    assert isinstance(other, ComCallCounter)
+
+    assert counted.InRange(other, Strict=other) is True
+    counted.FormattedText = other
+    # Word only accepts its own objects, never the counting proxy around them
+    assert all(isinstance(value, _Range) for value in target.received + [target.FormattedText])
+
+
+def test_images_are_traced(tmp_path):
+    (tmp_path / "logo.png").write_bytes(_png(40, 20))
+    markdown_path = tmp_path / "doc.md"
+    markdown_path.write_text("# Title\n![Logo](logo.png)\n\nText\n", encoding='utf-8')
+    tracer = Tracer()
+    MarkdownToWordConverter(backend='fake', tracer=tracer).convert(TEMPLATE, str(markdown_path), str(tmp_path / "out"))
+
+    document = tracer.summary()['documents'][0]
+    assert document['stages']['backend.add_image']['calls'] == 1
+    assert document['calls']['InlineShapes.AddPicture'] == 1
+    assert document['calls']['InlineShape.Width'] == 1
+
+
+def test_untraced_converter_records_nothing(tmp_path):
+    markdown_path = tmp_path / "doc.md"
+    markdown_path.write_text(MARKDOWN, encoding='utf-8')
+    converter = MarkdownToWordConverter(backend='ooxml')
+    converter.convert(TEMPLATE, str(markdown_path), str(tmp_path / "out"))
+    assert converter.tracer.summary()['documents'] == []
+
+
+def test_batch_collects_traces_from_workers_and_profiles(tmp_path, capsys):
+    for name in ("a", "b"):
+        (tmp_path / "docs").mkdir(exist_ok=True)
+        (tmp_path / "docs" / f"{name}.md").write_text(MARKDOWN, encoding='utf-8')
+    jobs = plan_jobs(collect_inputs([str(tmp_path / "docs")]), str(tmp_path / "out"))
+    tracer = Tracer()
+    run_batch(TEMPLATE, jobs, workers=2, tracer=tracer)
+    assert tracer.summary()['totals']['documents'] == 2
+
+    profile_path = tmp_path / "run.prof"
+    summary_path = tmp_path / "summary.json"
+    assert main([TEMPLATE, str(tmp_path / "docs"), '-o', str(tmp_path / "out"), '-j', '1', '-q',
+                 '--profile', str(profile_path), '--trace-summary', str(summary_path)]) == 0
+    assert pstats.Stats(str(profile_path)).total_calls > 0
+    assert json.loads(summary_path.read_text(encoding='utf-8'))['totals']['documents'] == 2
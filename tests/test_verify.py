@@ -0,0 +1,88 @@
+# tests/test_verify.py
+
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.cli import EXIT_OK, main
+from src.converter import MarkdownToWordConverter
+from src.verify import DocumentVerifier, extract_text, merge_spans, verify_batch
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+MARKDOWN = """# Title
+
+Some **bold**, *italic*, ***both*** and `code` text.
+
+- First item
+  - Nested item
+
+```
+def f():
+    return 1
+```
+
+| Name | Value |
+|------|------:|
+| **a** | 1 |
+"""
+
+
+def _convert(tmp_path, markdown=MARKDOWN, name='doc.md'):
+    path = tmp_path / name
+    path.write_text(markdown, encoding='utf-8')
+    converter = MarkdownToWordConverter(backend='ooxml')
+    return str(path), converter.convert(TEMPLATE, str(path), str(tmp_path / 'out'))
+
+
+def test_converted_document_matches_its_markdown(tmp_path):
+    markdown_path, docx_path = _convert(tmp_path)
+    result = DocumentVerifier(TEMPLATE).verify(markdown_path, docx_path)
+    assert result.ok, [str(mismatch) for mismatch in result.mismatches]
+    assert result.items == 6
+
+    paragraphs = list(extract_text(docx_path))
+    assert paragraphs[0] == ('heading 1', 'Title')
+    assert paragraphs[1][1] == 'Some bold, italic, both and code text.'
+    assert paragraphs[4][1] == 'def f():\n    return 1'
+    assert paragraphs[5][1] == 'Name\tValue\na\t1'
+
+
+def test_changed_markdown_is_reported(tmp_path):
+    markdown_path, docx_path = _convert(tmp_path)
+    with open(markdown_path, 'w', encoding='utf-8') as file:
+        file.write(MARKDOWN.replace('*italic*', 'italic').replace('# Title', '## Title'))
+
+    result = DocumentVerifier(TEMPLATE, max_mismatches=1).verify(markdown_path, docx_path)
+    assert not result.ok
+    assert result.mismatch_count == 5  # The heading level restyles every paragraph below it
+    assert len(result.mismatches) == 1
+    assert result.mismatches[0].message == 'different style'
+
+
+def test_merge_spans_joins_touching_runs_of_one_format():
+    assert merge_spans([(4, 6, 'bold'), (0, 4, 'bold'), (6, 8, 'italic'), (7, 9, 'code')]) == \
+        [(0, 6, 'bold'), (6, 8, 'italic')]
+
+
+def test_parallel_verification_reports_unreadable_documents(tmp_path):
+    pairs = [_convert(tmp_path, f"# Doc {index}\n\nText {index}\n", f'doc{index}.md') for index in range(3)]
+    broken = tmp_path / 'broken.docx'
+    broken.write_bytes(b'not a zip file')
+    pairs.append((pairs[0][0], str(broken)))
+
+    results = verify_batch(TEMPLATE, pairs, workers=2)
+    assert len(results) == 4
+    failed = [result for result in results if not result.ok]
+    assert [result.docx_path for result in failed] == [str(broken)]
+    assert failed[0].error.startswith('BadZipFile')
+
+
+def test_cli_verifies_converted_documents(tmp_path, capsys):
+    (tmp_path / 'docs').mkdir()
+    (tmp_path / 'docs' / 'a.md').write_text(MARKDOWN, encoding='utf-8')
+    assert main([TEMPLATE, str(tmp_path / 'docs'), '-o', str(tmp_path / 'out'), '-j', '1', '-q', '--verify']) == EXIT_OK
+    assert '1 verified, 0 differ' in capsys.readouterr().out
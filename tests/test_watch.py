@@ -0,0 +1,63 @@
+# tests/test_watch.py
+
+import os
+import sys
+import queue
+import threading
+import zipfile
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.watch import PollingWatcher, watch
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+def test_polling_watcher_reports_new_and_modified_files(tmp_path):
+    (tmp_path / 'a.md').write_text('# A\n', encoding='utf-8')
+    (tmp_path / 'notes.txt').write_text('ignored', encoding='utf-8')
+    watcher = PollingWatcher([str(tmp_path)], interval=0.01)
+    assert set(watcher.snapshot) == {str(tmp_path / 'a.md')}
+    assert watcher.changes(timeout=0.05) == set()
+
+    (tmp_path / 'a.md').write_text('# A\nmore\n', encoding='utf-8')
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'b.md').write_text('# B\n', encoding='utf-8')
+    (tmp_path / 'notes.txt').write_text('still ignored', encoding='utf-8')
+    assert watcher.changes(timeout=1) == {str(tmp_path / 'a.md'), str(tmp_path / 'sub' / 'b.md')}
+
+
+@pytest.mark.parametrize('poll', [True, False])
+def test_watch_reconverts_only_saved_files(tmp_path, poll):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    (docs / 'a.md').write_text('# A\nfirst\n', encoding='utf-8')
+    (docs / 'b.md').write_text('# B\n', encoding='utf-8')
+    results = queue.Queue()
+    stop_event = threading.Event()
+    thread = threading.Thread(target=watch, args=(TEMPLATE, [str(docs)], str(tmp_path / 'out')),
+                              kwargs={'debounce': 0.05, 'poll': poll, 'interval': 0.02,
+                                      'on_result': results.put, 'stop_event': stop_event})
+    thread.start()
+    try:
+        initial = {results.get(timeout=10).job.markdown_path for _ in range(2)}
+        assert initial == {str(docs / 'a.md'), str(docs / 'b.md')}
+
+        # Two quick saves fall in one debounce window and convert once
+        (docs / 'a.md').write_text('# A\nsecond\n', encoding='utf-8')
+        (docs / 'a.md').write_text('# A\nthird\n', encoding='utf-8')
+        result = results.get(timeout=10)
+        assert result.ok and result.job.markdown_path == str(docs / 'a.md')
+        assert result.output_path == str(tmp_path / 'out' / 'a.docx')
+        with zipfile.ZipFile(result.output_path) as package:
+            assert b'third' in package.read('word/document.xml')
+        with pytest.raises(queue.Empty):
+            results.get(timeout=0.3)
+    finally:
+        stop_event.set()
+        thread.join(timeout=10)
+    assert sorted(os.listdir(tmp_path / 'out')) == ['a.docx', 'b.docx']
@@ -0,0 +1,86 @@
+# tests/test_watchdog.py
+
+import os
+import sys
+import time
+import multiprocessing
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.backends import OoxmlBackend
+from src.batch import plan_jobs, run_batch
+from src.watchdog import WatchdogPool, WatchdogWorker, report_process, report_process_exit
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+def _sleep_task(seconds, value):
+    time.sleep(seconds)
+    return value, os.getpid()
+
+
+def _report_task(started, exited):
+    for process_id in started:
+        report_process(process_id)
+    for process_id in exited:
+        report_process_exit(process_id)
+    return 'done'
+
+
+class UnreliableBackend(OoxmlBackend):
+    """Hangs on a paragraph reading HANG, and kills its process on CRASH until a marker file exists"""
+
+    def stream_paragraphs(self, output_path, paragraphs):
+        def checked():
+            for item in paragraphs:
+                if isinstance(item, tuple) and item[0] == 'HANG':
+                    time.sleep(3600)
+                if isinstance(item, tuple) and item[0].startswith('CRASH '):
+                    marker = item[0][len('CRASH '):]
+                    if not os.path.exists(marker):
+                        open(marker, 'w').close()
+                        os._exit(3)
+                yield item
+        super().stream_paragraphs(output_path, checked())
+
+
+def test_hung_task_restarts_only_its_worker():
+    pool = WatchdogPool(2, timeout=1.0, retries=1)
+    tasks = [(30, 'hung'), (0.1, 'a'), (0.1, 'b'), (0.1, 'c')]
+    start = time.monotonic()
+    outcomes = {outcome.task_id: outcome for outcome in pool.run(_sleep_task, tasks)}
+
+    assert time.monotonic() - start < 10
+    assert outcomes[0].error.startswith('TimeoutError') and outcomes[0].attempts == 2
+    assert pool.restarts == 2
+    assert sorted(outcomes[index].result[0] for index in (1, 2, 3)) == ['a', 'b', 'c']
+    # The healthy worker ran every other task without being restarted
+    assert len({outcomes[index].result[1] for index in (1, 2, 3)}) == 1
+
+
+def test_batch_times_out_hung_jobs_and_retries_crashed_workers(tmp_path):
+    (tmp_path / 'hang.md').write_text('HANG\n', encoding='utf-8')
+    (tmp_path / 'crash.md').write_text(f"CRASH {tmp_path / 'marker'}\n", encoding='utf-8')
+    (tmp_path / 'fine.md').write_text('# Fine\n', encoding='utf-8')
+    jobs = plan_jobs([str(tmp_path / name) for name in ('hang.md', 'crash.md', 'fine.md')], str(tmp_path / 'out'))
+
+    summary = run_batch(TEMPLATE, jobs, workers=2, backend=UnreliableBackend, timeout=2.0, retries=1)
+    results = {os.path.basename(result.job.markdown_path): result for result in summary.results}
+
+    assert summary.succeeded == 2 and summary.failed == 1
+    assert results['hang.md'].error.startswith('TimeoutError') and results['hang.md'].attempts == 2
+    assert results['crash.md'].ok and results['crash.md'].attempts == 2
+    assert results['fine.md'].ok and results['fine.md'].attempts == 1
+
+
+def test_exited_helpers_are_forgotten():
+    worker = WatchdogWorker(multiprocessing.get_context(), None, ())
+    try:
+        # Process IDs that are never signalled: the worker is stopped, not killed
+        outcome = worker.call(_report_task, ([4000001, 4000002], [4000001]), timeout=10)
+        assert outcome.result == 'done'
+        assert worker.helpers == {4000002}
+    finally:
+        worker.stop()
@@ -0,0 +1,98 @@
+# tests/test_word_pool.py
+
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.backends import WordBackend
+from src.converter import MarkdownToWordConverter
+from src.fake_word import FakeWordApplication
+from src.word_pool import WordInstancePool
+
+TEMPLATE = os.path.join(project_root, 'docx', 'Normal.dotm')
+
+
+class BrokenWordApplication(FakeWordApplication):
+    """Fake Word whose automation server has stopped answering"""
+
+    @property
+    def Documents(self):
+        raise RuntimeError("The RPC server is unavailable")
+
+
+def test_instances_are_reused_and_recycled_after_max_documents():
+    pool = WordInstancePool(size=1, max_documents=2, application_factory=FakeWordApplication)
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(first)
+
+    assert first.app.quit_called
+    replacement = pool.acquire()
+    assert replacement is not first and pool.created == 2
+
+
+def test_failed_and_unhealthy_instances_are_replaced():
+    apps = iter([BrokenWordApplication(), FakeWordApplication(), FakeWordApplication()])
+    pool = WordInstancePool(size=1, application_factory=lambda: next(apps))
+    started, stopped = [], []
+    pool.on_start = started.append
+    pool.on_stop = stopped.append
+
+    broken = pool.acquire()
+    pool.release(broken)
+    healthy = pool.acquire()
+    assert healthy is not broken and isinstance(healthy.app, FakeWordApplication)
+    pool.release(healthy)
+
+    with pytest.raises(ValueError):
+        with pool.instance():
+            raise ValueError("conversion failed")
+    assert pool.recycled == 2 and pool.live == 0 and pool.created == 2
+    assert stopped == started == [broken, healthy]
+
+
+def test_acquire_times_out_when_pool_is_busy():
+    pool = WordInstancePool(size=1, application_factory=FakeWordApplication)
+    pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.01)
+
+
+def test_waiter_gets_a_new_instance_when_a_failed_one_frees_its_slot():
+    pool = WordInstancePool(size=1, application_factory=FakeWordApplication)
+    first = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(timeout=5)))
+    waiter.start()
+    time.sleep(0.05)  # Let the waiter block on the busy pool
+
+    pool.release(first, failed=True)
+    waiter.join(5)
+    assert len(acquired) == 1 and acquired[0] is not first
+    assert pool.created == 2 and pool.live == 1
+
+
+def test_converter_borrows_from_pool_and_leaves_other_documents_open(tmp_path):
+    pool = WordInstancePool(size=1, application_factory=FakeWordApplication)
+    instance = pool.acquire()
+    app = instance.app
+    user_document = app.Documents.Add()
+    pool.release(instance)
+
+    markdown_path = tmp_path / "doc.md"
+    markdown_path.write_text("# Title\nBody", encoding='utf-8')
+    converter = MarkdownToWordConverter(backend=lambda: WordBackend(pool=pool))
+    for _ in range(3):
+        converter.convert(TEMPLATE, str(markdown_path), str(tmp_path / "out"))
+
+    assert pool.created == 1
+    assert not user_document.closed
+    assert app.Documents.items == [user_document]